@@ -1,6 +1,8 @@
 from django.urls import re_path
 
 from .views import ValidationRequestListAPIView, ValidationRequestDetailAPIView
+from .views import ValidationBatchAPIView, ValidationBatchDetailAPIView
+from .views import ChunkedUploadAPIView, ChunkedUploadDetailAPIView, HeaderPreviewAPIView
 from .views import ValidationTaskListAPIView, ValidationTaskDetailAPIView
 from .views import ValidationOutcomeListAPIView, ValidationOutcomeDetailAPIView
 from .views import ModelListAPIView, ModelDetailAPIView
@@ -12,6 +14,11 @@ urlpatterns = [
     # using re_path to make trailing slashes optional
     re_path(r'validationrequest/?$',                ValidationRequestListAPIView.as_view()),
     re_path(r'validationrequest/(?P<id>[\w-]+)/?$', ValidationRequestDetailAPIView.as_view()),
+    re_path(r'validationbatch/?$',                  ValidationBatchAPIView.as_view()),
+    re_path(r'validationbatch/(?P<id>[\w-]+)/?$',   ValidationBatchDetailAPIView.as_view()),
+    re_path(r'upload/?$',                           ChunkedUploadAPIView.as_view()),
+    re_path(r'upload/(?P<id>[\w-]+)/?$',            ChunkedUploadDetailAPIView.as_view()),
+    re_path(r'headerpreview/(?P<id>[\w-]+)/?$',     HeaderPreviewAPIView.as_view()),
     re_path(r'validationtask/?$',                   ValidationTaskListAPIView.as_view()),
     re_path(r'validationtask/(?P<id>[\w-]+)/?$',    ValidationTaskDetailAPIView.as_view()),
     re_path(r'validationoutcome/?$',                ValidationOutcomeListAPIView.as_view()),
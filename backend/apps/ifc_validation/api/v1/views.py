@@ -1,11 +1,15 @@
 import traceback
 import sys
 import logging
+import io
 import re
+import uuid
+import base64
 
 from django.db import transaction
+from django.utils.http import http_date
 from core.utils import get_client_ip_address
-from core.settings import MAX_FILES_PER_UPLOAD
+from core.settings import MAX_FILES_PER_UPLOAD, MAX_FILE_SIZE_IN_MB
 
 from rest_framework import status, serializers
 from rest_framework.generics import ListAPIView, ListCreateAPIView
@@ -18,6 +22,7 @@ from rest_framework.throttling import UserRateThrottle
 from rest_framework.throttling import ScopedRateThrottle
 from rest_framework.decorators import throttle_classes
 from drf_spectacular.utils import extend_schema
+from pydantic import ValidationError as PydanticValidationError
 
 from apps.ifc_validation_models.models import set_user_context
 from apps.ifc_validation_models.models import ValidationRequest
@@ -25,6 +30,10 @@ from apps.ifc_validation_models.models import ValidationTask
 from apps.ifc_validation_models.models import ValidationOutcome
 from apps.ifc_validation_models.models import Model
 
+from ...models import ValidationBatch, ChunkedUpload
+from ...submission import collect_files, submit_batch, batch_progress
+from ... import chunked_upload, header_preview
+from .schemas import ValidationRequestIn
 from .serializers import ValidationRequestSerializer
 from .serializers import ValidationTaskSerializer
 from .serializers import ValidationOutcomeSerializer
@@ -198,9 +207,12 @@ class ValidationRequestListAPIView(ListCreateAPIView):
                     f.seek(0)
                     instance = serializer.save()
 
+                    # skip reuse of results for identical files?
+                    force = str(request.query_params.get('force', 'false')).lower() in ('1', 'true', 'yes')
+
                     # submit task for background execution
                     def submit_task(instance):
-                        ifc_file_validation_task.delay(instance.id, instance.file_name)
+                        ifc_file_validation_task.delay(instance.id, instance.file_name, force=force)
                         logger.info(f"Task 'ifc_file_validation_task' submitted for id:{instance.id} file_name: {instance.file_name})")
 
                     transaction.on_commit(lambda: submit_task(instance))                   
@@ -219,6 +231,269 @@ class ValidationRequestListAPIView(ListCreateAPIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+@extend_schema(tags=['Validation Request'])
+class ValidationBatchAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+    parser_classes = (MultiPartParser, FormParser)
+    throttle_classes = [ScopedRateThrottle]
+    throttle_scope = 'submit_validation_request'
+
+    @extend_schema(
+        operation_id='validationbatch_create',
+        request=None,
+        responses={
+            201: None,
+            400: None,
+        }
+    )
+    def post(self, request, *args, **kwargs):
+
+        """
+        Creates a Validation Request for each uploaded file (file, file[0], ... up to 100 files) and returns the batch id.
+        """
+
+        logger.info('API request v%s - User IP: %s Request Method: %s Request URL: %s Content-Length: %s' % (self.request.version, get_client_ip_address(request), request.method, request.path, request.META.get('CONTENT_LENGTH')))
+
+        # authenticated (see permission_classes), the body is parsed from here
+        header_preview.add_upload_handler(request)
+        files = collect_files(request.FILES)
+        logger.info(f"Received {len(files)} file(s) - files: {files}")
+
+        if not files:
+            return Response({'file': ['File is required.']}, status=status.HTTP_400_BAD_REQUEST)
+        if len(files) > MAX_FILES_PER_UPLOAD:
+            return Response({'file': [f'At most {MAX_FILES_PER_UPLOAD} files can be uploaded at a time.']}, status=status.HTTP_400_BAD_REQUEST)
+
+        # all files must be valid, otherwise none are submitted
+        errors = {}
+        for f in files:
+            try:
+                ValidationRequestIn.model_validate({'file': f, 'file_name': f.name, 'size': f.size})
+            except PydanticValidationError as exc:
+                errors[f.name] = [err.get('msg', '').removeprefix('Value error, ') for err in exc.errors()]
+        if errors:
+            return Response({'file': errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        set_user_context(request.user)
+        force = str(request.query_params.get('force', 'false')).lower() in ('1', 'true', 'yes')
+        batch, requests = submit_batch(request.user, files, channel='API', force=force)
+
+        data = {
+            'batch_id': str(batch.public_id),
+            'requests': [ValidationRequestSerializer(r).data for r in requests],
+            'header_previews': getattr(request, 'header_previews', {}),
+        }
+        return Response(data, status=status.HTTP_201_CREATED)
+
+
+@extend_schema(tags=['Validation Request'])
+class ValidationBatchDetailAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+    throttle_classes = [UserRateThrottle]
+
+    @extend_schema(
+        operation_id='validationbatch_get',
+        responses={
+            200: None,
+            404: None,
+        }
+    )
+    def get(self, request, id, *args, **kwargs):
+
+        """
+        Returns the aggregate status and progress of the Validation Requests of a batch.
+        """
+
+        logger.info('API request v%s - User IP: %s Request Method: %s Request URL: %s Content-Length: %s' % (self.request.version, get_client_ip_address(request), request.method, request.path, request.META.get('CONTENT_LENGTH')))
+
+        batch = ValidationBatch.objects.filter(public_id=id, created_by_id=request.user.id).first() if _is_uuid(id) else None
+        if batch:
+            return Response(batch_progress(batch), status=status.HTTP_200_OK)
+        else:
+            data = {'detail': f"Validation Batch with id={id} does not exist for user with id={request.user.id}."}
+            return Response(data, status=status.HTTP_404_NOT_FOUND)
+
+
+def _is_uuid(value):
+    try:
+        uuid.UUID(str(value))
+        return True
+    except ValueError:
+        return False
+
+
+@extend_schema(tags=['Validation Request'])
+class HeaderPreviewAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+    throttle_classes = [UserRateThrottle]
+
+    @extend_schema(operation_id='headerpreview_get', responses={200: None, 404: None})
+    def get(self, request, id, *args, **kwargs):
+
+        """
+        Returns the preview of magic-bytes and header checks, run while a file was still uploading.
+        """
+
+        preview = header_preview.get(id) if _is_uuid(id) else None
+        if preview is None:
+            return Response({'detail': f"Header preview with id={id} does not exist."}, status=status.HTTP_404_NOT_FOUND)
+        return Response(preview, status=status.HTTP_200_OK)
+
+
+TUS_VERSION = '1.0.0'
+
+
+def _tus_response(status_code, upload=None, **headers):
+    response = Response(status=status_code, headers={'Tus-Resumable': TUS_VERSION, 'Cache-Control': 'no-store', **headers})
+    if upload is not None:
+        response['Upload-Offset'] = str(upload.offset)
+        response['Upload-Length'] = str(upload.length)
+        if upload.request_id is not None:
+            response['Validation-Request-Id'] = ValidationRequest.to_public_id(upload.request_id)
+        else:
+            response['Upload-Expires'] = http_date(chunked_upload.expires_at(upload).timestamp())
+    return response
+
+
+def _upload_metadata(header):
+    # Upload-Metadata: key base64(value), key base64(value), ...
+    metadata = {}
+    for pair in filter(None, (p.strip() for p in (header or '').split(','))):
+        key, _, value = pair.partition(' ')
+        metadata[key] = base64.b64decode(value).decode('utf-8') if value else ''
+    return metadata
+
+
+@extend_schema(tags=['Validation Request'])
+class ChunkedUploadAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+    throttle_classes = [ScopedRateThrottle]
+    throttle_scope = 'submit_validation_request'
+
+    @extend_schema(operation_id='upload_create', request=None, responses={201: None, 400: None, 413: None})
+    def post(self, request, *args, **kwargs):
+
+        """
+        Starts a resumable upload (tus protocol); requires the Upload-Length and Upload-Metadata (filename) headers.
+        """
+
+        logger.info('API request v%s - User IP: %s Request Method: %s Request URL: %s Content-Length: %s' % (self.request.version, get_client_ip_address(request), request.method, request.path, request.META.get('CONTENT_LENGTH')))
+
+        try:
+            length = int(request.headers.get('Upload-Length', ''))
+            file_name = _upload_metadata(request.headers.get('Upload-Metadata')).get('filename')
+        except (ValueError, UnicodeDecodeError):
+            return Response({'detail': 'Invalid Upload-Length or Upload-Metadata header.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        if not file_name or not file_name.lower().endswith('.ifc'):
+            return Response({'file_name': ["File name must end with '.ifc'."]}, status=status.HTTP_400_BAD_REQUEST)
+        if length <= 0:
+            return Response({'size': ['Size must be positive.']}, status=status.HTTP_400_BAD_REQUEST)
+        if length > MAX_FILE_SIZE_IN_MB * 1024 * 1024:
+            return Response({'size': [f'File size exceeds allowed file size limit ({MAX_FILE_SIZE_IN_MB} MB).']}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+        upload = chunked_upload.create_upload(request.user, file_name, length)
+        return _tus_response(status.HTTP_201_CREATED, upload, Location=request.build_absolute_uri(f'{request.path.rstrip("/")}/{upload.public_id}'))
+
+
+@extend_schema(tags=['Validation Request'])
+class ChunkedUploadDetailAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+    throttle_classes = [UserRateThrottle]
+
+    def get_upload(self, request, id):
+        if not _is_uuid(id):
+            return None
+        return ChunkedUpload.objects.filter(public_id=id, created_by_id=request.user.id).first()
+
+    @extend_schema(operation_id='upload_get', responses={200: None, 404: None, 410: None})
+    def get(self, request, id, *args, **kwargs):
+
+        """
+        Returns the state of an upload, including the preview of its HEADER section once available.
+        """
+
+        upload = self.get_upload(request, id)
+        if upload is None:
+            return _tus_response(status.HTTP_404_NOT_FOUND)
+        if chunked_upload.is_expired(upload):
+            return _tus_response(status.HTTP_410_GONE)
+        data = {
+            'offset': upload.offset,
+            'length': upload.length,
+            'validation_request': ValidationRequest.to_public_id(upload.request_id) if upload.request_id is not None else None,
+            'header_preview': header_preview.get(str(upload.public_id)),
+        }
+        return Response(data, status=status.HTTP_200_OK)
+
+    @extend_schema(operation_id='upload_head', responses={200: None, 404: None, 410: None})
+    def head(self, request, id, *args, **kwargs):
+
+        """
+        Returns the offset to resume an upload from (and the Validation Request, once assembled).
+        """
+
+        upload = self.get_upload(request, id)
+        if upload is None:
+            return _tus_response(status.HTTP_404_NOT_FOUND)
+        if chunked_upload.is_expired(upload):
+            return _tus_response(status.HTTP_410_GONE)
+        return _tus_response(status.HTTP_200_OK, upload)
+
+    @extend_schema(operation_id='upload_patch', request=None, responses={204: None, 404: None, 409: None, 410: None, 413: None, 460: None})
+    def patch(self, request, id, *args, **kwargs):
+
+        """
+        Appends a chunk (Content-Type: application/offset+octet-stream) at Upload-Offset, optionally verified by Upload-Checksum (sha256).
+        """
+
+        logger.info('API request v%s - User IP: %s Request Method: %s Request URL: %s Content-Length: %s' % (self.request.version, get_client_ip_address(request), request.method, request.path, request.META.get('CONTENT_LENGTH')))
+
+        upload = self.get_upload(request, id)
+        if upload is None:
+            return _tus_response(status.HTTP_404_NOT_FOUND)
+        if chunked_upload.is_expired(upload):
+            return _tus_response(status.HTTP_410_GONE)
+        if request.content_type != 'application/offset+octet-stream':
+            return _tus_response(status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, upload)
+
+        try:
+            offset = int(request.headers.get('Upload-Offset', ''))
+            checksum = chunked_upload.parse_checksum(request.headers.get('Upload-Checksum'))
+        except ValueError as err:
+            return Response({'detail': str(err) or 'Invalid Upload-Offset header.'}, status=status.HTTP_400_BAD_REQUEST, headers={'Tus-Resumable': TUS_VERSION})
+
+        set_user_context(request.user)
+        force = str(request.query_params.get('force', 'false')).lower() in ('1', 'true', 'yes')
+        try:
+            chunked_upload.append_chunk(upload, offset, request.stream or io.BytesIO(), checksum=checksum, force=force)
+        except chunked_upload.UploadOffsetMismatch:
+            # removed meanwhile if it expired
+            upload = self.get_upload(request, id)
+            if upload is None:
+                return _tus_response(status.HTTP_410_GONE)
+            return _tus_response(status.HTTP_409_CONFLICT, upload)
+        except chunked_upload.UploadTooLarge:
+            return _tus_response(status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, upload)
+        except chunked_upload.UploadChecksumMismatch:
+            return _tus_response(460, upload)  # tus: checksum mismatch
+
+        return _tus_response(status.HTTP_204_NO_CONTENT, upload)
+
+    @extend_schema(operation_id='upload_delete', responses={204: None, 404: None})
+    def delete(self, request, id, *args, **kwargs):
+
+        """
+        Cancels an upload that was not assembled yet.
+        """
+
+        upload = self.get_upload(request, id)
+        if upload is None or upload.request_id is not None:
+            return _tus_response(status.HTTP_404_NOT_FOUND)
+        chunked_upload.discard(upload)
+        return _tus_response(status.HTTP_204_NO_CONTENT)
+
+
 @extend_schema(tags=['Validation Task'])
 class ValidationTaskDetailAPIView(APIView):
 
@@ -0,0 +1,108 @@
+"""
+Cached responses of the admin chart endpoints (see chart_views).
+
+Responses are cached in Redis per endpoint, year, period and window. Closed years
+don't change and are kept for CHART_CACHE_TTL_CLOSED; responses that include the current
+year (the current year itself, 'total', rolling windows and endpoints without a year)
+are kept for CHART_CACHE_TTL_CURRENT and are invalidated at once by bumping a generation
+whenever the rollups are refreshed (see chart_rollups.refresh). Endpoints that read Validation
+Requests, Tasks or Models directly are therefore up to CHART_CACHE_TTL_CURRENT behind.
+"""
+
+import datetime
+import functools
+import logging
+
+from django.http import HttpResponse
+
+from core.redis_lock import redis_client
+from core.settings import CHART_CACHE_ENABLED, CHART_CACHE_TTL_CLOSED, CHART_CACHE_TTL_CURRENT
+
+logger = logging.getLogger(__name__)
+
+CURRENT_GENERATION_KEY = "validation:charts:generation:current"
+CLOSED_GENERATION_KEY = "validation:charts:generation:closed"
+STATS_KEY = "validation:charts:stats"
+
+
+def bump_current_generation():
+    try:
+        redis_client.incr(CURRENT_GENERATION_KEY)
+    except Exception as err:
+        logger.warning(f"Could not invalidate cached charts: {err}")
+
+
+def bump_closed_generation():
+    """Invalidates cached responses of closed years (eg. after a full rollup refresh)."""
+    try:
+        redis_client.incr(CLOSED_GENERATION_KEY)
+    except Exception as err:
+        logger.warning(f"Could not invalidate cached charts: {err}")
+
+
+def _is_current(year, period, window):
+    return year is None or period == "total" or window is not None or year >= datetime.date.today().year
+
+
+def _count(endpoint, outcome):
+    try:
+        redis_client.hincrby(STATS_KEY, f"{endpoint}:{outcome}")
+    except Exception:
+        pass
+
+
+def stats():
+    """
+    Hit/miss counters per endpoint, eg. {"get_totals": {"hit": 10, "miss": 2}}.
+    """
+    counters = {}
+    for field, value in redis_client.hgetall(STATS_KEY).items():
+        endpoint, outcome = field.rsplit(":", 1)
+        counters.setdefault(endpoint, {"hit": 0, "miss": 0})[outcome] = int(value)
+    return counters
+
+
+def cached_chart(view):
+    """
+    Caches successful responses of a chart view; to be applied below @staff_member_required.
+    """
+    endpoint = view.__name__
+
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not CHART_CACHE_ENABLED:
+            return view(request, *args, **kwargs)
+
+        # imported here, chart_views imports this module
+        from .chart_views import get_period, get_window
+
+        year = kwargs.get("year", args[0] if args else None)
+        period, window = get_period(request), get_window(request)
+        current = _is_current(year, period, window)
+
+        try:
+            generation = redis_client.get(CURRENT_GENERATION_KEY if current else CLOSED_GENERATION_KEY) or 0
+            key = f"validation:charts:{endpoint}:{year}:{period}:{window}:{generation}"
+            content = redis_client.get(key)
+        except Exception as err:
+            logger.warning(f"Chart cache not available: {err}")
+            return view(request, *args, **kwargs)
+
+        if content is not None:
+            _count(endpoint, "hit")
+            response = HttpResponse(content, content_type="application/json")
+            response["X-Cache"] = "HIT"
+            return response
+
+        response = view(request, *args, **kwargs)
+        if response.status_code == 200:
+            try:
+                ttl = CHART_CACHE_TTL_CURRENT if current else CHART_CACHE_TTL_CLOSED
+                redis_client.set(key, response.content.decode("utf-8"), ex=ttl)
+            except Exception as err:
+                logger.warning(f"Could not cache chart {endpoint}: {err}")
+        _count(endpoint, "miss")
+        response["X-Cache"] = "MISS"
+        return response
+
+    return wrapper
@@ -0,0 +1,205 @@
+"""
+Daily rollups of Validation Requests, Tasks and Models for the admin charts (see chart_views).
+
+Rollups of a day are recomputed as a whole, for all days that had changes since the
+previous refresh (plus today, as durations of running requests depend on the current time).
+"""
+
+import datetime
+import logging
+
+from django.db import transaction
+from django.db.models import Count, Sum, F, Q, Case, When, DurationField
+from django.db.models.functions import Now, TruncDate
+from django.utils import timezone
+
+from core.redis_lock import redis_client
+
+from apps.ifc_validation_models.models import ValidationRequest, ValidationTask, Model
+
+from . import chart_cache
+from .models import RequestDailyRollup, TaskDailyRollup, ModelDailyRollup, UploaderDailyRollup
+
+logger = logging.getLogger(__name__)
+
+# days refreshed per query/transaction
+DAYS_PER_BATCH = 31
+
+# rows that change while a refresh runs (in-flight transactions) are picked up by the next one
+WATERMARK_MARGIN = datetime.timedelta(minutes=5)
+WATERMARK_KEY = "validation:chart-rollups:watermark"
+
+
+def _seconds(duration):
+    return duration.total_seconds() if duration else 0
+
+
+def _start_of_day(date):
+    return timezone.make_aware(datetime.datetime.combine(date, datetime.time.min))
+
+
+def _created_on(dates):
+    """
+    Filters on the creation date, as half-open ranges [start of day, start of next day) of consecutive
+    days, so that the index on 'created' can be used (unlike created__date__in).
+    """
+    ranges = []
+    for date in sorted(dates):
+        if ranges and ranges[-1][1] == date:
+            ranges[-1][1] = date + datetime.timedelta(days=1)
+        else:
+            ranges.append([date, date + datetime.timedelta(days=1)])
+
+    q = Q(pk__in=[])
+    for start, end in ranges:
+        q |= Q(created__gte=_start_of_day(start), created__lt=_start_of_day(end))
+    return q
+
+
+def _request_rows(dates):
+    qs = (ValidationRequest.objects
+        .filter(_created_on(dates))
+        .annotate(
+            day=TruncDate("created"),
+            _duration=Case(
+                When(completed__isnull=True, then=Now() - F("started")),
+                default=F("completed") - F("started"),
+                output_field=DurationField(),
+            ))
+        .values("day", "status", "channel", "model__schema")
+        .annotate(count=Count("id"), size_sum=Sum("size"), duration_sum=Sum("_duration"), duration_count=Count("_duration"))
+        .order_by())
+
+    return [RequestDailyRollup(
+        date=row["day"],
+        status=row["status"],
+        channel=row["channel"],
+        schema=row["model__schema"],
+        count=row["count"],
+        size_sum=row["size_sum"] or 0,
+        duration_sum=_seconds(row["duration_sum"]),
+        duration_count=row["duration_count"],
+    ) for row in qs]
+
+
+def _task_rows(dates):
+    qs = (ValidationTask.objects
+        .filter(_created_on(dates), status="COMPLETED")
+        .annotate(
+            day=TruncDate("created"),
+            _duration=Case(
+                When(ended__isnull=True, then=Now() - F("started")),
+                default=F("ended") - F("started"),
+                output_field=DurationField(),
+            ))
+        .values("day", "type")
+        .annotate(count=Count("id"), duration_sum=Sum("_duration"))
+        .order_by())
+
+    return [TaskDailyRollup(
+        date=row["day"],
+        type=row["type"],
+        count=row["count"],
+        duration_sum=_seconds(row["duration_sum"]),
+    ) for row in qs]
+
+
+def _model_rows(dates):
+    qs = (Model.objects
+        .filter(_created_on(dates))
+        .annotate(day=TruncDate("created"))
+        .values("day", "produced_by_id", "schema", "uploaded_by_id")
+        .annotate(count=Count("id"))
+        .order_by())
+
+    return [ModelDailyRollup(
+        date=row["day"],
+        produced_by_id=row["produced_by_id"],
+        schema=row["schema"],
+        uploaded_by_id=row["uploaded_by_id"],
+        count=row["count"],
+    ) for row in qs]
+
+
+def _uploader_rows(dates):
+    qs = (ValidationRequest.objects
+        .filter(_created_on(dates))
+        .annotate(day=TruncDate("created"))
+        .values("day", "created_by_id")
+        .annotate(count=Count("id"))
+        .order_by())
+
+    return [UploaderDailyRollup(
+        date=row["day"],
+        user_id=row["created_by_id"],
+        count=row["count"],
+    ) for row in qs]
+
+
+ROLLUPS = (
+    (RequestDailyRollup, _request_rows),
+    (TaskDailyRollup, _task_rows),
+    (ModelDailyRollup, _model_rows),
+    (UploaderDailyRollup, _uploader_rows),
+)
+
+
+def refresh_dates(dates):
+    """
+    Recomputes the rollups of the given days.
+    """
+    dates = sorted(set(dates))
+    for i in range(0, len(dates), DAYS_PER_BATCH):
+        batch = dates[i:i + DAYS_PER_BATCH]
+        with transaction.atomic():
+            for rollup, rows in ROLLUPS:
+                rollup.objects.filter(date__in=batch).delete()
+                rollup.objects.bulk_create(rows(batch))
+    return len(dates)
+
+
+def _created_dates(qs):
+    return set(qs.annotate(day=TruncDate("created")).values_list("day", flat=True).distinct())
+
+
+def changed_dates(since):
+    """
+    Days (by creation date) of requests, tasks and models that changed since 'since'.
+    """
+    return (
+        {timezone.localdate()}
+        | _created_dates(ValidationRequest.objects.filter(updated__gte=since))
+        | _created_dates(ValidationTask.objects.filter(updated__gte=since))
+        | _created_dates(Model.objects.filter(request__updated__gte=since))
+    )
+
+
+def all_dates():
+    return {timezone.localdate()} | _created_dates(ValidationRequest.objects.all()) | _created_dates(Model.objects.all())
+
+
+def refresh(full=False):
+    """
+    Refreshes the rollups of all days changed since the previous refresh,
+    or of all days when 'full' (or when there was no previous refresh).
+    """
+    started = timezone.now()
+    watermark = None if full else redis_client.get(WATERMARK_KEY)
+
+    if watermark is None:
+        dates = all_dates()
+        # days without any rows left
+        stale = set().union(*(rollup.objects.values_list("date", flat=True).distinct() for rollup, _ in ROLLUPS))
+        dates |= stale
+    else:
+        dates = changed_dates(datetime.datetime.fromisoformat(watermark) - WATERMARK_MARGIN)
+
+    count = refresh_dates(dates)
+    redis_client.set(WATERMARK_KEY, started.isoformat())
+
+    # cached chart responses are built from the rollups
+    chart_cache.bump_current_generation()
+    if any(d.year < timezone.localdate().year for d in dates):
+        chart_cache.bump_closed_generation()
+    logger.info(f"Refreshed chart rollups of {count} day(s)")
+    return count
@@ -11,6 +11,7 @@ urlpatterns = [
     path("duration-per-request/<int:year>/", charts.get_duration_per_request_chart),
     path("requests-by-schema/<int:year>/", charts.get_requests_by_schema_chart),
     path("duration-per-task/<int:year>/", charts.get_duration_per_task_chart),
+    path("duration-per-task-percentiles/<int:year>/", charts.get_duration_per_task_percentiles_chart),
     path("uploads-per-2h/<int:year>/", charts.get_uploads_per_2h_chart),
     path("processing-status/<int:year>/", charts.get_processing_status_chart),
     path("avg-size/<int:year>/", charts.get_avg_size_chart),
@@ -31,4 +32,6 @@ urlpatterns = [
     path("queue-p95/<int:year>/", charts.get_queue_p95_chart),
     path("stuck-per-day/<int:year>/", charts.get_stuck_per_day_chart),
     path("uploads-per-weekday/<int:year>/", charts.get_uploads_per_weekday_chart),
+    path("cache-stats/", charts.get_cache_stats),
+    path("queue-depths/", charts.get_queue_depths),
 ]
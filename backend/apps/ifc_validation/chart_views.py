@@ -1,11 +1,10 @@
 from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.models import User
-from django.db.models import Count, Q, F, Avg, When, Case, DurationField, IntegerField, ExpressionWrapper, Exists, OuterRef
-from django.db.models.functions import ExtractMonth, ExtractYear, Now, TruncDate, ExtractWeek, ExtractHour, Trunc, ExtractWeekDay, Cast
+from django.db.models import Count, Q, F, Avg, Sum, When, Case, Value, CharField, DurationField, FloatField, IntegerField, ExpressionWrapper, Exists, OuterRef
+from django.db.models.functions import ExtractMonth, ExtractYear, Now, TruncDate, ExtractWeek, ExtractHour, Trunc, ExtractWeekDay, Cast, NullIf
 from django.http import JsonResponse
 
 from zoneinfo import ZoneInfo
-import math
 import calendar
 import datetime
 import re
@@ -18,27 +17,33 @@ from apps.ifc_validation_models.models import (
     AuthoringTool,
 )
 
+from .models import RequestDailyRollup, TaskDailyRollup, ModelDailyRollup, UploaderDailyRollup
+from .percentiles import QUANTILES, duration_percentiles
+from .chart_cache import cached_chart
+from . import chart_cache
+from .tasks import scheduler
+
 MONTHS = list(calendar.month_name)[1:] 
 
 PERIODS = {
     "month": {
-        "annotate": lambda qs: qs.annotate(period=ExtractMonth("created")),
+        "annotate": lambda qs, field="created": qs.annotate(period=ExtractMonth(field)),
         "label":   lambda row: MONTHS[row["period"] - 1],         
         "full_set": MONTHS,
     },
     "week": {
-        "annotate": lambda qs: qs.annotate(period=ExtractWeek("created")),
+        "annotate": lambda qs, field="created": qs.annotate(period=ExtractWeek(field)),
         "label":   lambda row: f"W{int(row['period']):02d}",       # 1 → “W01”
         "full_set": [f"W{w:02d}" for w in range(1, 54)], # W01 - W53
     },
     "day": {
-        "annotate": lambda qs: qs.annotate(period=TruncDate("created")),
+        "annotate": lambda qs, field="created": qs.annotate(period=TruncDate(field)),
         "label":   lambda row: row["period"].strftime("%Y-%m-%d"),
         "full_set": None,  
     },
     "quarter": {
-            "annotate": lambda qs: qs.annotate(
-                month=ExtractMonth("created")
+            "annotate": lambda qs, field="created": qs.annotate(
+                month=ExtractMonth(field)
             ).annotate(
                 period=Case(
                     When(month__in=[1, 2, 3], then=1),
@@ -109,6 +114,13 @@ SCHEMA_COLORS = {
     "UNKNOWN": COLORS["prereq"],  
 }
 
+PERCENTILE_COLORS = {
+    50: COLORS["success"],
+    90: COLORS["info"],
+    95: COLORS["norm_ip"],
+    99: COLORS["danger"],
+}
+
 def normalize_schema(schema: str | None) -> str | None:
     """
     Map various schema strings to one of our canonical buckets:
@@ -154,6 +166,19 @@ def dict_for_period(period: str, year: int | None = None, window: int | None = N
              for i in range((last - first).days + 1) }
 
 
+def _rollup_count(qs):
+    """Total number of rows represented by a queryset of daily rollups."""
+    return qs.aggregate(total=Sum("count"))["total"] or 0
+
+
+def _rollup_avg(sum_field, count_field):
+    """Average over daily rollups, eg. _rollup_avg("size_sum", "count")."""
+    return ExpressionWrapper(
+        Cast(Sum(sum_field), FloatField()) / NullIf(Sum(count_field), 0),
+        output_field=FloatField(),
+    )
+
+
 def chart_response(title, labels, datasets):
     """Small wrapper around JsonResponse returning chart.js‑compatible payload."""
     return JsonResponse({
@@ -165,10 +190,10 @@ def chart_response(title, labels, datasets):
     })
 
 
-def group_by_period(qs, period, agg_key, agg_expression, window=None):
-    cfg = PERIODS[period]
-    qs = cfg["annotate"](qs)
-    
+def annotate_period(qs, period, window=None, field="created"):
+    """Annotates 'period' and, for a rolling window, keeps the rows within it."""
+    qs = PERIODS[period]["annotate"](qs, field)
+
     if window:
         valid_labels = set(_rolling_labels(period, window))
 
@@ -180,6 +205,11 @@ def group_by_period(qs, period, agg_key, agg_expression, window=None):
                 for lbl in valid_labels
             ])
         )
+    return qs
+
+
+def group_by_period(qs, period, agg_key, agg_expression, window=None, field="created"):
+    qs = annotate_period(qs, period, window=window, field=field)
     return (
         qs.values("period")
           .annotate(**{agg_key: agg_expression})
@@ -286,24 +316,24 @@ def _window_start(period: str, window: int, today: datetime.date | None = None)
 def _top_tools_chart_response(qs, period, year, title_prefix):
     """
     Helper to build a 'top 10 authoring tools' chart response
-    for a given queryset of Models.
+    for a given queryset of ModelDailyRollups.
     """
     # Aggregate models per AuthoringTool first
     agg = (
-        qs.values("produced_by")
-          .annotate(total=Count("id"))
+        qs.values("produced_by_id")
+          .annotate(total=Sum("count"))
     )
 
     if not agg:
         title = f"No uploads in {year}" if period != "total" else "No uploads (Total)"
         return chart_response(title, [], [])
 
-    tool_map = AuthoringTool.objects.in_bulk([row["produced_by"] for row in agg])
+    tool_map = AuthoringTool.objects.in_bulk([row["produced_by_id"] for row in agg])
 
     # Group by *normalised* label
     buckets: dict[str, int] = {}
     for row in agg:
-        tool = tool_map.get(row["produced_by"])
+        tool = tool_map.get(row["produced_by_id"])
         if not tool:
             continue
         label = normalize_tool_label(tool)
@@ -382,11 +412,12 @@ def normalize_tool_label(tool: AuthoringTool) -> str:
 
 
 @staff_member_required
+@cached_chart
 def get_filter_options(request):
     """Return distinct years that have validation‑request activity (for dropdown filter)."""
     years = (
-        ValidationRequest.objects
-        .annotate(y=ExtractYear("created"))
+        RequestDailyRollup.objects
+        .annotate(y=ExtractYear("date"))
         .values_list("y", flat=True)
         .distinct()
         .order_by("-y")
@@ -394,6 +425,7 @@ def get_filter_options(request):
     return JsonResponse({"options": list(years)})
 
 @staff_member_required
+@cached_chart
 def get_requests_total_chart(request, year):
     """
     Total number of validation requests (no status split).
@@ -405,7 +437,7 @@ def get_requests_total_chart(request, year):
     # TOTAL VIEW (all years)
     # ---------------------------
     if period == "total":
-        total = ValidationRequest.objects.count()
+        total = _rollup_count(RequestDailyRollup.objects.all())
 
         return chart_response(
             title="Total requests (all years)",
@@ -421,16 +453,17 @@ def get_requests_total_chart(request, year):
     # ---------------------------
     # TIME-SPLIT VIEW
     # ---------------------------
-    qs = ValidationRequest.objects.all()
+    qs = RequestDailyRollup.objects.all()
     if not window:
-        qs = qs.filter(created__year=year)
+        qs = qs.filter(date__year=year)
 
     grouped = group_by_period(
         qs,
         period,
         "count",
-        Count("id"),
+        Sum("count"),
         window=window,
+        field="date",
     )
 
     total_dict = fill_period_dict(
@@ -455,15 +488,16 @@ def get_requests_total_chart(request, year):
     
 
 @staff_member_required
+@cached_chart
 def get_requests_chart(request, year):
     period = get_period(request)
     window = get_window(request)
 
     if period == "total":
-        qs = ValidationRequest.objects.all()
+        qs = RequestDailyRollup.objects.all()
 
-        success_count = qs.filter(status="COMPLETED").count()
-        failed_count  = qs.filter(status="FAILED").count()
+        success_count = _rollup_count(qs.filter(status="COMPLETED"))
+        failed_count  = _rollup_count(qs.filter(status="FAILED"))
 
         return chart_response(
             title="Total requests (all years)",
@@ -476,10 +510,10 @@ def get_requests_chart(request, year):
             }]
         )
 
-    qs = ValidationRequest.objects.filter(created__year=year)
+    qs = RequestDailyRollup.objects.filter(date__year=year)
 
-    success_qs = group_by_period(qs.filter(status="COMPLETED"), period, "count", Count("id"), window=window)
-    failed_qs  = group_by_period(qs.filter(status="FAILED"), period, "count", Count("id"), window=window)
+    success_qs = group_by_period(qs.filter(status="COMPLETED"), period, "count", Sum("count"), window=window, field="date")
+    failed_qs  = group_by_period(qs.filter(status="FAILED"), period, "count", Sum("count"), window=window, field="date")
 
     success_dict = fill_period_dict(success_qs, period, year, key="count", transform=int, window=window)
     failed_dict  = fill_period_dict(failed_qs,  period, year, key="count", transform=int, window=window)
@@ -505,6 +539,7 @@ def get_requests_chart(request, year):
 
 
 @staff_member_required
+@cached_chart
 def get_requests_by_schema_chart(request, year):
     """
     Number of validation requests, split by IFC schema (IFC2X3, IFC4, IFC4X3).
@@ -513,26 +548,26 @@ def get_requests_by_schema_chart(request, year):
     window = get_window(request)
 
     # Base queryset: only requests that have a model
-    qs = ValidationRequest.objects.filter(model__isnull=False)
+    qs = RequestDailyRollup.objects.filter(schema__isnull=False)
 
     # For non-total views (month/week/day/quarter), limit to the given year
     if period != "total" and not window:
-        qs = qs.filter(created__year=year)
+        qs = qs.filter(date__year=year)
 
     # ------------------------------------------------------------------
     # TOTAL VIEW (no time splitting, just counts per schema)
     # ------------------------------------------------------------------
     if period == "total":
         agg = (
-            qs.values("model__schema")
-              .annotate(total=Count("id"))
-              .order_by("model__schema")
+            qs.values("schema")
+              .annotate(total=Sum("count"))
+              .order_by("schema")
         )
 
         # Only track the 3 known schemas
         buckets = {"IFC2X3": 0, "IFC4": 0, "IFC4X3": 0}
         for row in agg:
-            key = normalize_schema(row["model__schema"])
+            key = normalize_schema(row["schema"])
             if not key:
                 continue  # skip UNKNOWN / anything else
 
@@ -569,7 +604,7 @@ def get_requests_by_schema_chart(request, year):
     # ------------------------------------------------------------------
 
     # Annotate with chosen period
-    annotated_qs = PERIODS[period]["annotate"](qs)
+    annotated_qs = PERIODS[period]["annotate"](qs, "date")
 
     # Apply rolling window filter if requested
     if window:
@@ -585,9 +620,9 @@ def get_requests_by_schema_chart(request, year):
     # Group by period + schema
     grouped = (
         annotated_qs
-        .values("period", "model__schema")
-        .annotate(total=Count("id"))
-        .order_by("period", "model__schema")
+        .values("period", "schema")
+        .annotate(total=Sum("count"))
+        .order_by("period", "schema")
     )
 
     # Prepare per-schema dicts keyed by period label
@@ -598,7 +633,7 @@ def get_requests_by_schema_chart(request, year):
     }
 
     for row in grouped:
-        key = normalize_schema(row["model__schema"])
+        key = normalize_schema(row["schema"])
         if not key:
             continue  # skip UNKNOWN / anything else
 
@@ -645,22 +680,16 @@ def get_requests_by_schema_chart(request, year):
 
 
 @staff_member_required
+@cached_chart
 def get_duration_per_request_chart(request, year):
     'Total average request duration'
     period = get_period(request)
     window = get_window(request)
 
     if period == "total":
-        qs = ValidationRequest.objects.annotate(
-            _duration=Case(
-                When(completed__isnull=True, then=Now() - F("started")),
-                default=F("completed") - F("started"),
-                output_field=DurationField(),
-            )
-        )
-
-        avg_duration = qs.aggregate(avg_duration=Avg("_duration"))["avg_duration"]
-        minutes = (avg_duration.total_seconds() / SECONDS_PER_MINUTE) if avg_duration else 0
+        avg_duration = RequestDailyRollup.objects.aggregate(avg_duration=_rollup_avg("duration_sum", "duration_count"))["avg_duration"]
+        minutes = (avg_duration / SECONDS_PER_MINUTE) if avg_duration else 0
+        total = duration_percentiles(ValidationRequest.objects.all(), "started", "completed").get(None, {})
 
         return chart_response(
             title="Avg. duration per request (Total)",
@@ -670,44 +699,58 @@ def get_duration_per_request_chart(request, year):
                 "backgroundColor": COLORS["primary"],
                 "borderColor": COLORS["primary"],
                 "data": [round(minutes, 2)],
-            }]
+            }] + _duration_percentile_datasets(["Total"], {"Total": total}),
         )
 
-    qs = ValidationRequest.objects.all()
+    qs = RequestDailyRollup.objects.all()
     if not window:
-        qs = qs.filter(created__year=year)
-
-    qs = qs.annotate(
-        _duration=Case(
-            When(completed__isnull=True, then=Now() - F("started")),
-            default=F("completed") - F("started"),
-            output_field=DurationField(),
-        )
-    )
+        qs = qs.filter(date__year=year)
 
-    grouped = group_by_period(qs, period, "avg_duration", Avg("_duration"), window=window)
+    grouped = group_by_period(qs, period, "avg_duration", _rollup_avg("duration_sum", "duration_count"), window=window, field="date")
     minutes_dict = fill_period_dict(
         grouped,
         period,
         year,
         key="avg_duration",
-        transform=lambda d: (d.total_seconds() / SECONDS_PER_MINUTE) if d else 0,
+        transform=lambda d: (d / SECONDS_PER_MINUTE) if d else 0,
         window=window
     )
 
+    # percentiles of completed requests, from the requests themselves
+    requests = ValidationRequest.objects.all()
+    if not window:
+        requests = requests.filter(created__year=year)
+    per_period = duration_percentiles(annotate_period(requests, period, window=window), "started", "completed", by=["period"])
+    per_label = {PERIODS[period]["label"]({"period": p}): values for p, values in per_period.items()}
+
+    labels = list(minutes_dict.keys())
     return chart_response(
         title=f"Duration per request in {year}",
-        labels=list(minutes_dict.keys()),
+        labels=labels,
         datasets=[{
             "label": "Avg Duration (min)",
             "backgroundColor": COLORS["primary"],
             "borderColor": COLORS["primary"],
             "data": list(minutes_dict.values()),
-        }],
+        }] + _duration_percentile_datasets(labels, per_label),
     )
 
 
+def _duration_percentile_datasets(labels, per_label):
+    """Line datasets (in minutes) for percentiles in seconds per label."""
+    return [
+        {
+            "label": f"p{q} Duration (min)",
+            "backgroundColor": PERCENTILE_COLORS[q],
+            "borderColor": PERCENTILE_COLORS[q],
+            "data": [round(per_label.get(lbl, {}).get(q, 0) / SECONDS_PER_MINUTE, 2) for lbl in labels],
+        }
+        for q in QUANTILES
+    ]
+
+
 @staff_member_required
+@cached_chart
 def get_duration_per_task_chart(request, year):
     """
     Avg duration per task type, grouped by period or aggregated as 'total'.
@@ -716,23 +759,16 @@ def get_duration_per_task_chart(request, year):
     period = get_period(request)
     window = get_window(request)
 
-    qs = ValidationTask.objects.filter(status="COMPLETED")
+    # completed tasks only
+    qs = TaskDailyRollup.objects.all()
 
     if period != "total":
-        qs = qs.filter(created__year=year)
-
-    qs = qs.annotate(
-        _duration=Case(
-            When(ended__isnull=True, then=Now() - F("started")),
-            default=F("ended") - F("started"),
-            output_field=DurationField(),
-        )
-    )
+        qs = qs.filter(date__year=year)
 
     if period == "total":
         grouped = (
             qs.values("type")
-              .annotate(avg_duration=Avg("_duration"))
+              .annotate(avg_duration=_rollup_avg("duration_sum", "count"))
               .order_by("type")
         )
 
@@ -745,7 +781,7 @@ def get_duration_per_task_chart(request, year):
             if task_type not in TASK_TYPES:
                 continue
 
-            seconds = row["avg_duration"].total_seconds() if row["avg_duration"] else 0
+            seconds = row["avg_duration"] or 0
             datasets.append({
                 "label": TASK_TYPES[task_type][0],
                 "backgroundColor": TASK_TYPES[task_type][1],
@@ -759,7 +795,7 @@ def get_duration_per_task_chart(request, year):
             datasets=datasets,
         )
 
-    annotated_qs = PERIODS[period]["annotate"](qs)
+    annotated_qs = PERIODS[period]["annotate"](qs, "date")
     
     if window:
         valid_labels = set(_rolling_labels(period, window))
@@ -773,7 +809,7 @@ def get_duration_per_task_chart(request, year):
 
     grouped = (
         annotated_qs.values("period", "type")
-        .annotate(avg_duration=Avg("_duration"))
+        .annotate(avg_duration=_rollup_avg("duration_sum", "count"))
         .order_by("period", "type")
     )
 
@@ -790,7 +826,7 @@ def get_duration_per_task_chart(request, year):
             task_data[task_type] = dict_for_period(period, year, window=window)
 
         period_label = PERIODS[period]["label"](row)
-        seconds = row["avg_duration"].total_seconds() if row["avg_duration"] else 0
+        seconds = row["avg_duration"] or 0
         task_data[task_type][period_label] += round(seconds, 2)
 
     labels = list(next(iter(task_data.values())).keys()) if task_data else []
@@ -813,21 +849,61 @@ def get_duration_per_task_chart(request, year):
 
 
 @staff_member_required
+@cached_chart
+def get_duration_per_task_percentiles_chart(request, year):
+    """
+    p50/p90/p95/p99 duration of completed tasks per task type, for the selected year/window or 'total'.
+    """
+    period = get_period(request)
+    window = get_window(request)
+
+    qs = ValidationTask.objects.filter(status="COMPLETED").annotate(
+        task_type=Case(
+            When(type__in=list(SYNTAX_TASK_TYPES), then=Value("SYNTAX")),
+            default=F("type"),
+            output_field=CharField(),
+        )
+    )
+    if period != "total":
+        if not window:
+            qs = qs.filter(created__year=year)
+        qs = annotate_period(qs, period, window=window)
+
+    per_type = duration_percentiles(qs, "started", "ended", by=["task_type"])
+    task_types = [t for t in TASK_TYPES if t in per_type]
+
+    return chart_response(
+        title="Task Duration Percentiles (Total)" if period == "total" else f"Task Duration Percentiles in {year}",
+        labels=[TASK_TYPES[t][0] for t in task_types],
+        datasets=[
+            {
+                "label": f"p{q} (s)",
+                "backgroundColor": PERCENTILE_COLORS[q],
+                "borderColor": PERCENTILE_COLORS[q],
+                "data": [round(per_type[t][q], 2) for t in task_types],
+            }
+            for q in QUANTILES
+        ],
+    )
+
+
+@staff_member_required
+@cached_chart
 def get_processing_status_chart(request, year):
     period = get_period(request)
     window = get_window(request)
 
     if period == "total":
-        qs = ValidationRequest.objects.all()
+        qs = RequestDailyRollup.objects.all()
         title = "Processing success rate (Total)"
     else:
-        qs = ValidationRequest.objects.filter(created__year=year)
+        qs = RequestDailyRollup.objects.filter(date__year=year)
         if window:
-            qs = qs.filter(created__date__gte=_window_start(period, window))
+            qs = qs.filter(date__gte=_window_start(period, window))
         title = f"Processing success rate in {year}"
 
-    completed = qs.filter(status="COMPLETED").count()
-    failed    = qs.filter(status="FAILED").count()
+    completed = _rollup_count(qs.filter(status="COMPLETED"))
+    failed    = _rollup_count(qs.filter(status="FAILED"))
 
     return chart_response(
         title=title,
@@ -842,12 +918,13 @@ def get_processing_status_chart(request, year):
 
 
 @staff_member_required
+@cached_chart
 def get_avg_size_chart(request, year):
     window=get_window(request)
     period = get_period(request)
 
     if period == "total":
-        avg_size = ValidationRequest.objects.aggregate(avg_size=Avg("size"))["avg_size"]
+        avg_size = RequestDailyRollup.objects.aggregate(avg_size=_rollup_avg("size_sum", "count"))["avg_size"]
         size_mb = (avg_size or 0) / BYTES_PER_MB
 
         return chart_response(
@@ -861,8 +938,8 @@ def get_avg_size_chart(request, year):
             }],
         )
 
-    qs = ValidationRequest.objects.filter(created__year=year)
-    grouped = group_by_period(qs, period, "avg_size", Avg("size"), window=window)
+    qs = RequestDailyRollup.objects.filter(date__year=year)
+    grouped = group_by_period(qs, period, "avg_size", _rollup_avg("size_sum", "count"), window=window, field="date")
     size_dict = fill_period_dict(
         grouped,
         period,
@@ -885,6 +962,7 @@ def get_avg_size_chart(request, year):
 
 
 @staff_member_required
+@cached_chart
 def get_user_registrations_chart(request, year):
     window=get_window(request)
     period = get_period(request)
@@ -926,6 +1004,7 @@ def get_user_registrations_chart(request, year):
     )
 
 @staff_member_required
+@cached_chart
 def get_active_user_registrations_chart(request, year):
     """
     New user registrations for users who have uploaded at least one file.
@@ -990,6 +1069,10 @@ def get_active_user_registrations_chart(request, year):
 
 
 
+def _vendor_ids():
+    return UserAdditionalInfo.objects.filter(is_vendor=True).values("user_id")
+
+
 def _vendor_flag_map(user_ids):
     """Return {user_id: is_vendor} for the ids in *user_ids*."""
     return dict(
@@ -998,6 +1081,7 @@ def _vendor_flag_map(user_ids):
 
 
 @staff_member_required
+@cached_chart
 def get_usage_by_vendor_chart(request, year):
     """
     Distinct uploaders per period, split into end-users vs vendors vs dev-team.
@@ -1007,18 +1091,18 @@ def get_usage_by_vendor_chart(request, year):
     dev_ids = _dev_team_ids()
 
     if period == "total":
-        qs = ValidationRequest.objects.all()
+        qs = UploaderDailyRollup.objects.all()
 
-        total_uploaders = qs.values("created_by").distinct().count()
+        total_uploaders = qs.values("user_id").distinct().count()
         dev_uploaders = (
-            qs.filter(created_by_id__in=dev_ids)
-              .values("created_by")
+            qs.filter(user_id__in=dev_ids)
+              .values("user_id")
               .distinct()
               .count()
         )
         vendor_uploaders_all = (
-            qs.filter(created_by__useradditionalinfo__is_vendor=True)
-              .values("created_by")
+            qs.filter(user_id__in=_vendor_ids())
+              .values("user_id")
               .distinct()
               .count()
         )
@@ -1047,30 +1131,33 @@ def get_usage_by_vendor_chart(request, year):
                 ],
             }]
         )
-    qs = ValidationRequest.objects.filter(created__year=year)
+    qs = UploaderDailyRollup.objects.filter(date__year=year)
 
     total_qs = group_by_period(
         qs,
         period,
         "total",
-        Count("created_by", distinct=True),
-        window=window
+        Count("user_id", distinct=True),
+        window=window,
+        field="date",
     )
 
     dev_qs = group_by_period(
-        qs.filter(created_by_id__in=dev_ids),
+        qs.filter(user_id__in=dev_ids),
         period,
         "dev",
-        Count("created_by", distinct=True),
-        window=window
+        Count("user_id", distinct=True),
+        window=window,
+        field="date",
     )
 
     vendor_qs_all = group_by_period(
-        qs.filter(created_by__useradditionalinfo__is_vendor=True),
+        qs.filter(user_id__in=_vendor_ids()),
         period,
         "vendors",
-        Count("created_by", distinct=True),
-        window=window
+        Count("user_id", distinct=True),
+        window=window,
+        field="date",
     )
 
     total_dict = fill_period_dict(
@@ -1127,6 +1214,7 @@ def get_usage_by_vendor_chart(request, year):
     
 
 @staff_member_required
+@cached_chart
 def get_usage_by_channel_chart(request, year):
     """
     Distinct channels per period, split into WebUI vs API.
@@ -1135,11 +1223,11 @@ def get_usage_by_channel_chart(request, year):
     window = get_window(request)
 
     if period == "total":
-        qs = ValidationRequest.objects.all()
+        qs = RequestDailyRollup.objects.all()
         total_uploaders = qs.values("channel").distinct().count()
-        api_uploaders = qs.filter(
+        api_uploaders = _rollup_count(qs.filter(
             channel=ValidationRequest.Channel.API
-        ).values("id").distinct().count()
+        ))
         webui_uploaders = total_uploaders - api_uploaders
 
         return chart_response(
@@ -1153,22 +1241,24 @@ def get_usage_by_channel_chart(request, year):
             }]
         )
 
-    qs = ValidationRequest.objects.filter(created__year=year)
+    qs = RequestDailyRollup.objects.filter(date__year=year)
 
     total_qs = group_by_period(
         qs,
         period,
         "total",
-        Count("id", distinct=True),
-        window=window
+        Sum("count"),
+        window=window,
+        field="date",
     )
 
     api_qs = group_by_period(
         qs.filter(channel=ValidationRequest.Channel.API),
         period,
         ValidationRequest.Channel.API,
-        Count("id", distinct=True),
-        window=window
+        Sum("count"),
+        window=window,
+        field="date",
     )
 
     total_dict = fill_period_dict(total_qs, period, year, key="total", transform=int, window=window)
@@ -1199,6 +1289,7 @@ def get_usage_by_channel_chart(request, year):
 
 
 @staff_member_required
+@cached_chart
 def get_models_by_vendor_chart(request, year):
     """
     Count models uploaded per period, split by vendor vs end-user vs dev-team.
@@ -1208,16 +1299,19 @@ def get_models_by_vendor_chart(request, year):
     dev_ids = _dev_team_ids()
 
     if period == "total":
-        qs = Model.objects.all()
-        uploader_ids = qs.values_list("uploaded_by_id", flat=True).distinct()
-        vendor_flags = _vendor_flag_map(uploader_ids)
+        per_uploader = dict(
+            ModelDailyRollup.objects
+                .values("uploaded_by_id")
+                .annotate(total=Sum("count"))
+                .values_list("uploaded_by_id", "total")
+        )
+        vendor_flags = _vendor_flag_map(per_uploader.keys())
 
         vendor_count = 0
         enduser_count = 0
         dev_count = 0
 
-        for uid in uploader_ids:
-            count = qs.filter(uploaded_by_id=uid).count()
+        for uid, count in per_uploader.items():
             if uid in dev_ids:
                 dev_count += count
             elif vendor_flags.get(uid):
@@ -1245,7 +1339,7 @@ def get_models_by_vendor_chart(request, year):
         )
 
     # -------- per-period view --------
-    qs = Model.objects.filter(created__year=year).annotate(
+    qs = ModelDailyRollup.objects.filter(date__year=year).annotate(
         uploader_id=F("uploaded_by_id")
     )
 
@@ -1253,7 +1347,7 @@ def get_models_by_vendor_chart(request, year):
         qs.values_list("uploader_id", flat=True).distinct()
     )
 
-    annotated_qs = PERIODS[period]["annotate"](qs)
+    annotated_qs = PERIODS[period]["annotate"](qs, "date")
 
     if window:
         valid_labels = set(_rolling_labels(period, window))
@@ -1265,7 +1359,7 @@ def get_models_by_vendor_chart(request, year):
         ]
         annotated_qs = annotated_qs.filter(period__in=label_values)
 
-    grouped = annotated_qs.values("period", "uploader_id")
+    grouped = annotated_qs.values("period", "uploader_id").annotate(total=Sum("count"))
 
     vendor_counts = dict_for_period(period, year, window=window)
     enduser_counts = dict_for_period(period, year, window=window)
@@ -1279,11 +1373,11 @@ def get_models_by_vendor_chart(request, year):
             continue
 
         if uid in dev_ids:
-            dev_counts[period_label] += 1
+            dev_counts[period_label] += row["total"]
         elif vendor_flags.get(uid):
-            vendor_counts[period_label] += 1
+            vendor_counts[period_label] += row["total"]
         else:
-            enduser_counts[period_label] += 1
+            enduser_counts[period_label] += row["total"]
 
     labels = list(vendor_counts.keys())
 
@@ -1318,19 +1412,20 @@ def get_models_by_vendor_chart(request, year):
 
 
 @staff_member_required
+@cached_chart
 def get_top_tools_chart(request, year):
     period = get_period(request)
     window = get_window(request)
 
-    qs = Model.objects.filter(produced_by__isnull=False)
+    qs = ModelDailyRollup.objects.filter(produced_by_id__isnull=False)
     if period != "total":
-        qs = qs.filter(created__year=year)
+        qs = qs.filter(date__year=year)
         if window:
-            qs = qs.filter(created__date__gte=_window_start(period, window))
+            qs = qs.filter(date__gte=_window_start(period, window))
 
     agg = (
-        qs.values("produced_by")
-          .annotate(total=Count("id"))
+        qs.values("produced_by_id")
+          .annotate(total=Sum("count"))
           .order_by("-total")[:10]
     )
 
@@ -1338,8 +1433,8 @@ def get_top_tools_chart(request, year):
         title = f"No uploads in {year}" if period != "total" else "No uploads (Total)"
         return chart_response(title, [], [])
 
-    tool_map = AuthoringTool.objects.in_bulk([row["produced_by"] for row in agg])
-    labels = [tool_map[row["produced_by"]].full_name for row in agg]
+    tool_map = AuthoringTool.objects.in_bulk([row["produced_by_id"] for row in agg])
+    labels = [tool_map[row["produced_by_id"]].full_name for row in agg]
     data   = [row["total"] for row in agg]
 
     title = f"Top 10 authoring tools in {year}" if period != "total" else "Top 10 authoring tools (Total)"
@@ -1356,6 +1451,7 @@ def get_top_tools_chart(request, year):
 
     
 @staff_member_required
+@cached_chart
 def get_tools_count_chart(request, year):
     """
     Distinct authoring tools observed per ... (Model.produced_by).
@@ -1363,10 +1459,10 @@ def get_tools_count_chart(request, year):
     window = get_window(request)
     period = get_period(request)
 
-    models_qs = Model.objects.filter(produced_by__isnull=False)
+    models_qs = ModelDailyRollup.objects.filter(produced_by_id__isnull=False)
 
     if period == "total":
-        distinct_count = models_qs.values("produced_by").distinct().count()
+        distinct_count = models_qs.values("produced_by_id").distinct().count()
         return chart_response(
             title="Distinct authoring tools observed (Total)",
             labels=["Total"],
@@ -1378,14 +1474,15 @@ def get_tools_count_chart(request, year):
             }],
         )
 
-    models_qs = models_qs.filter(created__year=year)
+    models_qs = models_qs.filter(date__year=year)
 
     grouped = group_by_period(
         models_qs,
         period,
         "tools",
-        Count("produced_by", distinct=True),
-        window=window
+        Count("produced_by_id", distinct=True),
+        window=window,
+        field="date",
     )
 
     tools_dict = fill_period_dict(
@@ -1409,18 +1506,19 @@ def get_tools_count_chart(request, year):
     )
     
 @staff_member_required
+@cached_chart
 def get_top_tools_ifc2x3_chart(request, year):
     period = get_period(request)
     window = get_window(request)
 
-    qs = Model.objects.filter(
-        produced_by__isnull=False,
+    qs = ModelDailyRollup.objects.filter(
+        produced_by_id__isnull=False,
         schema__iexact="IFC2X3",
     )
     if period != "total":
-        qs = qs.filter(created__year=year)
+        qs = qs.filter(date__year=year)
         if window:
-            qs = qs.filter(created__date__gte=_window_start(period, window))
+            qs = qs.filter(date__gte=_window_start(period, window))
 
     return _top_tools_chart_response(
         qs,
@@ -1431,18 +1529,19 @@ def get_top_tools_ifc2x3_chart(request, year):
 
 
 @staff_member_required
+@cached_chart
 def get_top_tools_ifc4_chart(request, year):
     period = get_period(request)
     window = get_window(request)
 
-    qs = Model.objects.filter(
-        produced_by__isnull=False,
+    qs = ModelDailyRollup.objects.filter(
+        produced_by_id__isnull=False,
         schema__iexact="IFC4",
     )
     if period != "total":
-        qs = qs.filter(created__year=year)
+        qs = qs.filter(date__year=year)
         if window:
-            qs = qs.filter(created__date__gte=_window_start(period, window))
+            qs = qs.filter(date__gte=_window_start(period, window))
 
     return _top_tools_chart_response(
         qs,
@@ -1453,18 +1552,19 @@ def get_top_tools_ifc4_chart(request, year):
 
 
 @staff_member_required
+@cached_chart
 def get_top_tools_ifc4x3_chart(request, year):
     period = get_period(request)
     window = get_window(request)
 
-    qs = Model.objects.filter(
-        produced_by__isnull=False,
+    qs = ModelDailyRollup.objects.filter(
+        produced_by_id__isnull=False,
         schema__icontains="IFC4X3",
     )
     if period != "total":
-        qs = qs.filter(created__year=year)
+        qs = qs.filter(date__year=year)
         if window:
-            qs = qs.filter(created__date__gte=_window_start(period, window))
+            qs = qs.filter(date__gte=_window_start(period, window))
 
     return _top_tools_chart_response(
         qs,
@@ -1588,6 +1688,7 @@ def _stacked_vendor_schema_datasets(labels, enduser, vendor, dev):
 
 
 @staff_member_required
+@cached_chart
 def get_requests_by_schema_vendor_ifc2x3_chart(request, year):
     labels, enduser, vendor, dev = _requests_by_schema_vendor_for(request, year, "IFC2X3")
     return chart_response(
@@ -1597,6 +1698,7 @@ def get_requests_by_schema_vendor_ifc2x3_chart(request, year):
     )
 
 @staff_member_required
+@cached_chart
 def get_requests_by_schema_vendor_ifc4_chart(request, year):
     labels, enduser, vendor, dev = _requests_by_schema_vendor_for(request, year, "IFC4")
     return chart_response(
@@ -1606,6 +1708,7 @@ def get_requests_by_schema_vendor_ifc4_chart(request, year):
     )
 
 @staff_member_required
+@cached_chart
 def get_requests_by_schema_vendor_ifc4x3_chart(request, year):
     labels, enduser, vendor, dev = _requests_by_schema_vendor_for(request, year, "IFC4X3")
     return chart_response(
@@ -1615,17 +1718,18 @@ def get_requests_by_schema_vendor_ifc4x3_chart(request, year):
     )
 
 @staff_member_required
+@cached_chart
 def get_totals(request):
     # Overall, non time-split totals
     # choose one of the two lines for users:
     users_total = UserAdditionalInfo.objects.count()   # only fully-registered users
     # users_total = User.objects.count()                # or all auth users?
 
-    files_total = ValidationRequest.objects.count()     # all validation requests
+    files_total = _rollup_count(RequestDailyRollup.objects.all())     # all validation requests
     tools_total = (
-        Model.objects
-             .filter(produced_by__isnull=False)
-             .values("produced_by")
+        ModelDailyRollup.objects
+             .filter(produced_by_id__isnull=False)
+             .values("produced_by_id")
              .distinct()
              .count()
     )
@@ -1634,7 +1738,7 @@ def get_totals(request):
         UserAdditionalInfo.objects
         .filter(
             Exists(
-                Model.objects.filter(
+                ModelDailyRollup.objects.filter(
                     uploaded_by_id=OuterRef("user_id")
                 )
             )
@@ -1651,6 +1755,7 @@ def get_totals(request):
 
 
 @staff_member_required
+@cached_chart
 def get_uploads_per_2h_chart(request, year):
     period = get_period(request)
     window = get_window(request)
@@ -1699,6 +1804,7 @@ def get_uploads_per_2h_chart(request, year):
 
 
 @staff_member_required
+@cached_chart
 def get_queue_p95_chart(request, year):
     period = get_period(request)
     window = get_window(request)
@@ -1725,46 +1831,29 @@ def get_queue_p95_chart(request, year):
         block_num=Cast(F("local_hour") / 2, IntegerField()),
     )
 
-    rows = annotated.values_list("block_num", "created", "started")
-
-    buckets = {b: [] for b in range(12)}
-    for b, created, started in rows:
-        if b is None:
-            continue
-        bi = int(b)
-        if 0 <= bi <= 11 and created and started:
-            delta = (started - created).total_seconds()
-            if delta is not None and delta >= 0:
-                buckets[bi].append(delta)
-
-    def pct95(values: list[float]) -> float:
-        if not values:
-            return 0.0
-        values = sorted(values)
-        k = 0.95 * (len(values) - 1)
-        f = math.floor(k)
-        c = math.ceil(k)
-        if f == c:
-            return float(values[int(k)])
-        return float(values[f] + (k - f) * (values[c] - values[f]))
+    per_block = duration_percentiles(annotated, "created", "started", by=["block_num"])
 
     labels = [f"{b*2:02d}:00–{(b*2+2)%24:02d}:00" for b in range(12)]
-    p95 = [round(pct95(buckets[b]), 1) for b in range(12)]
+    datasets = []
+    for q in QUANTILES:
+        color = PERCENTILE_COLORS[q]
+        datasets.append({
+            "label": f"p{q} queue (s)",
+            "type": "line",
+            "backgroundColor": color,
+            "borderColor": color,
+            "data": [round(per_block.get(b, {}).get(q, 0.0), 1) for b in range(12)],
+        })
 
     return chart_response(
-        title="Queue p95 per 2-hour block",
+        title="Queue time percentiles per 2-hour block",
         labels=labels,
-        datasets=[{
-            "label": "p95 queue (s)",
-            "type": "line",
-            "backgroundColor": COLORS["info"],
-            "borderColor": COLORS["info"],
-            "data": p95,
-        }],
+        datasets=datasets,
     )
 
 
 @staff_member_required
+@cached_chart
 def get_stuck_per_day_chart(request, year):
     period = get_period(request)
     window = get_window(request)
@@ -1814,6 +1903,7 @@ def get_stuck_per_day_chart(request, year):
 
 
 @staff_member_required
+@cached_chart
 def get_uploads_per_weekday_chart(request, year):
     period = get_period(request)
     window = get_window(request)
@@ -1867,3 +1957,15 @@ def get_uploads_per_weekday_chart(request, year):
             "data": data,
         }],
     )
+
+
+@staff_member_required
+def get_cache_stats(request):
+    """Hit/miss counters of the cached chart endpoints."""
+    return JsonResponse({"endpoints": chart_cache.stats()})
+
+
+@staff_member_required
+def get_queue_depths(request):
+    """Queued subtasks per size tier and running/pending workflows per user (see tasks.scheduler)."""
+    return JsonResponse(scheduler.queue_depths())
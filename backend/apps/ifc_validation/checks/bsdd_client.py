@@ -0,0 +1,196 @@
+"""
+Client for the bSDD API, shared by all bSDD checks.
+
+Requests go through a single pooled HTTP session (with retries), class and property URIs can be
+looked up concurrently and responses are kept in a SQLite cache that outlives the check process.
+Point BSDD_CACHE_PATH at a shared volume to share it between workers; entries older than
+BSDD_CACHE_TTL seconds are revalidated (If-None-Match/If-Modified-Since) rather than fetched again.
+BSDD_API_URL selects the service, e.g. a local stand-in for tests.
+"""
+
+import os
+import time
+import json
+import sqlite3
+import logging
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+BSDD_API_URL = os.environ.get("BSDD_API_URL", "https://api.bsdd.buildingsmart.org")
+BSDD_CACHE_PATH = os.environ.get("BSDD_CACHE_PATH", os.path.join(tempfile.gettempdir(), "bsdd-cache.sqlite3"))
+BSDD_CACHE_TTL = int(os.environ.get("BSDD_CACHE_TTL", 24 * 3600))  # seconds
+BSDD_MAX_WORKERS = int(os.environ.get("BSDD_MAX_WORKERS", 8))
+
+TIMEOUT = 30  # seconds
+NOT_FOUND = (400, 404)  # the bSDD API answers 400 for some unknown URIs
+
+
+class ResponseCache:
+    """
+    Responses (including 'not found') by request, in a SQLite database shared by all processes that use the same path.
+
+    The cache is best effort: when it can't be read or written, requests simply go to the service.
+    """
+
+    def __init__(self, path=BSDD_CACHE_PATH, ttl=BSDD_CACHE_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._local = threading.local()
+
+    def _connection(self):
+        # one connection per thread; not inherited by forked processes (e.g. from the check daemon)
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, status INTEGER, body TEXT, etag TEXT, last_modified TEXT, fetched_at REAL)"
+            )
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def get(self, key):
+        """
+        Returns (status, body, etag, last_modified, is_fresh) for a request, or None if it isn't cached.
+        """
+        try:
+            row = self._connection().execute(
+                "SELECT status, body, etag, last_modified, fetched_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+        except sqlite3.Error as err:
+            logger.warning(f"Could not read bSDD cache '{self.path}': {err}")
+            return None
+        if row is None:
+            return None
+        status, body, etag, last_modified, fetched_at = row
+        return status, body, etag, last_modified, time.time() - fetched_at < self.ttl
+
+    def put(self, key, status, body=None, etag=None, last_modified=None):
+        try:
+            self._connection().execute(
+                "INSERT OR REPLACE INTO responses (key, status, body, etag, last_modified, fetched_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, status, body, etag, last_modified, time.time()),
+            )
+        except sqlite3.Error as err:
+            logger.warning(f"Could not write bSDD cache '{self.path}': {err}")
+
+    def touch(self, key):
+        try:
+            self._connection().execute("UPDATE responses SET fetched_at = ? WHERE key = ?", (time.time(), key))
+        except sqlite3.Error as err:
+            logger.warning(f"Could not write bSDD cache '{self.path}': {err}")
+
+
+class BsddClient:
+    """
+    Looks up dictionaries, classes and properties in the bSDD API.
+
+    Lookups return the JSON response, or None if the service doesn't know the requested item;
+    other failures raise requests.HTTPError, unless a (stale) cached response is available.
+    """
+
+    def __init__(self, base_url=BSDD_API_URL, cache=None, max_workers=BSDD_MAX_WORKERS):
+        self.base_url = base_url.rstrip("/")
+        self.cache = cache if cache is not None else ResponseCache()
+        self.max_workers = max_workers
+
+        retries = Retry(total=3, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504), allowed_methods=("GET",))
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers, max_retries=retries)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def get(self, path, params=None):
+        """
+        Returns the JSON response of GET <base url><path>?<params>, or None for 400/404.
+        """
+        url = self.base_url + path
+        key = f"{url}?{urlencode(sorted((params or {}).items()))}"
+
+        cached = self.cache.get(key)
+        if cached:
+            status, body, etag, last_modified, is_fresh = cached
+            if is_fresh:
+                return json.loads(body) if status == 200 else None
+
+        headers = {}
+        if cached and etag:
+            headers["If-None-Match"] = etag
+        if cached and last_modified:
+            headers["If-Modified-Since"] = last_modified
+
+        try:
+            response = self.session.get(url, params=params, headers=headers, timeout=TIMEOUT)
+            logger.debug(f"GET {response.url} returned HTTP {response.status_code}")
+            if response.status_code not in (200, 304) + NOT_FOUND:
+                response.raise_for_status()
+        except requests.RequestException as err:
+            if not cached:
+                raise
+            logger.warning(f"GET {url} failed, using cached response: {err}")
+            return json.loads(body) if status == 200 else None
+
+        if response.status_code == 304 and cached:
+            self.cache.touch(key)
+            return json.loads(body) if status == 200 else None
+
+        if response.status_code == 200:
+            self.cache.put(key, 200, response.text, response.headers.get("ETag"), response.headers.get("Last-Modified"))
+            return response.json()
+
+        self.cache.put(key, response.status_code)
+        return None
+
+    def get_many(self, path, param, values):
+        """
+        Looks up values concurrently, as GET <base url><path>?<param>=<value>; returns {value: JSON response or None}.
+
+        Every distinct value is requested once; at most max_workers requests are in flight.
+        """
+        values = list(dict.fromkeys(values))
+        if len(values) <= 1:
+            return {value: self.get(path, {param: value}) for value in values}
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(values))) as executor:
+            results = executor.map(lambda value: self.get(path, {param: value}), values)
+            return dict(zip(values, results))
+
+    def find_dictionary_by_uri(self, uri):
+        result = self.get("/api/Dictionary/v1", {"uri": uri})
+        return result["dictionaries"][0] if result and result["count"] == 1 else None
+
+    def find_dictionaries_by_uri(self, uris):
+        results = self.get_many("/api/Dictionary/v1", "uri", uris)
+        return {uri: result["dictionaries"][0] if result and result["count"] == 1 else None for uri, result in results.items()}
+
+    def get_all_dictionaries(self):
+        dictionaries = []
+        count, total_count = 0, 1000
+        while count < total_count:
+            result = self.get("/api/Dictionary/v1", {"includeTestDictionaries": "True", "offset": count, "limit": 250})
+            if not result or not result["count"]:
+                break
+            dictionaries += result["dictionaries"]
+            total_count = result["totalCount"]
+            count += result["count"]
+        return dictionaries
+
+    def find_class_by_uri(self, uri):
+        return self.get("/api/Class/v1", {"uri": uri})
+
+    def find_classes_by_uri(self, uris):
+        return self.get_many("/api/Class/v1", "uri", uris)
+
+    def find_property_by_uri(self, uri):
+        return self.get("/api/Property/v4", {"uri": uri})
+
+    def find_properties_by_uri(self, uris):
+        return self.get_many("/api/Property/v4", "uri", uris)
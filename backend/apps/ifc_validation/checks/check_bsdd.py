@@ -1,14 +1,22 @@
 import ifcopenshell
 import logging
 import sys
-import requests
 import json
 import argparse
 import functools
 
+try:
+    from .bsdd_client import BsddClient
+except ImportError:
+    # run as a script
+    from bsdd_client import BsddClient
+
 
 logger = logging.getLogger()
 
+# pooled, with a persistent cache shared by all runs (see bsdd_client.py)
+client = BsddClient()
+
 
 @functools.lru_cache(maxsize=128)
 def find_dictionary_by_uri(uri):
@@ -29,19 +37,7 @@ def find_dictionary_by_uri(uri):
         https://app.swaggerhub.com/apis/buildingSMART/Dictionaries/v1
     """
 
-    url = "https://api.bsdd.buildingsmart.org/api/Dictionary/v1"
-
-    response = requests.get(url, {'uri': uri })
-    logger.debug(f'GET {response.url} returned HTTP {response.status_code}')
-
-    if response.status_code == 200:
-        json = response.json()
-        return json['dictionaries'][0] if json['count'] == 1 else None # should actually return 404...
-    elif response.status_code == 404:
-        return None
-    else:
-        response.raise_for_status()
-        return None
+    return client.find_dictionary_by_uri(uri)
     
 
 @functools.lru_cache(maxsize=128)
@@ -60,23 +56,7 @@ def get_all_dictionaries():
         https://app.swaggerhub.com/apis/buildingSMART/Dictionaries/v1
     """
 
-    url = "https://api.bsdd.buildingsmart.org/api/Dictionary/v1?includeTestDictionaries=True"
-    
-    dictionaries = []
-    count = 0
-    total_count = 1000
-    
-    while count < total_count:
-        response = requests.get(url + f'&offset={count}&limit=250')
-        logger.debug(f'GET {response.url} returned HTTP {response.status_code}')
-        response.raise_for_status()
-
-        json = response.json()
-        dictionaries += json['dictionaries']
-        total_count = json['totalCount']
-        count = json['count']
-    
-    return dictionaries
+    return client.get_all_dictionaries()
 
 
 @functools.lru_cache(maxsize=128)
@@ -125,18 +105,7 @@ def find_class_by_uri(uri):
         https://app.swaggerhub.com/apis/buildingSMART/Dictionaries/v1#/Class/get_api_Class_v1
     """
 
-    url = "https://api.bsdd.buildingsmart.org/api/Class/v1"
-
-    response = requests.get(url, {'uri':uri})
-    logger.debug(f'GET {response.url} returned HTTP {response.status_code}')
-
-    if response.status_code == 200:
-        return response.json()
-    elif response.status_code in (400, 404): # should actually return 404...
-        return None
-    else:
-        response.raise_for_status()
-        return None
+    return client.find_class_by_uri(uri)
 
 
 @functools.lru_cache(maxsize=128)
@@ -158,18 +127,7 @@ def find_property_by_uri(uri):
         https://app.swaggerhub.com/apis/buildingSMART/Dictionaries/v1#/Property/get_api_Property_v4
     """
 
-    url = "https://api.bsdd.buildingsmart.org/api/Property/v4"
-
-    response = requests.get(url, {'uri': uri})
-    logger.debug(f'GET {response.url} returned HTTP {response.status_code}')
-
-    if response.status_code == 200:
-        return response.json()
-    elif response.status_code in (400, 404): # should actually return 404...
-        return None
-    else:
-        response.raise_for_status()
-        return None
+    return client.find_property_by_uri(uri)
     
     
 def get_attr_safe(object, attribute):
@@ -261,14 +219,17 @@ def perform(file_name, task_id, verbose=False):
             # exists in bSDD?
             dictionary_result['dictionary_uri'] = None
             dictionary_result['dictionary_in_bsdd'] = False
-            if dictionary_result['dictionary_source']:
-                dictionary = find_dictionary_by_uri(dictionary_result['dictionary_source'])
-                if dictionary:
-                    dictionary_result['dictionary_uri'] = dictionary['uri']
-                    dictionary_result['dictionary_in_bsdd'] = True
 
             bsdd_results['dictionaries'] += [dictionary_result]
 
+        # resolve each distinct uri once, concurrently
+        dictionaries = client.find_dictionaries_by_uri(d['dictionary_source'] for d in bsdd_results['dictionaries'] if d['dictionary_source'])
+        for dictionary_result in bsdd_results['dictionaries']:
+            dictionary = dictionaries.get(dictionary_result['dictionary_source'])
+            if dictionary:
+                dictionary_result['dictionary_uri'] = dictionary['uri']
+                dictionary_result['dictionary_in_bsdd'] = True
+
     # bSDD classes (former name: classification)
     # https://github.com/buildingSMART/bSDD/blob/master/Documentation/bSDD-IFC%20documentation.md#2-bsdd-classes-objects
     if len(ifc_file_classification_references):
@@ -297,16 +258,19 @@ def perform(file_name, task_id, verbose=False):
             class_result['class_in_bsdd'] = False
             class_result['class_bsdd_uri'] = None
             class_result['class_bsdd_name'] = None
-            if class_result['class_identifier']:
-                class_ = find_class_by_uri(class_result['class_identifier'])
-                if class_:
-                    class_result['class_in_bsdd'] = True
-                    class_result['class_bsdd_uri'] = class_['uri']
-                    class_result['class_bsdd_name'] = class_['name']
-                    class_result['class_bsdd_rel_objects'] = class_['relatedIfcEntityNames'] if 'relatedIfcEntityNames' in class_ else None
 
             bsdd_results['classes'] += [class_result]
 
+        # resolve each distinct uri once, concurrently
+        classes = client.find_classes_by_uri(c['class_identifier'] for c in bsdd_results['classes'] if c['class_identifier'])
+        for class_result in bsdd_results['classes']:
+            class_ = classes.get(class_result['class_identifier'])
+            if class_:
+                class_result['class_in_bsdd'] = True
+                class_result['class_bsdd_uri'] = class_['uri']
+                class_result['class_bsdd_name'] = class_['name']
+                class_result['class_bsdd_rel_objects'] = class_['relatedIfcEntityNames'] if 'relatedIfcEntityNames' in class_ else None
+
     if len(ifc_file_rel_associates_classifications):
 
         for rel in ifc_file_rel_associates_classifications:
@@ -385,19 +349,22 @@ def perform(file_name, task_id, verbose=False):
             property_result['property_bsdd_name'] = None
             property_result['property_bsdd_datatype'] = None
             property_result['property_bsdd_valuekind'] = None
-            if property_result['property_identifier']:
-                property = find_property_by_uri(property_result['property_identifier'])
-                if property:
-                    property_result['property_uri'] = property['uri']
-                    property_result['property_in_bsdd'] = True
-                    property_result['property_bsdd_name'] = property['name']
-                    property_result['property_bsdd_datatype'] = property['dataType'] # Boolean, Character, Integer, Real, String, Time
-                    property_result['property_bsdd_valuekind'] = property['propertyValueKind'] # Single, Range, List, Complex, ComplexList
 
             # TODO
 
             bsdd_results['properties'] += [property_result]
 
+        # resolve each distinct uri once, concurrently
+        properties = client.find_properties_by_uri(p['property_identifier'] for p in bsdd_results['properties'] if p['property_identifier'])
+        for property_result in bsdd_results['properties']:
+            property = properties.get(property_result['property_identifier'])
+            if property:
+                property_result['property_uri'] = property['uri']
+                property_result['property_in_bsdd'] = True
+                property_result['property_bsdd_name'] = property['name']
+                property_result['property_bsdd_datatype'] = property['dataType'] # Boolean, Character, Integer, Real, String, Time
+                property_result['property_bsdd_valuekind'] = property['propertyValueKind'] # Single, Range, List, Complex, ComplexList
+
     # bSDD materials
     # https://github.com/buildingSMART/bSDD/blob/master/Documentation/bSDD-IFC%20documentation.md#3-bsdd-materials
     if len(ifc_file_materials):
@@ -561,12 +528,12 @@ def perform(file_name, task_id, verbose=False):
         # TODO
 
     # relation constraint checks
+    classes_by_id = {c['class_id']: c for c in bsdd_results['classes']}
     for assignment in bsdd_results['assignments']:
 
         rel_objects = assignment['assignment_rel_objects']
         rel_class = assignment['assignment_rel_class']
-        class_ = [c for c in bsdd_results['classes'] if c['class_id'] == rel_class['id']]
-        class_ = class_[0] if len(class_) > 0 else None
+        class_ = classes_by_id.get(rel_class['id'])
 
         # TODO - check with Artur re. IfcCommunication_s_Appliance --> confirmed, typo!
         if class_ and 'class_bsdd_rel_objects' in class_ and class_['class_bsdd_rel_objects']:
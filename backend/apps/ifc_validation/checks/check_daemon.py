@@ -0,0 +1,192 @@
+"""
+Pre-forking daemon that executes check programs in warm interpreters.
+
+The parent process imports ifcopenshell, the header policy, the gherkin rules and the
+trusted certificates of digital signatures once; every request is served by a forked child
+that inherits these modules and runs the check program as if it were started with
+'python -m <module>' or 'python <script>'.
+"""
+
+import io
+import os
+import sys
+import json
+import runpy
+import resource
+import signal
+import struct
+import argparse
+import tempfile
+import warnings
+import importlib
+import socketserver
+
+CHECKS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+PRELOAD_MODULES = [
+    'ifcopenshell',
+    'ifcopenshell.express',
+    'ifcopenshell.simple_spf',
+    'ifcopenshell.validate',
+    'ifc_gherkin_rules',
+    'validate_header',
+    'trust_store',
+    'bsdd_client',
+]
+
+HEADER = struct.Struct('!Q')
+
+
+def preload(modules):
+    for path in (CHECKS_DIR, os.path.join(CHECKS_DIR, 'header_policy'), os.path.join(CHECKS_DIR, 'signatures')):
+        if path not in sys.path:
+            sys.path.append(path)
+    loaded = []
+    for name in modules:
+        try:
+            importlib.import_module(name)
+            loaded.append(name)
+        except Exception as err:
+            print(f'Could not preload {name}: {err}', file=sys.stderr)
+    return loaded
+
+
+def recv_message(rfile):
+    line = rfile.readline()
+    if not line:
+        return None
+    return json.loads(line)
+
+
+def send_message(wfile, message):
+    wfile.write(json.dumps(message).encode('utf-8') + b'\n')
+    wfile.flush()
+
+
+def send_blob(wfile, f):
+    f.seek(0, os.SEEK_END)
+    wfile.write(HEADER.pack(f.tell()))
+    f.seek(0)
+    while chunk := f.read(1 << 16):
+        wfile.write(chunk)
+
+
+def execute(argv):
+    """
+    Runs a check program in the current (forked) interpreter and returns its exit code.
+    """
+    if len(argv) >= 2 and argv[0] == '-m':
+        sys.argv = [argv[1]] + argv[2:]
+        target, run = argv[1], runpy.run_module
+    else:
+        sys.argv = list(argv)
+        target, run = argv[0], runpy.run_path
+        sys.path.insert(0, os.path.dirname(os.path.abspath(target)))
+    # runpy warns when the module was preloaded, which would end up on stderr of the check
+    warnings.filterwarnings('ignore', category=RuntimeWarning, module='runpy')
+    try:
+        kwargs = {'run_name': '__main__'}
+        if run is runpy.run_module:
+            kwargs['alter_sys'] = True
+        run(target, **kwargs)
+        return 0
+    except SystemExit as e:
+        return exit_code(e.code)
+    except BaseException:
+        # mimic the interpreter, including excepthooks installed by the check program
+        try:
+            sys.excepthook(*sys.exc_info())
+        except SystemExit as e:
+            return exit_code(e.code)
+        return 1
+
+
+def exit_code(code):
+    if code is None:
+        return 0
+    if isinstance(code, int):
+        return code & 0xFF
+    print(code, file=sys.stderr)
+    return 1
+
+
+def rusage():
+    """
+    CPU time and peak RSS of this (forked) check and the processes it waited for; the client can't
+    measure these with getrusage() as the check isn't its child.
+    """
+    usages = [resource.getrusage(who) for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN)]
+    return {
+        'user_cpu': sum(u.ru_utime for u in usages),
+        'system_cpu': sum(u.ru_stime for u in usages),
+        'peak_rss': max(u.ru_maxrss for u in usages) * 1024,
+    }
+
+
+class CheckRequestHandler(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        request = recv_message(self.rfile)
+        if request is None:
+            return
+
+        # the client needs our pid to be able to terminate us on timeout/revoke
+        send_message(self.wfile, {'pid': os.getpid()})
+
+        os.chdir(request.get('cwd') or os.getcwd())
+        os.environ.clear()
+        os.environ.update(request.get('env') or {})
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+
+        # redirect on file descriptor level so output of native extensions is captured too
+        out, err = tempfile.TemporaryFile(), tempfile.TemporaryFile()
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os.dup2(out.fileno(), 1)
+        os.dup2(err.fileno(), 2)
+        sys.stdout = io.TextIOWrapper(open(1, 'wb', closefd=False), encoding='utf-8', line_buffering=False)
+        sys.stderr = io.TextIOWrapper(open(2, 'wb', closefd=False), encoding='utf-8', line_buffering=True)
+
+        returncode = execute(request['argv'])
+
+        sys.stdout.flush()
+        sys.stderr.flush()
+        send_message(self.wfile, {'returncode': returncode, 'rusage': rusage()})
+        send_blob(self.wfile, out)
+        send_blob(self.wfile, err)
+        self.wfile.flush()
+
+
+class CheckDaemon(socketserver.ForkingMixIn, socketserver.UnixStreamServer):
+    block_on_close = False
+
+
+def serve(socket_path, max_children):
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+    CheckDaemon.max_children = max_children
+    with CheckDaemon(socket_path, CheckRequestHandler) as server:
+        os.chmod(socket_path, 0o600)
+        signal.signal(signal.SIGTERM, lambda *args: sys.exit(0))
+        try:
+            server.serve_forever()
+        finally:
+            if os.path.exists(socket_path):
+                os.unlink(socket_path)
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Runs check programs in pre-warmed, forked interpreters.")
+    parser.add_argument("--socket", "-s", type=str, default=os.environ.get("CHECK_DAEMON_SOCKET"))
+    parser.add_argument("--max-children", "-n", type=int, default=int(os.environ.get("CHECK_DAEMON_MAX_CHILDREN", 40)))
+    parser.add_argument("--preload", "-p", type=str, nargs='*', default=PRELOAD_MODULES)
+    args = parser.parse_args()
+
+    if not args.socket:
+        parser.error("no socket path given (--socket or CHECK_DAEMON_SOCKET)")
+
+    loaded = preload(args.preload)
+    print(f'Check daemon listening on {args.socket} (preloaded: {", ".join(loaded)})', file=sys.stderr)
+    serve(args.socket, args.max_children)
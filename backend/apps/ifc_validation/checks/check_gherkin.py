@@ -1,6 +1,10 @@
 import os
 import sys
+import json
 import argparse
+import functools
+
+import ifcopenshell
 
 try:
     import ifc_gherkin_rules as gherkin_rules  # run-time
@@ -29,22 +33,76 @@ def perform(ifc_fn, task_id, rule_type, max_outcomes: int, verbose, purepythonpa
         sys.exit(1)
 
 
+def share_parsed_models():
+    """
+    Makes ifcopenshell.open() return the same in-memory model for repeated opens of a file,
+    so subsequent rule types in a fused run don't parse and index the file again.
+    """
+    open_file = ifcopenshell.open
+
+    @functools.lru_cache(maxsize=None)
+    def _open_cached(path, **kwargs):
+        return open_file(path, **kwargs)
+
+    @functools.wraps(open_file)
+    def _open(path, *args, **kwargs):
+        if args or not isinstance(path, (str, os.PathLike)):
+            return open_file(path, *args, **kwargs)
+        return _open_cached(os.path.abspath(path), **kwargs)
+
+    ifcopenshell.open = _open
+
+
+def perform_fused(ifc_fn, task_ids, rule_types, max_outcomes: int, verbose, purepythonparser=False):
+    """
+    Runs several rule types in one process against a single parse of the file.
+    Emits one JSON summary line per rule type so results can be attributed to the right task.
+    """
+    share_parsed_models()
+    all_succeeded = True
+    for task_id, rule_type in zip(task_ids, rule_types):
+        try:
+            perform(ifc_fn, task_id, rule_type, max_outcomes, verbose, purepythonparser)
+            success = True
+        except SystemExit:
+            success = False
+        all_succeeded &= success
+        print(json.dumps({'rule_type': rule_type, 'task_id': task_id, 'success': success}), flush=True)
+    return all_succeeded
+
+
 if __name__ == "__main__":
 
     parser = argparse.ArgumentParser(description="Runs Gherkin style validation checks.")
     parser.add_argument("--file-name", "-f", type=str, required=True)
-    parser.add_argument("--task-id", "-t", type=int, required=False, default=None)
-    parser.add_argument("--rule-type", "-r", type=str, default='ALL')
+    parser.add_argument("--task-id", "-t", type=str, required=False, default=None, help="Task id, or comma-separated task ids (one per rule type)")
+    parser.add_argument("--rule-type", "-r", type=str, default='ALL', help="Rule type, or comma-separated rule types to run on a single parse")
     parser.add_argument('--max-outcomes', "-m", type=int, default=0)
     parser.add_argument("--verbose", "-v", action='store_true')
     parser.add_argument("--purepythonparser", "-p", action="store_true")
     args = parser.parse_args()
 
-    perform(
-        ifc_fn=args.file_name,
-        task_id=args.task_id,
-        rule_type=args.rule_type,
-        max_outcomes=args.max_outcomes,
-        verbose=args.verbose,
-        purepythonparser=args.purepythonparser
-    )
\ No newline at end of file
+    rule_types = args.rule_type.split(',')
+    task_ids = [int(t) for t in args.task_id.split(',')] if args.task_id else [None] * len(rule_types)
+    if len(task_ids) != len(rule_types):
+        parser.error("--task-id and --rule-type must have the same number of entries")
+
+    if len(rule_types) == 1:
+        perform(
+            ifc_fn=args.file_name,
+            task_id=task_ids[0],
+            rule_type=rule_types[0],
+            max_outcomes=args.max_outcomes,
+            verbose=args.verbose,
+            purepythonparser=args.purepythonparser
+        )
+    else:
+        success = perform_fused(
+            ifc_fn=args.file_name,
+            task_ids=task_ids,
+            rule_types=rule_types,
+            max_outcomes=args.max_outcomes,
+            verbose=args.verbose,
+            purepythonparser=args.purepythonparser
+        )
+        sys.exit(0 if success else 1)
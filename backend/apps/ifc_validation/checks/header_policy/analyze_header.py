@@ -0,0 +1,86 @@
+"""
+Header syntax and header policy from a single parse of the start of a file.
+
+Both checks only look at the HEADER section, so only the leading text up to its ENDSEC; is
+read and parsed once, in-process; results are the same as those of
+'python -m ifcopenshell.simple_spf --json --only-header' and validate_header.py.
+Fast enough to run inline, e.g. on the header of an upload that is still streaming.
+"""
+
+import os
+import re
+import copy
+import json
+import functools
+
+from ifcopenshell.simple_spf import parse, file as spf_file, CollectedValidationErrors
+
+try:
+    from .validate_header import HeaderStructure
+except ImportError:
+    # run as a script, or imported from this directory
+    from validate_header import HeaderStructure
+
+READ_SIZE = 64 * 1024
+
+# as used by simple_spf to find the HEADER section
+COMMENT = re.compile(r"/\*[\s\S]*?\*/")
+HEADER_SECTION = re.compile(r"ISO-10303-21;\s*HEADER;(.*?)ENDSEC;", flags=re.DOTALL | re.IGNORECASE)
+
+
+def read_header_content(f):
+    """
+    Reads text from f until it holds the complete HEADER section, outside of any comment.
+    """
+    content, size = "", READ_SIZE
+    while chunk := f.read(size):
+        content += chunk
+        without_comments = COMMENT.sub(" ", content)
+        if "/*" not in without_comments and HEADER_SECTION.search(without_comments):
+            break
+        # files without a (recognizable) header are read up to the end, in growing chunks
+        size *= 2
+    return content
+
+
+def analyze(content):
+    """
+    Returns (header syntax result, header policy result) of the leading content (text, or UTF-8 bytes) of a file.
+
+    The header syntax result has the output of simple_spf as 'output' and 'error_output';
+    the header policy result is the HeaderStructure, or empty when the header cannot be parsed.
+    """
+    try:
+        try:
+            if isinstance(content, bytes):
+                content = content.decode()
+            result = parse(filecontent=content, only_header=True)
+        except CollectedValidationErrors as exc:
+            return {"output": json.dumps(exc.asdict(), indent=2), "error_output": "", "success": False}, {}
+    except Exception as err:
+        # the last line of the traceback simple_spf would print
+        return {"output": "", "error_output": f"{type(err).__name__}: {err}", "success": False}, {}
+
+    try:
+        header = json.loads(HeaderStructure(file=spf_file(result)).model_dump_json(exclude={"file"}))
+    except Exception:
+        header = {}
+    return {"output": "", "error_output": "", "success": True}, header
+
+
+@functools.lru_cache(maxsize=16)
+def _analyze_file(path, mtime, size):
+    try:
+        with open(path, encoding="utf-8") as f:
+            content = read_header_content(f)
+    except UnicodeDecodeError as err:
+        return {"output": "", "error_output": f"{type(err).__name__}: {err}", "success": False}, {}
+    return analyze(content)
+
+
+def analyze_file(path):
+    """
+    As analyze(), for a file on disk; the header syntax and header policy checks of a file share one parse.
+    """
+    st = os.stat(path)
+    return copy.deepcopy(_analyze_file(path, st.st_mtime_ns, st.st_size))
@@ -1,7 +1,9 @@
+import io
 import pytest
 import ifcopenshell
 from pathlib import Path
 from validate_header import HeaderStructure
+import analyze_header
 import sys
 
 def collect_test_files():
@@ -22,6 +24,22 @@ def test_invocation(f):
     assert (field not in header.validation_errors) if outcome == 'pass' else (field in header.validation_errors)
 
 
+@pytest.mark.parametrize("f", collect_test_files())
+def test_analyze_header(f):
+    filename, outcome, field = f[0], f[1], f[2]
+    syntax, header = analyze_header.analyze_file(filename)
+
+    assert syntax['success']
+    assert (field not in header['validation_errors']) if outcome == 'pass' else (field in header['validation_errors'])
+
+
+def test_analyze_header_reads_only_leading_content():
+    header = Path(collect_test_files()[0][0]).read_text().split('DATA;')[0]
+    content = header + 'DATA;\n' + '#1=IFCWALL($,$,$,$,$,$,$,$,$);\n' * 100000
+
+    assert len(analyze_header.read_header_content(io.StringIO(content))) == analyze_header.READ_SIZE
+
+
 def run_single_file(filename=''):
     if filename:
         file = ifcopenshell.simple_spf.open(filename, only_header=True)
@@ -11,7 +11,17 @@ import logging
 import io
 import yaml
 import os
-from config import ConfiguredBaseModel
+
+try:
+    from .config import ConfiguredBaseModel
+except ImportError:
+    # run as a script, or imported from this directory
+    from config import ConfiguredBaseModel
+
+
+# the policy is loaded once per process
+with open(os.path.join(os.path.dirname(__file__), 'valid_descriptions.yaml')) as f:
+    ALLOWED_DESCRIPTIONS = yaml.safe_load(f)
 
 
 def ifcopenshell_pre_validation(file):
@@ -168,7 +178,6 @@ class HeaderStructure(ConfiguredBaseModel):
             values.data.get('validation_errors').append('description')
             return v
 
-        allowed_descriptions = yaml.safe_load(open(os.path.join(os.path.dirname(__file__), 'valid_descriptions.yaml')))
         schema_identifier = values.data.get('file').schema_identifier
         
         view_definitions_set = {view for view in v} 
@@ -178,7 +187,7 @@ class HeaderStructure(ConfiguredBaseModel):
                 values.data.get('validation_errors').append('description')  # AddOnView MVD without CoordinationView        
         
         for mvd in v:
-            if mvd not in allowed_descriptions.get(schema_identifier, [False]) and not 'AddOnView' in mvd:
+            if mvd not in ALLOWED_DESCRIPTIONS.get(schema_identifier, [False]) and not 'AddOnView' in mvd:
                 values.data.get('validation_errors').append('description')
    
         return ', '.join(v)
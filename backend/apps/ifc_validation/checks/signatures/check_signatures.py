@@ -1,13 +1,13 @@
 import binascii
 from dataclasses import asdict, dataclass, fields
 import datetime
-import glob
+import itertools
 import json
+import mmap
 import os
 import subprocess
 import sys
-import tempfile
-from typing import Any, List, Optional
+from typing import Any, Callable, Iterable, List, Optional
 from typing import Tuple
 from enum import Enum, auto
 
@@ -29,6 +29,8 @@ from cryptography.hazmat.primitives.asymmetric import padding, rsa, ec
 from cryptography.exceptions import InvalidSignature
 from cryptography.x509.oid import ExtensionOID
 
+from trust_store import STORE_DIR, CertAuthorityBundle
+
 
 class SignatureVerificationResult(Enum):
     invalid = auto()
@@ -49,64 +51,85 @@ class SignatureData:
     def as_dict(self):
         return {k: format(getattr(self, k)) for k in (f.name for f in fields(self))}
 
-    def verify_pkcs7_openssl(
-        self, ca: "CertAuthorityBundle", data: bytes
+    def verify_pkcs7(
+        self, ca: CertAuthorityBundle, content: Callable[[], Iterable[bytes]]
     ) -> "Tuple[SignatureVerificationResult, Optional[CertificateData]]":
-        sig_fd, sig_path = tempfile.mkstemp(suffix=".p7s")
-        data_fd, data_path = tempfile.mkstemp(suffix=".dat")
-        certout = tempfile.NamedTemporaryFile(delete=False).name
+        """
+        Verifies the detached CMS signature over the (stripped) content, which `content()` yields in chunks.
+
+        Verification is done by `openssl cms -verify`, first including the certificate chain, which
+        decides on a known vendor root certificate. Only when that fails, the signature is verified
+        once more without the chain, to tell an unknown certificate from an invalid signature.
+        """
+        if ca.filepath is None:
+            # openssl refuses to verify against an empty -CAfile, without trusted roots nothing is valid
+            return SignatureVerificationResult.invalid, None
+
+        for verify_chain, result in ((True, SignatureVerificationResult.valid_known_cert),
+                                     (False, SignatureVerificationResult.valid_unknown_cert)):
+            certificates = openssl_cms_verify(self.signature, content(), ca.filepath, verify_chain)
+            if certificates is not None:
+                cert = x509.load_pem_x509_certificates(certificates)[0]
+                return result, CertificateData.from_certificate(cert, verify=False)
+        return SignatureVerificationResult.invalid, None
+
+
+def openssl_cms_verify(signature: bytes, content: Iterable[bytes], cafile: str, verify_chain: bool) -> Optional[bytes]:
+    """
+    Runs `openssl cms -verify` on the detached signature, returns the certificates of the signed data in PEM
+    or None when verification fails. Nothing is written to disk: the signature is passed through a pipe and
+    the content is streamed to stdin.
+    """
+    sig_read, sig_write = os.pipe()
+    try:
+        cmd = [
+            "openssl",
+            "cms",
+            "-verify",
+            "-inform",
+            "DER",
+            "-in",
+            f"/dev/fd/{sig_read}",
+            "-content",
+            "/dev/stdin",
+            "-CAfile",
+            cafile,
+            "-out",
+            os.devnull,
+            # `-certsout` writes the certificates of the signed data, the first one is the signer's
+            "-certsout",
+            "/dev/stdout",
+            *(("-noverify",) if not verify_chain else ()),
+        ]
+        proc = subprocess.Popen(
+            cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, pass_fds=(sig_read,)
+        )
+    except OSError:
+        os.close(sig_write)
+        raise
+    finally:
+        os.close(sig_read)
+
+    try:
+        # openssl reads the signature before the content, and only writes the certificates after both
+        with os.fdopen(sig_write, "wb") as f:
+            f.write(signature)
+        for chunk in content:
+            proc.stdin.write(chunk)
+    except BrokenPipeError:
+        # openssl gave up early, e.g. on a malformed signature
+        pass
+    finally:
         try:
-            with os.fdopen(sig_fd, "wb") as f:
-                f.write(self.signature)
-            with os.fdopen(data_fd, "wb") as f:
-                f.write(data)
-
-            cert_data = None
-
-            # Perform verification up to two times, second time we also verify the chain to
-            # see if we have a known vendor root cert. Terminate as soon as verification fails.
-            # `-certsout` will write the accepted certificate to disk which we can parse
-            for verify_chain in (False, True):
-                cmd = [
-                    "openssl",
-                    "cms",
-                    "-verify",
-                    "-inform",
-                    "DER",
-                    "-in",
-                    sig_path,
-                    "-content",
-                    data_path,
-                    "-CAfile",
-                    ca.filepath,
-                    # "-cmsout", "-print",
-                    "-certsout",
-                    certout,
-                    *(("-noverify",) if not verify_chain else ()),
-                ]
-                result = subprocess.run(cmd, capture_output=True, text=False)
-                if result.returncode != 0:
-                    return (
-                        SignatureVerificationResult.valid_unknown_cert if verify_chain else SignatureVerificationResult.invalid,
-                        cert_data,
-                    )
-                cert_data = CertificateData.from_file(certout, verify=False)
-            return SignatureVerificationResult.valid_known_cert, cert_data
-
-        finally:
-            # always clean up
-            try:
-                os.remove(sig_path)
-            except OSError:
-                pass
-            try:
-                os.remove(data_path)
-            except OSError:
-                pass
-            try:
-                os.remove(certout)
-            except OSError:
-                pass
+            proc.stdin.close()
+        except BrokenPipeError:
+            pass
+
+    certificates = proc.stdout.read()
+    proc.stdout.close()
+    if proc.wait() != 0 or not certificates:
+        return None
+    return certificates
 
 
 @dataclass
@@ -123,8 +146,10 @@ class CertificateData:
 
     @staticmethod
     def from_file(fn, verify=True):
-        cert = x509.load_pem_x509_certificate(open(fn, "rb").read(), default_backend())
+        return CertificateData.from_certificate(x509.load_pem_x509_certificate(open(fn, "rb").read(), default_backend()), verify)
 
+    @staticmethod
+    def from_certificate(cert, verify=True):
         now = datetime.datetime.now(datetime.timezone.utc)
         if verify and now < cert.not_valid_before_utc:
             raise ValueError("Certificate is not yet valid.")
@@ -183,7 +208,7 @@ class CertificateData:
         @nb this is wrong, but leaving it in here in case we do need to do more forensics on the
         CMS structure later on.
 
-        Use: SignatureData.verify_pkcs7_openssl()
+        Use: SignatureData.verify_pkcs7()
         """
         raise NotImplementedError()
         ci = cms.ContentInfo.load(signature.signature)
@@ -229,7 +254,7 @@ class CertificateData:
         """
         Functional, but currently not in use.
 
-        Use: SignatureData.verify_pkcs7_openssl()
+        Use: SignatureData.verify_pkcs7()
         """
 
         expected_size = self.certificate.public_key().key_size // 8
@@ -271,37 +296,52 @@ class CertificateData:
         }
 
 
-class CertAuthorityBundle:
-    def __init__(self, filepath: str):
-        self.filepath = filepath
-
-    @staticmethod
-    def from_path(dirpath: str):
-        ca_bundle_path = tempfile.NamedTemporaryFile(suffix=".pem", delete=False).name
-        with open(ca_bundle_path, "wb") as cabundle:
-            for pem_path in glob.glob(os.path.join(dirpath, "*.pem")):
-                with open(pem_path, "rb") as f:
-                    cabundle.write(f.read())
-        return CertAuthorityBundle(ca_bundle_path)
-
-    def __del__(self):
-        try:
-            os.remove(self.filepath)
-        except OSError:
-            pass
+# Signed content is the file without control characters, i.e. only 0x20 - 0xFF except DEL
+DELETED_CHARS = bytes(range(0x20)) + b"\x7f"
+BLANK_CHARS = DELETED_CHARS + b" "
+CHUNK_SIZE = 1024 * 1024
 
 
-def get_signatures(data: str):
-    pattern = r"/\*\s*SIGNATURE;(.+?)ENDSEC;\s*\*/"
+def get_signatures(data: bytes, offset: int = 0):
+    pattern = rb"/\*\s*SIGNATURE;(.+?)ENDSEC;\s*\*/"
     matches = re.finditer(pattern, data, re.DOTALL)
-    yield from (SignatureData(m.group(1).strip(), *m.span()) for m in matches)
+    yield from (SignatureData(m.group(1).strip().decode("ascii"), offset + m.start(), offset + m.end()) for m in matches)
+
 
+def strip_content(data: bytes) -> bytes:
+    return data.translate(None, DELETED_CHARS)
 
-def strip_content(data: str) -> str:
-    return "".join(char for char in data if 0x20 <= ord(char) <= 0xFF and ord(char) != 0x7F)
+
+def iter_stripped(data: mmap.mmap, start: int, end: int):
+    """
+    Yields the stripped content of data[start:end] in chunks, so the file is never copied as a whole.
+    """
+    for pos in range(start, end, CHUNK_SIZE):
+        yield strip_content(data[pos : min(pos + CHUNK_SIZE, end)])
 
 
-def run(fn):
+def find_signature_block(data: mmap.mmap) -> int:
+    """
+    Returns the position of the first /* SIGNATURE; in the (unstripped) file or -1, without
+    looking at the file any further than the SIGNATURE; keyword, which is absent from most files.
+    """
+    pos = data.find(b"SIGNATURE;")
+    while pos != -1:
+        # walk back over whitespace and control characters, which are not part of the signed content
+        i = pos - 1
+        while i >= 0 and data[i] in BLANK_CHARS:
+            i -= 1
+        if i >= 0 and data[i] == ord("*"):
+            i -= 1
+            while i >= 0 and data[i] in DELETED_CHARS:
+                i -= 1
+            if i >= 0 and data[i] == ord("/"):
+                return i
+        pos = data.find(b"SIGNATURE;", pos + 1)
+    return -1
+
+
+def run(fn, store_dir=STORE_DIR):
     """
     # This was for earlier unsuccessful attempts, still leaving it here in case
     # we need to revisit this or fallback to PKCS#1
@@ -319,26 +359,36 @@ def run(fn):
         store.add_cert(crypto.load_certificate(crypto.FILETYPE_PEM, pem))
     """
 
-    ca = CertAuthorityBundle.from_path(os.path.join(os.path.dirname(__file__), "store"))
+    with open(fn, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as ifc_file:
+            block_start = find_signature_block(ifc_file)
+            if block_start == -1:
+                return
+
+            # offsets of signatures are positions within the stripped content
+            offset = sum(len(chunk) for chunk in iter_stripped(ifc_file, 0, block_start))
+            tail = strip_content(ifc_file[block_start:])
+            sigs = list(get_signatures(tail, offset))
 
-    with open(fn, "r", encoding="ascii") as f:
-        ifc_file = strip_content(f.read())
+            if not sigs:
+                return
 
-    sigs = list(get_signatures(ifc_file))
+            ca = CertAuthorityBundle.from_path(store_dir)
 
-    if not sigs:
-        return
+            non_signature_ranges = list(Range(0, offset + len(tail)) - RangeSet(Range(sig.start, sig.end) for sig in sigs))
 
-    non_signature_ranges = list(Range(0, len(ifc_file)) - RangeSet(Range(sig.start, sig.end) for sig in sigs))
+            if len(non_signature_ranges) != 1 or non_signature_ranges[0].start != 0:
+                yield {"signature": "invalid"}
+                return
 
-    if len(non_signature_ranges) != 1 or non_signature_ranges[0].start != 0:
-        yield {"signature": "invalid"}
-        return
+            for sig in sigs:
+                def content_bytes(sig=sig):
+                    return itertools.chain(iter_stripped(ifc_file, 0, block_start), [tail[: sig.start - offset]])
 
-    for sig in sigs:
-        content_bytes = ifc_file[: sig.start].encode("ascii")
-        status, cert = sig.verify_pkcs7_openssl(ca, content_bytes)
-        yield {"signature": status.name, **(cert.as_dict() if cert else {}), **sig.as_dict()}
+                status, cert = sig.verify_pkcs7(ca, content_bytes)
+                yield {"signature": status.name, **(cert.as_dict() if cert else {}), **sig.as_dict()}
 
 
 if __name__ == "__main__":
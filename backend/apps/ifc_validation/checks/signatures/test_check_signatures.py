@@ -1,8 +1,18 @@
+import base64
+import datetime
 import pytest
 from pathlib import Path
 import check_signatures
 import sys
 
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.hazmat.primitives.serialization import pkcs7
+from cryptography.x509.oid import NameOID
+
+import trust_store
+
 
 @pytest.mark.parametrize("fn", (Path(__file__).parent / "test_files").glob("*.ifc"))
 def test_invocation(fn):
@@ -17,6 +27,70 @@ def test_invocation(fn):
         assert False
 
 
+def make_certificate(name, issuer=None, issuer_key=None, ca=False):
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    subject = x509.Name([x509.NameAttribute(NameOID.ORGANIZATION_NAME, name)])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(subject)
+        .issuer_name(issuer.subject if issuer else subject)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(days=1))
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .add_extension(x509.BasicConstraints(ca=ca, path_length=None), critical=True)
+        .sign(issuer_key or key, hashes.SHA256())
+    )
+    return cert, key
+
+
+def sign(fn, content, cert, key):
+    signature = (
+        pkcs7.PKCS7SignatureBuilder()
+        .set_data(content)
+        .add_signer(cert, key, hashes.SHA256())
+        .sign(serialization.Encoding.DER, [pkcs7.PKCS7Options.DetachedSignature, pkcs7.PKCS7Options.Binary])
+    )
+    fn.write_bytes(content.replace(b";", b";\r\n") + b"/*SIGNATURE;\n" + base64.encodebytes(signature) + b"ENDSEC;*/\n")
+
+
+def test_known_certificate(tmp_path):
+    root, root_key = make_certificate("root", ca=True)
+    leaf, leaf_key = make_certificate("end-entity", root, root_key)
+    fn = tmp_path / "signed.ifc"
+    sign(fn, b"ISO-10303-21;HEADER;ENDSEC;DATA;ENDSEC;END-ISO-10303-21;", leaf, leaf_key)
+
+    # nothing is trusted without a store
+    store = tmp_path / "store"
+    assert [res["signature"] for res in check_signatures.run(fn, store)] == ["invalid"]
+    store.mkdir()
+    assert [res["signature"] for res in check_signatures.run(fn, store)] == ["invalid"]
+
+    # the cached trust store is reloaded when the store changes
+    other_root, _ = make_certificate("other root", ca=True)
+    (store / "other.pem").write_bytes(other_root.public_bytes(serialization.Encoding.PEM))
+    assert [res["signature"] for res in check_signatures.run(fn, store)] == ["valid_unknown_cert"]
+    (store / "root.pem").write_bytes(root.public_bytes(serialization.Encoding.PEM))
+    assert [res["signature"] for res in check_signatures.run(fn, store)] == ["valid_known_cert"]
+    assert [res["subject"] for res in check_signatures.run(fn, store)] == ["O=end-entity"]
+    assert trust_store.CertAuthorityBundle.from_path(store) is trust_store.CertAuthorityBundle.from_path(store)
+
+    fn.write_bytes(fn.read_bytes().replace(b"DATA;", b"DATA;#1=IFCWALL();"))
+    assert [res["signature"] for res in check_signatures.run(fn, store)] == ["invalid"]
+
+
+@pytest.mark.parametrize("payload", [b"\x30\x80" * 5000, b"\x30\x80", b"\x30\x84\xff\xff\xff\xff", b""])
+def test_malformed_payload(payload, tmp_path):
+    root, _ = make_certificate("root", ca=True)
+    (tmp_path / "root.pem").write_bytes(root.public_bytes(serialization.Encoding.PEM))
+    signature = check_signatures.SignatureData(base64.b64encode(payload).decode(), 0, 0)
+    ca = trust_store.CertAuthorityBundle.from_path(tmp_path)
+    result, cert = signature.verify_pkcs7(ca, lambda: [b""])
+    assert result == check_signatures.SignatureVerificationResult.invalid
+    assert cert is None
+
+
 if __name__ == "__main__":
     if len(sys.argv) == 2:
         check_signatures.run(sys.argv[1])
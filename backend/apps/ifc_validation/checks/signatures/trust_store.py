@@ -0,0 +1,59 @@
+"""
+Trusted (vendor root) certificates for digital signatures, i.e. store/*.pem.
+
+The store is read once per process and kept in memory; it is read again when a file is
+added, removed or modified. The concatenated certificates are written once, to a bundle
+file named after their digest, which is passed to `openssl cms -verify` as the -CAfile.
+The check daemon preloads this module, so forked checks inherit it.
+"""
+
+import glob
+import hashlib
+import os
+import tempfile
+from typing import Optional
+
+STORE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "store")
+BUNDLE_DIR = tempfile.gettempdir()
+
+
+class CertAuthorityBundle:
+    _cache = {}
+
+    def __init__(self, filepath: Optional[str]):
+        # None when the store is missing or empty, nothing is trusted then
+        self.filepath = filepath
+
+    @staticmethod
+    def write_bundle(pem: bytes) -> Optional[str]:
+        if not pem.strip():
+            return None
+        filepath = os.path.join(BUNDLE_DIR, f"ifc-validation-ca-{hashlib.sha256(pem).hexdigest()}.pem")
+        if not os.path.exists(filepath):
+            fd, tmp_path = tempfile.mkstemp(suffix=".pem", dir=BUNDLE_DIR)
+            with os.fdopen(fd, "wb") as f:
+                f.write(pem)
+            # atomic, a concurrent check either sees the complete bundle or writes the same one
+            os.replace(tmp_path, filepath)
+        return filepath
+
+    @classmethod
+    def from_path(cls, dirpath: str = STORE_DIR):
+        paths = sorted(glob.glob(os.path.join(dirpath, "*.pem")))
+        stamp = []
+        for path in paths:
+            st = os.stat(path)
+            stamp.append((path, st.st_mtime_ns, st.st_size))
+
+        cached = cls._cache.get(dirpath)
+        if cached is None or cached[0] != stamp or (cached[1].filepath and not os.path.exists(cached[1].filepath)):
+            pem = b""
+            for path in paths:
+                with open(path, "rb") as f:
+                    pem += f.read().rstrip(b"\n") + b"\n"
+            cached = cls._cache[dirpath] = (stamp, cls(cls.write_bundle(pem)))
+        return cached[1]
+
+
+# read the store on import, so that it is shared by all checks forked from the check daemon
+CertAuthorityBundle.from_path()
@@ -0,0 +1,243 @@
+"""
+Resumable uploads of large files, following the core of the tus protocol (https://tus.io/protocols/resumable-upload).
+
+A client announces the length of a file, then appends chunks at the current offset.
+Chunks are streamed straight into a partial file below MEDIA_ROOT (never held in memory)
+and can be verified with a SHA-256 checksum. When the last byte has arrived, the file is
+moved into storage as a Validation Request and its validation is queued; the SHA-256 of
+the whole file is computed once by the validation workflow (see result_cache).
+The HEADER section is previewed as soon as it has arrived (see header_preview).
+Uploads that don't receive a chunk for CHUNKED_UPLOAD_EXPIRY_HOURS expire (tus 'expiration'
+extension) and are removed by the file retention task.
+"""
+
+import os
+import fcntl
+import base64
+import hashlib
+import logging
+from datetime import timedelta
+from contextlib import contextmanager
+
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+from django.utils.text import get_valid_filename
+
+from apps.ifc_validation_models.models import ValidationRequest
+
+from core.settings import MEDIA_ROOT, MAX_UPLOAD_CHUNK_SIZE_IN_MB, CHUNKED_UPLOAD_EXPIRY_HOURS
+
+from .models import ChunkedUpload
+from .header_preview import HeaderSniffer, MAX_HEADER_BYTES, header_available
+from .tasks import ifc_file_validation_task
+
+logger = logging.getLogger(__name__)
+
+READ_SIZE = 1024 * 1024
+UPLOADS_DIR = os.path.join(MEDIA_ROOT, "uploads")
+
+
+class UploadOffsetMismatch(Exception):
+    pass
+
+
+class UploadChecksumMismatch(Exception):
+    pass
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+def part_path(upload):
+    return os.path.join(UPLOADS_DIR, f"{upload.public_id}.part")
+
+
+def expires_at(upload):
+    return upload.updated + timedelta(hours=CHUNKED_UPLOAD_EXPIRY_HOURS)
+
+
+def is_expired(upload):
+    return upload.request_id is None and expires_at(upload) <= timezone.now()
+
+
+def create_upload(user, file_name, length):
+    upload = ChunkedUpload.objects.create(created_by_id=user.id, file_name=file_name, length=length)
+    os.makedirs(UPLOADS_DIR, exist_ok=True)
+    open(part_path(upload), 'wb').close()
+    return upload
+
+
+def parse_checksum(header):
+    """
+    Upload-Checksum header, eg. 'sha256 <base64 digest>'; only SHA-256 is supported.
+    """
+    if not header:
+        return None
+    algorithm, _, value = header.partition(' ')
+    if algorithm.lower() != 'sha256':
+        raise ValueError(f"Unsupported checksum algorithm '{algorithm}'.")
+    return base64.b64decode(value)
+
+
+def append_chunk(upload, offset, stream, checksum=None, force=False):
+    """
+    Appends the content of 'stream' at 'offset', which must be the current offset of the upload.
+    Assembles the Validation Request after the last chunk. Returns the new offset.
+    """
+    if upload.request_id is not None or offset != upload.offset:
+        raise UploadOffsetMismatch(f"Upload {upload.public_id} is at offset {upload.offset}, not {offset}.")
+
+    max_chunk_size = MAX_UPLOAD_CHUNK_SIZE_IN_MB * 1024 * 1024
+    sha256 = hashlib.sha256()
+    received = 0
+
+    try:
+        f = open(part_path(upload), 'r+b')
+    except FileNotFoundError:
+        # assembled or removed meanwhile
+        raise UploadOffsetMismatch(f"Upload {upload.public_id} is no longer in progress.")
+
+    with f:
+        # one writer per upload; a concurrent request (eg. a client retrying) doesn't wait for it,
+        # but gets the offset to resume from once this chunk is stored
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise UploadOffsetMismatch(f"Upload {upload.public_id} is being resumed concurrently.")
+
+        # the upload may have advanced since it was read, before the lock was taken
+        current = ChunkedUpload.objects.filter(pk=upload.pk).values_list('offset', 'request_id').first()
+        if current != (offset, None):
+            raise UploadOffsetMismatch(f"Upload {upload.public_id} was resumed concurrently.")
+
+        f.seek(offset)
+        try:
+            while chunk := stream.read(READ_SIZE):
+                received += len(chunk)
+                if received > max_chunk_size or offset + received > upload.length:
+                    raise UploadTooLarge(f"Chunk exceeds the announced length or the maximum chunk size ({MAX_UPLOAD_CHUNK_SIZE_IN_MB} MB).")
+                sha256.update(chunk)
+                f.write(chunk)
+            if checksum is not None and sha256.digest() != checksum:
+                raise UploadChecksumMismatch(f"Checksum of chunk at offset {offset} does not match.")
+        except Exception:
+            # discard the partial chunk, the client resumes from the current offset
+            f.truncate(offset)
+            raise
+        f.flush()
+
+        # still holding the lock, so no other writer can have advanced the upload meanwhile
+        upload.updated = timezone.now()
+        ChunkedUpload.objects.filter(pk=upload.pk, offset=offset).update(offset=offset + received, updated=upload.updated)
+        upload.offset = offset + received
+
+        if offset < MAX_HEADER_BYTES:
+            _sniff_header(upload)
+
+        if upload.offset == upload.length:
+            assemble(upload, force=force)
+    return upload.offset
+
+
+def _sniff_header(upload):
+    # chunks may split the HEADER section, look at the start of the file received so far
+    with open(part_path(upload), 'rb') as f:
+        header = HeaderSniffer().feed(f.read(min(upload.offset, MAX_HEADER_BYTES)))
+    if header is not None:
+        header_available.send(sender=ChunkedUpload, key=str(upload.public_id), header=header)
+
+
+def assemble(upload, force=False):
+    """
+    Moves a complete upload into storage as a new Validation Request and queues its validation.
+    """
+    name = default_storage.get_available_name(get_valid_filename(upload.file_name))
+    os.replace(part_path(upload), default_storage.path(name))
+
+    with transaction.atomic():
+        request = ValidationRequest.objects.create(
+            file=name,
+            file_name=upload.file_name,
+            size=upload.length,
+            channel='API',
+        )
+        upload.request_id = request.id
+        upload.save(update_fields=['request_id', 'updated'])
+
+        transaction.on_commit(lambda: ifc_file_validation_task.delay(request.id, request.file_name, force=force))
+
+    logger.info(f"Upload {upload.public_id} assembled as Validation Request {request.id} - file_name: {upload.file_name} size: {upload.length:,} bytes")
+    return request
+
+
+def discard(upload):
+    _remove(part_path(upload))
+    upload.delete()
+
+
+def remove_expired_uploads(dry_run=False):
+    """
+    Removes uploads that expired before they were complete, and partial files left without an upload.
+    Returns the number of files removed.
+    """
+    cutoff = timezone.now() - timedelta(hours=CHUNKED_UPLOAD_EXPIRY_HOURS)
+    expired = ChunkedUpload.objects.filter(request_id__isnull=True, updated__lt=cutoff)
+    removed = 0
+
+    for upload in expired.iterator():
+        if dry_run:
+            logger.info(f"[DRY-RUN] Would remove expired upload {upload.public_id} ({upload.file_name}, {upload.offset:,} of {upload.length:,} bytes)")
+            removed += 1
+            continue
+        # unless a chunk is being written right now, or was stored since the upload was read
+        with _locked_part_file(part_path(upload)) as locked:
+            if locked and ChunkedUpload.objects.filter(pk=upload.pk, updated__lt=cutoff).delete()[0]:
+                _remove(part_path(upload))
+                logger.info(f"Removed expired upload {upload.public_id} ({upload.file_name}, {upload.offset:,} of {upload.length:,} bytes)")
+                removed += 1
+
+    # partial files of uploads that were deleted otherwise
+    known = {f"{public_id}.part" for public_id in ChunkedUpload.objects.values_list('public_id', flat=True)}
+    if os.path.isdir(UPLOADS_DIR):
+        for entry in os.scandir(UPLOADS_DIR):
+            if not entry.name.endswith('.part') or entry.name in known:
+                continue
+            if entry.stat().st_mtime >= cutoff.timestamp():
+                continue
+            if dry_run:
+                logger.info(f"[DRY-RUN] Would remove orphaned partial file {entry.name}")
+                removed += 1
+                continue
+            with _locked_part_file(entry.path) as locked:
+                if locked:
+                    _remove(entry.path)
+                    logger.info(f"Removed orphaned partial file {entry.name}")
+                    removed += 1
+
+    return removed
+
+
+@contextmanager
+def _locked_part_file(path):
+    # yields False while a chunk is being written to the file (a missing file is not)
+    try:
+        f = open(path, 'rb')
+    except FileNotFoundError:
+        yield True
+        return
+    with f:
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        yield True
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,168 @@
+"""
+Early feedback on the HEADER section of a file that is still being uploaded.
+
+Magic-bytes detection and the header checks only need the start of a file. As soon as
+the HEADER;...ENDSEC; block of an upload has arrived, a 'header_available' signal is
+sent; its receiver (see signals) runs these checks on the header alone, in-process (see
+checks/header_policy/analyze_header.py) but off the request, while the body is still uploading.
+Previews are kept in Redis and read by the upload endpoints; the regular workflow still
+runs all checks on the complete file.
+
+Upload views opt in with add_upload_handler(request), once the user is authenticated.
+"""
+
+import json
+import uuid
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import filetype
+from filetype.types import archive
+from django.core.files.uploadhandler import FileUploadHandler
+from django.dispatch import Signal
+
+from core.redis_lock import redis_client
+
+from .checks.header_policy import analyze_header
+
+logger = logging.getLogger(__name__)
+
+# sent with 'key' (identifies the preview) and 'header' (bytes, up to and including ENDSEC;)
+header_available = Signal()
+
+MAX_HEADER_BYTES = 1024 * 1024
+PREVIEW_TTL = 24 * 3600
+
+HEADER_START = b"HEADER;"
+HEADER_END = b"ENDSEC;"
+
+
+def preview_key(key):
+    return f"validation:header-preview:{key}"
+
+
+class HeaderSniffer:
+    """
+    Buffers the start of a stream until the HEADER section is complete (or MAX_HEADER_BYTES is exceeded).
+    """
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.header = None
+        self.done = False
+
+    def feed(self, data):
+        """
+        Returns the header once (when it became available with this data), None otherwise.
+        """
+        if self.done:
+            return None
+
+        self.buffer += data[:MAX_HEADER_BYTES - len(self.buffer)]
+        start = self.buffer.find(HEADER_START)
+        end = self.buffer.find(HEADER_END, start) if start >= 0 else -1
+        if end >= 0:
+            self.header = bytes(self.buffer[:end + len(HEADER_END)])
+        if end >= 0 or len(self.buffer) >= MAX_HEADER_BYTES:
+            self.done = True
+            self.buffer = bytearray()
+        return self.header
+
+
+def analyze(header):
+    """
+    Runs magic-bytes detection, header syntax and header policy checks on the HEADER section of an upload.
+    """
+    ty = filetype.guess(header)
+    preview = {
+        "status": "COMPLETED",
+        "magic_valid": type(ty) in (type(None), archive.Zip),
+    }
+
+    syntax, policy = analyze_header.analyze(header)
+    preview["header_syntax_valid"] = syntax["success"]
+    if syntax["error_output"]:
+        preview["header_syntax_errors"] = [syntax["error_output"]]
+    elif not syntax["success"]:
+        preview["header_syntax_errors"] = [msg.get("message") for msg in json.loads(syntax["output"])]
+    if policy:
+        preview["header"] = policy
+    return preview
+
+
+_executor = None
+
+
+def start(key, header):
+    """
+    Previews 'header' once per key, in the background: the parse is CPU-bound and uploads are
+    received by gevent workers, so it runs on a native thread instead of the event loop.
+    """
+    if not redis_client.set(preview_key(key), json.dumps({"status": "PENDING"}), nx=True, ex=PREVIEW_TTL):
+        return
+
+    try:
+        from gevent import get_hub, spawn
+        from gevent.monkey import is_module_patched
+    except ImportError:
+        is_module_patched = None
+
+    if is_module_patched and is_module_patched("threading"):
+        # analyze on the hub's threadpool, store (Redis, patched sockets) from a greenlet
+        threadpool = get_hub().threadpool
+        spawn(lambda: _complete(key, lambda: threadpool.apply(analyze, (header,))))
+    else:
+        global _executor
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="header-preview")
+        _executor.submit(_complete, key, lambda: analyze(header))
+
+
+def _complete(key, run):
+    try:
+        preview = run()
+    except Exception as err:
+        logger.warning(f"Could not preview header {key}: {err}")
+        preview = {"status": "FAILED"}
+    store(key, preview)
+
+
+def store(key, preview):
+    redis_client.set(preview_key(key), json.dumps(preview), ex=PREVIEW_TTL)
+
+
+def get(key):
+    value = redis_client.get(preview_key(key))
+    return json.loads(value) if value is not None else None
+
+
+def add_upload_handler(request):
+    """
+    Previews the headers of the files uploaded with 'request'; call after authentication and before its body is read.
+    """
+    request.upload_handlers.insert(0, HeaderPreviewUploadHandler(request))
+
+
+class HeaderPreviewUploadHandler(FileUploadHandler):
+    """
+    Upload handler that sends 'header_available' while a multipart file upload is still streaming.
+
+    Passes all data on to the next handler; preview keys are collected in request.header_previews (by file name).
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.sniffer = HeaderSniffer()
+
+    def receive_data_chunk(self, raw_data, start):
+        header = self.sniffer.feed(raw_data)
+        if header is not None:
+            key = str(uuid.uuid4())
+            if not hasattr(self.request, "header_previews"):
+                self.request.header_previews = {}
+            self.request.header_previews[self.file_name] = key
+            header_available.send(sender=self.__class__, key=key, header=header)
+        return raw_data
+
+    def file_complete(self, file_size):
+        return None
@@ -11,6 +11,7 @@ from django.db import transaction
 from apps.ifc_validation_models.models import ValidationRequest
 from apps.ifc_validation_models.decorators import requires_django_user_context
 
+from apps.ifc_validation import chunked_upload, report_cache
 from apps.ifc_validation.tasks.utils import get_absolute_file_path
 from core.utils import format_human_readable_file_size
 
@@ -21,7 +22,8 @@ class Command(BaseCommand):
     
     help = (
         'Archive or Remove Validation Request files matching certain pruning criteria (eg. age, deletion status).',
-        'Either ompresses *.ifc files to *.ifc.gz (archive) or removes *.ifc/*.ifc.gz files (remove) and updates database records accordingly.'
+        'Either ompresses *.ifc files to *.ifc.gz (archive) or removes *.ifc/*.ifc.gz files (remove) and updates database records accordingly.',
+        'Remove also discards expired resumable uploads (see chunked_upload) and materialized report sections (see report_cache).'
     )
 
     def add_arguments(self, parser):
@@ -174,6 +176,13 @@ class Command(BaseCommand):
                     logger.error(f"Failed to remove file for id={request.id}: {e}")
                     skipped += 1
 
+        # unfinished resumable uploads expire after CHUNKED_UPLOAD_EXPIRY_HOURS, regardless of --days
+        if not archive:
+            expired = chunked_upload.remove_expired_uploads(dry_run=dry_run)
+            logger.info(f"{'Would remove' if dry_run else 'Removed'} {expired} expired upload(s).")
+            expired = report_cache.remove_expired_sections(dry_run=dry_run)
+            logger.info(f"{'Would remove' if dry_run else 'Removed'} {expired} expired report section(s).")
+
         # show summary
         savings_str = format_human_readable_file_size(total_savings)
         if dry_run:
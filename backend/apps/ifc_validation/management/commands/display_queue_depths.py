@@ -0,0 +1,28 @@
+import logging
+
+from django.core.management.base import BaseCommand
+
+from apps.ifc_validation.tasks.scheduler import queue_depths
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+
+    help = (
+        'Displays the nbr of queued subtasks per size tier and the running/pending workflows per user'
+    )
+
+    def handle(self, *args, **options):
+
+        depths = queue_depths()
+
+        for tier, depth in depths['tiers'].items():
+            logger.info(f"- Queue validation-{tier}: {depth:,} subtask(s)")
+
+        if not depths['users']:
+            logger.info("No running or pending workflows found.")
+            return
+
+        logger.info(f"Found {len(depths['users'])} user(s) with running or pending workflows:")
+        for user_id, counts in sorted(depths['users'].items()):
+            logger.info(f"- User ID: {user_id}, Running: {counts['running']:,}, Pending: {counts['pending']:,}")
@@ -1,36 +1,37 @@
-from redis import Redis
-from redis.lock import Lock
+import time
 import logging
 
 from django.core.management.base import BaseCommand
 
-from core.settings import CELERY_BROKER_URL
+from core.redis_lock import redis_client
+from core.settings import USER_MAX_CONCURRENT_TASKS
 
 logger = logging.getLogger(__name__)
-redis_client: Redis = Redis.from_url(CELERY_BROKER_URL, decode_responses=True)
 
 class Command(BaseCommand):
 
     help = (
-        'Scans and displays all current user locks (user ID, task name, TTL)'
+        'Scans and displays the permits of all user semaphores (user ID, permits held, waiting tasks, TTL)'
     )
 
     def handle(self, *args, **options):
-        
-        # Scan for keys matching the lock pattern
-        lock_pattern = "lock:celery:user:*:task:*"
-        lock_keys = redis_client.keys(lock_pattern)
 
-        if not lock_keys:
+        # Scan for keys matching the semaphore pattern
+        user_ids = sorted({key.split(":")[2] for key in redis_client.scan_iter("semaphore:user:*")})
+        now = time.time()
+
+        active = []
+        for user_id in user_ids:
+            holders = redis_client.zrangebyscore(f"semaphore:user:{user_id}:holders", now, "+inf", withscores=True)
+            waiting = redis_client.llen(f"semaphore:user:{user_id}:waiting")
+            if holders or waiting:
+                active.append((user_id, holders, waiting))
+
+        if not active:
             logger.info("No active user locks found.")
             return
 
-        logger.info(f"Found {len(lock_keys)} active user lock(s):")
-        for key in lock_keys:
-            # Extract user_id and task_name from the key
-            parts = key.split(":")
-            if len(parts) >= 6:
-                user_id = parts[3]
-                task_name = parts[5]
-                ttl = redis_client.ttl(key)
-                logger.info(f"- User ID: {user_id}, Task: {task_name}, TTL: {ttl:,} seconds")
+        logger.info(f"Found {len(active)} user(s) with active permits or waiting tasks:")
+        for user_id, holders, waiting in active:
+            ttl = int(max((expires for _, expires in holders), default=now) - now)
+            logger.info(f"- User ID: {user_id}, Permits: {len(holders)}/{USER_MAX_CONCURRENT_TASKS}, Waiting: {waiting:,}, TTL: {ttl:,} seconds")
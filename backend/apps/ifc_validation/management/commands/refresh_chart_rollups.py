@@ -0,0 +1,28 @@
+import logging
+
+from django.core.management.base import BaseCommand
+
+from apps.ifc_validation.chart_rollups import refresh
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+
+    help = (
+        'Refreshes the daily rollups read by the admin charts, for all days that changed since the previous refresh.'
+    )
+
+    def add_arguments(self, parser):
+
+        # rebuild all days, eg. after deploying or when rollups are out of sync
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            default=False,
+            help='Rebuild the rollups of all days (default: only days changed since the previous refresh).'
+        )
+
+    def handle(self, *args, **options):
+        count = refresh(full=options['full'])
+        logger.info(f"Refreshed chart rollups of {count:,} day(s).")
@@ -0,0 +1,115 @@
+"""
+Prometheus metrics of check subprocesses, per task type (see tasks.profiling).
+
+Every run is stored as a TaskResourceUsage row (to find which checks blow up on which files) and
+added to counters and histograms in Redis, so all workers report through a single scrape endpoint.
+"""
+
+import logging
+
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+
+from core.redis_lock import redis_client
+from core.settings import METRICS_TOKEN
+
+from .models import TaskResourceUsage
+
+logger = logging.getLogger(__name__)
+
+METRICS_KEY = "validation:metrics:checks"
+
+PEAK_RSS_BUCKETS = [2**n * 1024 * 1024 for n in range(6, 15)]  # 64 MB .. 16 GB
+WALL_TIME_BUCKETS = [1, 5, 15, 60, 300, 900, 1800, 3600]  # seconds
+
+COUNTERS = {
+    "runs": ("validation_check_runs_total", "Number of check subprocesses run."),
+    "failures": ("validation_check_failures_total", "Number of check subprocesses that exited with a non-zero code."),
+    "user_cpu": ("validation_check_user_cpu_seconds_total", "User CPU time of check subprocesses."),
+    "system_cpu": ("validation_check_system_cpu_seconds_total", "System CPU time of check subprocesses."),
+    "read_bytes": ("validation_check_read_bytes_total", "Bytes read by check subprocesses."),
+}
+
+HISTOGRAMS = {
+    "peak_rss": ("validation_check_peak_rss_bytes", "Peak resident memory of check subprocesses.", PEAK_RSS_BUCKETS),
+    "wall_time": ("validation_check_wall_time_seconds", "Wall time of check subprocesses.", WALL_TIME_BUCKETS),
+}
+
+
+def record_resource_usage(task, usage, returncode=None):
+    """
+    Stores the resources consumed by the check subprocess of a Validation Task.
+    """
+    task_type = str(task.type)
+    TaskResourceUsage.objects.create(
+        task_id=task.id,
+        request_id=task.request_id,
+        task_type=task_type,
+        file_size=task.request.size,
+        returncode=returncode,
+        wall_time=usage.wall_time,
+        user_cpu=usage.user_cpu,
+        system_cpu=usage.system_cpu,
+        peak_rss=usage.peak_rss,
+        read_bytes=usage.read_bytes,
+    )
+
+    try:
+        with redis_client.pipeline() as pipe:
+            pipe.hincrby(METRICS_KEY, f"{task_type}|runs", 1)
+            pipe.hincrby(METRICS_KEY, f"{task_type}|failures", int(bool(returncode)))
+            pipe.hincrbyfloat(METRICS_KEY, f"{task_type}|user_cpu", usage.user_cpu)
+            pipe.hincrbyfloat(METRICS_KEY, f"{task_type}|system_cpu", usage.system_cpu)
+            pipe.hincrby(METRICS_KEY, f"{task_type}|read_bytes", usage.read_bytes)
+            for name, (_, _, buckets) in HISTOGRAMS.items():
+                value = getattr(usage, name)
+                le = next((b for b in buckets if value <= b), "+Inf")
+                pipe.hincrby(METRICS_KEY, f"{task_type}|{name}|{le}", 1)
+                pipe.hincrbyfloat(METRICS_KEY, f"{task_type}|{name}|sum", value)
+            pipe.execute()
+    except Exception as err:
+        # metrics are best effort, the usage is stored anyway
+        logger.warning(f"Could not update metrics of task {task.id}: {err}")
+
+
+def render():
+    """
+    Renders the metrics in the Prometheus text exposition format.
+    """
+    values = {}
+    for field, value in redis_client.hgetall(METRICS_KEY).items():
+        task_type, _, name = field.partition("|")
+        values.setdefault(task_type, {})[name] = float(value)
+
+    lines = []
+    for name, (metric, help) in COUNTERS.items():
+        lines += [f"# HELP {metric} {help}", f"# TYPE {metric} counter"]
+        for task_type, v in sorted(values.items()):
+            lines.append(f'{metric}{{task_type="{task_type}"}} {_format(v.get(name, 0))}')
+
+    for name, (metric, help, buckets) in HISTOGRAMS.items():
+        lines += [f"# HELP {metric} {help}", f"# TYPE {metric} histogram"]
+        for task_type, v in sorted(values.items()):
+            cumulative = 0
+            for le in buckets + ["+Inf"]:
+                cumulative += v.get(f"{name}|{le}", 0)
+                lines.append(f'{metric}_bucket{{task_type="{task_type}",le="{le}"}} {_format(cumulative)}')
+            lines.append(f'{metric}_sum{{task_type="{task_type}"}} {_format(v.get(f"{name}|sum", 0))}')
+            lines.append(f'{metric}_count{{task_type="{task_type}"}} {_format(cumulative)}')
+
+    return "\n".join(lines) + "\n"
+
+
+def _format(value):
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def metrics_view(request):
+    """
+    Scrape endpoint for Prometheus; requires 'Authorization: Bearer <METRICS_TOKEN>' or a staff session.
+    """
+    authorization = request.headers.get("Authorization", "")
+    has_token = bool(METRICS_TOKEN) and constant_time_compare(authorization, f"Bearer {METRICS_TOKEN}")
+    if not has_token and not (request.user.is_authenticated and request.user.is_staff):
+        return HttpResponseForbidden()
+    return HttpResponse(render(), content_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,74 @@
+# Generated by Django 5.2.4 on 2026-10-17 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ModelDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(db_index=True)),
+                ('produced_by_id', models.BigIntegerField(null=True)),
+                ('schema', models.CharField(max_length=255, null=True)),
+                ('uploaded_by_id', models.BigIntegerField(null=True)),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Daily Model Rollup',
+                'verbose_name_plural': 'Daily Model Rollups',
+            },
+        ),
+        migrations.CreateModel(
+            name='RequestDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(db_index=True)),
+                ('status', models.CharField(max_length=32)),
+                ('channel', models.CharField(max_length=32, null=True)),
+                ('schema', models.CharField(max_length=255, null=True)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('size_sum', models.BigIntegerField(default=0)),
+                ('duration_sum', models.FloatField(default=0)),
+                ('duration_count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Daily Request Rollup',
+                'verbose_name_plural': 'Daily Request Rollups',
+            },
+        ),
+        migrations.CreateModel(
+            name='TaskDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(db_index=True)),
+                ('type', models.CharField(max_length=32)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('duration_sum', models.FloatField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Daily Task Rollup',
+                'verbose_name_plural': 'Daily Task Rollups',
+            },
+        ),
+        migrations.CreateModel(
+            name='UploaderDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(db_index=True)),
+                ('user_id', models.BigIntegerField()),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Daily Uploader Rollup',
+                'verbose_name_plural': 'Daily Uploader Rollups',
+            },
+        ),
+    ]
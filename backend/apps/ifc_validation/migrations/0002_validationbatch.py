@@ -0,0 +1,28 @@
+# Generated by Django 5.2.4 on 2026-10-17 11:40
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ifc_validation', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ValidationBatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('public_id', models.UUIDField(default=uuid.uuid4, editable=False, unique=True)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('created_by_id', models.BigIntegerField(db_index=True)),
+                ('request_ids', models.JSONField(default=list)),
+            ],
+            options={
+                'verbose_name': 'Validation Batch',
+                'verbose_name_plural': 'Validation Batches',
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.4 on 2026-10-17 15:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ifc_validation', '0003_chunkedupload'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskResourceUsage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('task_id', models.BigIntegerField(db_index=True)),
+                ('request_id', models.BigIntegerField(db_index=True)),
+                ('task_type', models.CharField(db_index=True, max_length=32)),
+                ('file_size', models.BigIntegerField(null=True)),
+                ('returncode', models.IntegerField(null=True)),
+                ('wall_time', models.FloatField()),
+                ('user_cpu', models.FloatField()),
+                ('system_cpu', models.FloatField()),
+                ('peak_rss', models.BigIntegerField()),
+                ('read_bytes', models.BigIntegerField()),
+            ],
+            options={
+                'verbose_name': 'Task Resource Usage',
+                'verbose_name_plural': 'Task Resource Usage',
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.4 on 2026-10-17 18:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ifc_validation', '0004_taskresourceusage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportSection',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('updated', models.DateTimeField(auto_now=True, db_index=True)),
+                ('request_id', models.BigIntegerField()),
+                ('section', models.CharField(max_length=32)),
+                ('generation', models.BigIntegerField()),
+                ('content', models.BinaryField()),
+            ],
+            options={
+                'verbose_name': 'Report Section',
+                'verbose_name_plural': 'Report Sections',
+                'constraints': [models.UniqueConstraint(fields=('request_id', 'section'), name='unique_report_section')],
+            },
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.4 on 2026-10-17 19:10
+
+import django.db.models.functions.comparison
+from django.db import migrations, models
+
+
+# key columns of the rollup tables
+ROLLUP_KEYS = {
+    'RequestDailyRollup': ('date', 'status', 'channel', 'schema'),
+    'TaskDailyRollup': ('date', 'type'),
+    'ModelDailyRollup': ('date', 'produced_by_id', 'schema', 'uploaded_by_id'),
+    'UploaderDailyRollup': ('date', 'user_id'),
+}
+
+
+def remove_duplicates(apps, schema_editor):
+    # rows written twice by overlapping refreshes; the latest one is kept
+    for name, key in ROLLUP_KEYS.items():
+        model = apps.get_model('ifc_validation', name)
+        seen, duplicates = set(), []
+        for row in model.objects.order_by('-id').values('id', *key).iterator():
+            values = tuple(row[field] for field in key)
+            if values in seen:
+                duplicates.append(row['id'])
+            else:
+                seen.add(values)
+        model.objects.filter(id__in=duplicates).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ifc_validation', '0005_reportsection'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='requestdailyrollup',
+            constraint=models.UniqueConstraint(models.F('date'), models.F('status'), django.db.models.functions.comparison.Coalesce('channel', models.Value('')), django.db.models.functions.comparison.Coalesce('schema', models.Value('')), name='unique_request_daily_rollup'),
+        ),
+        migrations.AddConstraint(
+            model_name='taskdailyrollup',
+            constraint=models.UniqueConstraint(fields=('date', 'type'), name='unique_task_daily_rollup'),
+        ),
+        migrations.AddConstraint(
+            model_name='modeldailyrollup',
+            constraint=models.UniqueConstraint(models.F('date'), django.db.models.functions.comparison.Coalesce('produced_by_id', models.Value(0), output_field=models.BigIntegerField()), django.db.models.functions.comparison.Coalesce('schema', models.Value('')), django.db.models.functions.comparison.Coalesce('uploaded_by_id', models.Value(0), output_field=models.BigIntegerField()), name='unique_model_daily_rollup'),
+        ),
+        migrations.AddConstraint(
+            model_name='uploaderdailyrollup',
+            constraint=models.UniqueConstraint(fields=('date', 'user_id'), name='unique_uploader_daily_rollup'),
+        ),
+    ]
@@ -0,0 +1,175 @@
+import uuid
+
+from django.db import models
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce
+
+
+class RequestDailyRollup(models.Model):
+    """
+    Number, size and duration of Validation Requests per day, status, channel and model schema.
+    """
+
+    date = models.DateField(db_index=True)
+    status = models.CharField(max_length=32)
+    channel = models.CharField(max_length=32, null=True)
+    schema = models.CharField(max_length=255, null=True)
+
+    count = models.PositiveIntegerField(default=0)
+    size_sum = models.BigIntegerField(default=0)
+    duration_sum = models.FloatField(default=0)  # seconds, requests that have started
+    duration_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Daily Request Rollup"
+        verbose_name_plural = "Daily Request Rollups"
+        constraints = [
+            # one row per day and key, also when channel or schema is null
+            models.UniqueConstraint(
+                F("date"), F("status"), Coalesce("channel", Value("")), Coalesce("schema", Value("")),
+                name="unique_request_daily_rollup",
+            ),
+        ]
+
+
+class TaskDailyRollup(models.Model):
+    """
+    Number and duration of completed Validation Tasks per day and task type.
+    """
+
+    date = models.DateField(db_index=True)
+    type = models.CharField(max_length=32)
+
+    count = models.PositiveIntegerField(default=0)
+    duration_sum = models.FloatField(default=0)  # seconds
+
+    class Meta:
+        verbose_name = "Daily Task Rollup"
+        verbose_name_plural = "Daily Task Rollups"
+        constraints = [
+            models.UniqueConstraint(fields=["date", "type"], name="unique_task_daily_rollup"),
+        ]
+
+
+class ModelDailyRollup(models.Model):
+    """
+    Number of Models per day, authoring tool, schema and uploader.
+
+    Vendor/dev-team classification of uploaders changes over time and is applied when read.
+    """
+
+    date = models.DateField(db_index=True)
+    produced_by_id = models.BigIntegerField(null=True)  # AuthoringTool
+    schema = models.CharField(max_length=255, null=True)
+    uploaded_by_id = models.BigIntegerField(null=True)  # User
+
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Daily Model Rollup"
+        verbose_name_plural = "Daily Model Rollups"
+        constraints = [
+            # one row per day and key, also when any of them is null
+            models.UniqueConstraint(
+                F("date"),
+                Coalesce("produced_by_id", Value(0), output_field=models.BigIntegerField()),
+                Coalesce("schema", Value("")),
+                Coalesce("uploaded_by_id", Value(0), output_field=models.BigIntegerField()),
+                name="unique_model_daily_rollup",
+            ),
+        ]
+
+
+class UploaderDailyRollup(models.Model):
+    """
+    Number of Validation Requests per day and uploader, to count distinct uploaders per period.
+    """
+
+    date = models.DateField(db_index=True)
+    user_id = models.BigIntegerField()
+
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Daily Uploader Rollup"
+        verbose_name_plural = "Daily Uploader Rollups"
+        constraints = [
+            models.UniqueConstraint(fields=["date", "user_id"], name="unique_uploader_daily_rollup"),
+        ]
+
+
+class ValidationBatch(models.Model):
+    """
+    Validation Requests submitted together (see submission.submit_batch), to poll their aggregate progress.
+    """
+
+    public_id = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    created = models.DateTimeField(auto_now_add=True)
+    created_by_id = models.BigIntegerField(db_index=True)  # User
+    request_ids = models.JSONField(default=list)  # ValidationRequest
+
+    class Meta:
+        verbose_name = "Validation Batch"
+        verbose_name_plural = "Validation Batches"
+
+
+class ChunkedUpload(models.Model):
+    """
+    A file uploaded in chunks (see chunked_upload), assembled into a Validation Request when complete.
+    """
+
+    public_id = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    created = models.DateTimeField(auto_now_add=True)
+    updated = models.DateTimeField(auto_now=True)
+    created_by_id = models.BigIntegerField(db_index=True)  # User
+
+    file_name = models.CharField(max_length=1024)
+    length = models.BigIntegerField()  # bytes, as announced by the client
+    offset = models.BigIntegerField(default=0)  # bytes received
+    request_id = models.BigIntegerField(null=True)  # ValidationRequest, once assembled
+
+    class Meta:
+        verbose_name = "Chunked Upload"
+        verbose_name_plural = "Chunked Uploads"
+
+
+class TaskResourceUsage(models.Model):
+    """
+    Resources consumed by the check subprocess of a Validation Task (see tasks.profiling).
+    """
+
+    created = models.DateTimeField(auto_now_add=True)
+    task_id = models.BigIntegerField(db_index=True)  # ValidationTask
+    request_id = models.BigIntegerField(db_index=True)  # ValidationRequest
+    task_type = models.CharField(max_length=32, db_index=True)
+    file_size = models.BigIntegerField(null=True)  # bytes
+
+    returncode = models.IntegerField(null=True)
+    wall_time = models.FloatField()  # seconds
+    user_cpu = models.FloatField()  # seconds
+    system_cpu = models.FloatField()  # seconds
+    peak_rss = models.BigIntegerField()  # bytes
+    read_bytes = models.BigIntegerField()  # bytes
+
+    class Meta:
+        verbose_name = "Task Resource Usage"
+        verbose_name_plural = "Task Resource Usage"
+
+
+class ReportSection(models.Model):
+    """
+    A materialized report section of a completed Validation Request (see report_cache), zlib-compressed JSON.
+    """
+
+    updated = models.DateTimeField(auto_now=True, db_index=True)
+    request_id = models.BigIntegerField()  # ValidationRequest
+    section = models.CharField(max_length=32)
+    generation = models.BigIntegerField()  # allowlist generation it was built with
+    content = models.BinaryField()
+
+    class Meta:
+        verbose_name = "Report Section"
+        verbose_name_plural = "Report Sections"
+        constraints = [
+            models.UniqueConstraint(fields=['request_id', 'section'], name='unique_report_section'),
+        ]
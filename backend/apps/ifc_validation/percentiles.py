@@ -0,0 +1,149 @@
+"""
+Percentiles of durations (queue time, task and request duration) for the admin charts (see chart_views).
+
+On PostgreSQL, percentiles are computed by the database with percentile_cont().
+Other backends have no ordered-set aggregates; there the database groups durations
+into logarithmic buckets (relative error < RELATIVE_ACCURACY) and only the bucket
+counts are read, from which percentiles are interpolated.
+Either way, no individual rows are fetched.
+"""
+
+import datetime
+import math
+
+from django.db import connections
+from django.db.models import Aggregate, Count, F, Value, DurationField, FloatField, ExpressionWrapper
+from django.db.models.functions import Floor, Greatest, Ln
+
+QUANTILES = (50, 90, 95, 99)
+
+RELATIVE_ACCURACY = 0.01
+GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+
+_VALUE = "_pct_value"
+_BUCKET = "_pct_bucket"
+_COUNT = "_pct_count"
+
+
+class PercentileCont(Aggregate):
+    """
+    PostgreSQL percentile_cont(fraction) WITHIN GROUP (ORDER BY expression).
+    """
+
+    function = "PERCENTILE_CONT"
+    name = "PercentileCont"
+    template = "%(function)s(%(fraction)s) WITHIN GROUP (ORDER BY %(expressions)s)"
+
+    def __init__(self, expression, fraction, **extra):
+        super().__init__(expression, fraction=float(fraction), **extra)
+
+
+class LogHistogram:
+    """
+    Histogram of positive values in buckets [GAMMA^i, GAMMA^(i+1)).
+    """
+
+    def __init__(self):
+        self.buckets = {}
+        self.count = 0
+
+    @staticmethod
+    def index(value):
+        return math.floor(math.log(max(value, 1)) / math.log(GAMMA))
+
+    @staticmethod
+    def value(index):
+        # midpoint of the bucket, within RELATIVE_ACCURACY of any value in it
+        return 2 * GAMMA ** (index + 1) / (GAMMA + 1)
+
+    def add(self, value, count=1):
+        self.add_bucket(self.index(value), count)
+
+    def add_bucket(self, index, count=1):
+        self.buckets[index] = self.buckets.get(index, 0) + count
+        self.count += count
+
+    def _value_at(self, rank, indices):
+        seen = 0
+        for i in indices:
+            seen += self.buckets[i]
+            if rank < seen:
+                return self.value(i)
+        return self.value(indices[-1])
+
+    def quantile(self, q):
+        """
+        Interpolated like percentile_cont(), 0 <= q <= 1.
+        """
+        if not self.count:
+            return None
+        indices = sorted(self.buckets)
+        k = q * (self.count - 1)
+        lower = self._value_at(math.floor(k), indices)
+        upper = self._value_at(math.ceil(k), indices)
+        return lower + (k - math.floor(k)) * (upper - lower)
+
+
+def _supports_percentile_cont(qs):
+    return connections[qs.db].vendor == "postgresql"
+
+
+def _group_key(row, by):
+    if not by:
+        return None
+    if len(by) == 1:
+        return row[by[0]]
+    return tuple(row[f] for f in by)
+
+
+def _percentile_cont(qs, by, quantiles):
+    rows = (qs
+        .values(*by)
+        .annotate(**{f"p{q}": PercentileCont(_VALUE, q / 100) for q in quantiles})
+        .order_by())
+
+    return {
+        _group_key(row, by): {q: row[f"p{q}"].total_seconds() for q in quantiles}
+        for row in rows
+    }
+
+
+def _histogram(qs, by, quantiles):
+    # temporal subtraction yields microseconds on backends without interval types
+    micros = ExpressionWrapper(F(_VALUE), output_field=FloatField())
+    rows = (qs
+        .annotate(**{_BUCKET: Floor(Ln(Greatest(micros, Value(1.0))) / Value(math.log(GAMMA)))})
+        .values(*by, _BUCKET)
+        .annotate(**{_COUNT: Count("*")})
+        .order_by())
+
+    histograms = {}
+    for row in rows:
+        key = _group_key(row, by)
+        histograms.setdefault(key, LogHistogram()).add_bucket(int(row[_BUCKET]), row[_COUNT])
+
+    return {
+        key: {q: histogram.quantile(q / 100) / 1e6 for q in quantiles}
+        for key, histogram in histograms.items()
+    }
+
+
+def duration_percentiles(qs, start, end, by=(), quantiles=QUANTILES):
+    """
+    Percentiles (in seconds) of the duration between the 'start' and 'end' fields of qs,
+    per distinct value of the 'by' fields (or tuple of values when multiple fields).
+
+    Rows without both fields or with a negative duration are ignored. Eg.
+
+        duration_percentiles(ValidationRequest.objects.all(), "created", "started")
+        -> {None: {50: 1.2, 90: 8.4, 95: 12.0, 99: 30.1}}
+    """
+    by = tuple(by)
+    qs = (qs
+        .filter(**{f"{start}__isnull": False, f"{end}__isnull": False})
+        .annotate(**{_VALUE: ExpressionWrapper(F(end) - F(start), output_field=DurationField())})
+        .filter(**{f"{_VALUE}__gte": datetime.timedelta(0)}))
+
+    if _supports_percentile_cont(qs):
+        return _percentile_cont(qs, by, quantiles)
+    return _histogram(qs, by, quantiles)
@@ -0,0 +1,70 @@
+"""
+Notifications about changed Validation Requests (progress, status), published on
+a Redis pub/sub channel per user. Messages only carry the id of the changed request;
+subscribers (see ifc_validation_bff.views_legacy.models_stream) load and format it.
+
+Each open stream occupies a web worker thread, so a user holds at most PROGRESS_STREAM_MAX_PER_USER
+of them at once. Open streams are kept in a sorted set per user (stream token -> expires at); the
+slot of a stream that was never iterated (and so never released) expires once it would have ended.
+"""
+
+import logging
+import time
+import uuid
+
+from core.redis_lock import redis_client
+from core.settings import PROGRESS_STREAM_HEARTBEAT, PROGRESS_STREAM_MAX_DURATION, PROGRESS_STREAM_MAX_PER_USER
+
+logger = logging.getLogger(__name__)
+
+_ACQUIRE_STREAM = """
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', ARGV[1])
+if redis.call('ZCARD', KEYS[1]) >= tonumber(ARGV[2]) then
+    return 0
+end
+redis.call('ZADD', KEYS[1], tonumber(ARGV[1]) + tonumber(ARGV[3]), ARGV[4])
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+return 1
+"""
+
+_acquire_stream_script = redis_client.register_script(_ACQUIRE_STREAM)
+
+
+def progress_channel(user_id):
+    return f"validation:progress:user:{user_id}"
+
+
+def publish_request_changed(request_id, user_id):
+    if request_id is None or user_id is None:
+        return
+    try:
+        redis_client.publish(progress_channel(user_id), request_id)
+    except Exception as err:
+        # push updates are best effort; clients fall back to polling
+        logger.warning(f"Could not publish update for request {request_id}: {err}")
+
+
+def streams_key(user_id):
+    return f"validation:progress:user:{user_id}:streams"
+
+
+def acquire_stream(user_id):
+    """
+    Returns the token of a new stream of the user, or None if the user has too many open streams.
+    """
+    token = uuid.uuid4().hex
+    # a stream ends after PROGRESS_STREAM_MAX_DURATION, plus the wait for its last message
+    ttl = PROGRESS_STREAM_MAX_DURATION + PROGRESS_STREAM_HEARTBEAT
+    acquired = _acquire_stream_script(
+        keys=[streams_key(user_id)],
+        args=[time.time(), PROGRESS_STREAM_MAX_PER_USER, ttl, token],
+    )
+    return token if acquired else None
+
+
+def release_stream(user_id, token):
+    try:
+        redis_client.zrem(streams_key(user_id), token)
+    except Exception as err:
+        # the slot expires
+        logger.warning(f"Could not release progress stream of user {user_id}: {err}")
@@ -0,0 +1,94 @@
+"""
+Materialized report sections of completed Validation Requests.
+
+Each section (see ifc_validation_bff.report) is stored once as zlib-compressed JSON in the
+ReportSection table, with the allowlist generation it was built with. Allowlisting
+(WhiteListEntry) changes the severity of outcomes when they are read, so any change to the
+allowlist bumps the generation and makes all materialized sections stale at once.
+
+Only the generation counter is kept in Redis. It starts from a timestamp, so a counter that
+was lost (e.g. a flushed broker) never returns to a generation that sections were built with.
+Sections are removed REPORT_CACHE_TTL after they were stored (see remove_expired_sections).
+"""
+
+import time
+import zlib
+import logging
+from datetime import timedelta
+
+from django.utils import timezone
+
+from core.redis_lock import redis_client
+from core.settings import REPORT_CACHE_TTL
+
+from .models import ReportSection
+
+logger = logging.getLogger(__name__)
+
+ALLOWLIST_GENERATION_KEY = "validation:report:allowlist-generation"
+
+
+def allowlist_generation():
+    generation = redis_client.get(ALLOWLIST_GENERATION_KEY)
+    if generation is None:
+        redis_client.set(ALLOWLIST_GENERATION_KEY, time.time_ns() // 1000, nx=True)
+        generation = redis_client.get(ALLOWLIST_GENERATION_KEY)
+    return int(generation)
+
+
+def bump_allowlist_generation():
+    try:
+        allowlist_generation()
+        redis_client.incr(ALLOWLIST_GENERATION_KEY)
+    except Exception as err:
+        logger.warning(f"Could not invalidate materialized reports: {err}")
+
+
+def get_section(request_id, section):
+    """
+    Returns the (uncompressed) JSON bytes of a materialized section,
+    or None if it was not materialized for the current allowlist generation.
+    """
+    try:
+        content = ReportSection.objects.filter(
+            request_id=request_id, section=section, generation=allowlist_generation()
+        ).values_list('content', flat=True).first()
+    except Exception as err:
+        logger.warning(f"Materialized report not available for request {request_id}: {err}")
+        return None
+
+    if content is None:
+        return None
+    return zlib.decompress(content)
+
+
+def store_section(request_id, section, content, generation):
+    """
+    Stores the JSON bytes of a section; 'generation' is the allowlist generation read before it was built.
+    """
+    try:
+        ReportSection.objects.update_or_create(
+            request_id=request_id,
+            section=section,
+            defaults={'generation': generation, 'content': zlib.compress(content)},
+        )
+    except Exception as err:
+        logger.warning(f"Could not materialize report section '{section}' of request {request_id}: {err}")
+
+
+def invalidate(request_id):
+    try:
+        ReportSection.objects.filter(request_id=request_id).delete()
+    except Exception as err:
+        logger.warning(f"Could not invalidate materialized report of request {request_id}: {err}")
+
+
+def remove_expired_sections(dry_run=False):
+    """
+    Removes sections stored more than REPORT_CACHE_TTL ago; they are built again when read.
+    Returns the number of sections removed.
+    """
+    expired = ReportSection.objects.filter(updated__lt=timezone.now() - timedelta(seconds=REPORT_CACHE_TTL))
+    if dry_run:
+        return expired.count()
+    return expired.delete()[0]
@@ -0,0 +1,58 @@
+import logging
+
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from apps.ifc_validation_models.models import ValidationRequest, ValidationTask, Model
+from apps.ifc_validation_models.models import WhiteListEntry, WhiteListQueryFragment
+
+from .progress_events import publish_request_changed
+from .report_cache import bump_allowlist_generation
+from .header_preview import header_available
+from . import header_preview
+
+logger = logging.getLogger(__name__)
+
+
+@receiver(post_save, sender=ValidationRequest)
+def on_request_saved(sender, instance, **kwargs):
+    # status transitions (mark_as_*), uploads and (soft) deletes
+    request_id, user_id = instance.id, instance.created_by_id
+    transaction.on_commit(lambda: publish_request_changed(request_id, user_id))
+
+
+@receiver(post_save, sender=ValidationTask)
+def on_task_saved(sender, instance, **kwargs):
+    # task transitions change the calculated status cells of a request;
+    # only its owner is needed, not the request itself (tasks are saved often)
+    request_id = instance.request_id
+    def publish():
+        user_id = ValidationRequest.objects.filter(pk=request_id).values_list('created_by_id', flat=True).first()
+        publish_request_changed(request_id, user_id)
+    transaction.on_commit(publish)
+
+
+@receiver(post_save, sender=Model)
+def on_model_saved(sender, instance, **kwargs):
+    # processing results (status_* fields, header info, ...)
+    def publish():
+        for request_id, user_id in ValidationRequest.objects.filter(model_id=instance.id).values_list('id', 'created_by_id'):
+            publish_request_changed(request_id, user_id)
+    transaction.on_commit(publish)
+
+
+@receiver([post_save, post_delete], sender=WhiteListEntry)
+@receiver([post_save, post_delete], sender=WhiteListQueryFragment)
+def on_allowlist_changed(sender, instance, **kwargs):
+    # allowlisting changes severities of stored outcomes; materialized reports are stale
+    transaction.on_commit(bump_allowlist_generation)
+
+
+@receiver(header_available)
+def on_header_available(sender, key, header, **kwargs):
+    # the upload is still streaming; a failing preview must not fail it
+    try:
+        header_preview.start(key, header)
+    except Exception as err:
+        logger.warning(f"Could not start header preview {key}: {err}")
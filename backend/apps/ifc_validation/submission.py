@@ -0,0 +1,83 @@
+"""
+Submission of multiple files at once.
+
+All Validation Requests of a batch are inserted with a single bulk_create and all
+workflows are published together as a Celery group once the transaction commits.
+"""
+
+import logging
+
+from celery import group
+from django.db import transaction
+from django.db.models import Avg, Count
+from django.db.models.signals import post_save
+
+from apps.ifc_validation_models.models import ValidationRequest
+
+from core.settings import MAX_FILES_PER_UPLOAD
+
+from .models import ValidationBatch
+from .tasks import ifc_file_validation_task
+
+logger = logging.getLogger(__name__)
+
+
+def collect_files(files):
+    """
+    Uploaded files, POST-ed as file, file[0], file[1], ...
+    """
+    collected = files.getlist('file')
+    for i in range(0, MAX_FILES_PER_UPLOAD):
+        collected += files.getlist(f'file[{i}]', [])
+    return collected
+
+
+def submit_batch(user, files, channel, force=False):
+    """
+    Stores the files as Validation Requests of a new batch and queues their validation.
+    """
+    with transaction.atomic():
+
+        requests = ValidationRequest.objects.bulk_create([
+            ValidationRequest(
+                file=f,
+                file_name=f.name,
+                size=f.size,
+                channel=channel,
+                created_by=user,
+                updated_by=user,
+            ) for f in files
+        ])
+
+        # bulk_create doesn't send signals (progress events, chart cache)
+        for instance in requests:
+            post_save.send(sender=ValidationRequest, instance=instance, created=True, raw=False, using=instance._state.db, update_fields=None)
+
+        batch = ValidationBatch.objects.create(created_by_id=user.id, request_ids=[r.id for r in requests])
+
+        workflows = group(ifc_file_validation_task.s(r.id, r.file_name, force=force) for r in requests)
+        transaction.on_commit(lambda: workflows.apply_async())
+
+    logger.info(f"Batch {batch.public_id} submitted with {len(requests)} file(s), {sum(f.size for f in files):,} bytes")
+    return batch, requests
+
+
+def batch_progress(batch):
+    """
+    Aggregate status and progress of the (non-deleted) Validation Requests of a batch.
+    """
+    qs = ValidationRequest.objects.filter(id__in=batch.request_ids, deleted=False)
+
+    status = {row['status']: row['count'] for row in qs.values('status').annotate(count=Count('id')).order_by()}
+    total = sum(status.values())
+    finished = status.get(ValidationRequest.Status.COMPLETED, 0) + status.get(ValidationRequest.Status.FAILED, 0)
+
+    return {
+        "batch_id": str(batch.public_id),
+        "created": batch.created,
+        "total": total,
+        "status": status,
+        "progress": round(qs.aggregate(progress=Avg('progress'))['progress'] or 0),
+        "finished": total > 0 and finished == total,
+        "requests": [ValidationRequest.to_public_id(id) for id in qs.values_list('id', flat=True).order_by('id')],
+    }
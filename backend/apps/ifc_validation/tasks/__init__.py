@@ -13,6 +13,7 @@ from .task_runner import (
     normative_rules_ip_validation_subtask, 
     bsdd_validation_subtask,
     industry_practices_subtask, 
+    gherkin_rules_fused_subtask,
     instance_completion_subtask,
     magic_clamav_subtask
 )
@@ -28,6 +29,7 @@ __all__ = [
     "normative_rules_ia_validation_subtask",
     "normative_rules_ip_validation_subtask",
     "industry_practices_subtask",
+    "gherkin_rules_fused_subtask",
     "instance_completion_subtask",
     "magic_clamav_subtask"
 ]
\ No newline at end of file
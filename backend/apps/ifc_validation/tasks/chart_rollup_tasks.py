@@ -0,0 +1,14 @@
+from celery import shared_task
+from celery.utils.log import get_task_logger
+from django.core.management import call_command
+
+from core.utils import log_execution
+
+
+logger = get_task_logger(__name__)
+
+
+@shared_task(bind=True)
+@log_execution
+def refresh_chart_rollups(self, *args, **kwargs):
+    call_command("refresh_chart_rollups", **kwargs)
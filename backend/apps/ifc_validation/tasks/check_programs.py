@@ -2,20 +2,27 @@ import os
 import sys
 import json
 import shutil
+import contextlib
+import signal
+import socket
+import threading
 import subprocess
-from typing import List
+from typing import List, Iterator
 from dataclasses import dataclass
 
 # pip install filetype
 import filetype
 from filetype.types import archive
 
-from apps.ifc_validation_models.settings import TASK_TIMEOUT_LIMIT
 from apps.ifc_validation_models.models import ValidationTask
-from core.settings import MAX_FILE_SIZE_IN_MB, MAX_OUTCOMES_PER_RULE
+from core.settings import MAX_FILE_SIZE_IN_MB, MAX_OUTCOMES_PER_RULE, CHECK_DAEMON_SOCKET
+
+from apps.ifc_validation.metrics import record_resource_usage
+from apps.ifc_validation.checks.header_policy import analyze_header
 
 from .logger import logger
 from .context import TaskContext
+from .profiling import ResourceProfiler
 
 @dataclass
 class proc_output:
@@ -25,8 +32,10 @@ class proc_output:
     args: List[str]
 
 
-def run_subprocess_wait(*popen_args, check=False, **popen_kwargs):
+def run_subprocess_wait(*popen_args, check=False, profiler=None, **popen_kwargs):
     process = subprocess.Popen(*popen_args, **popen_kwargs)
+    if profiler is not None:
+        profiler.start(process.pid)
     out_chunks, err_chunks = [], []
     try:
         while True:
@@ -37,6 +46,8 @@ def run_subprocess_wait(*popen_args, check=False, **popen_kwargs):
                 break
             except subprocess.TimeoutExpired:
                 # keep looping; you can also check your own stop conditions here
+                if profiler is not None:
+                    profiler.sample()
                 continue
     except BaseException as e:
         process.terminate()
@@ -46,6 +57,9 @@ def run_subprocess_wait(*popen_args, check=False, **popen_kwargs):
             process.kill()
             process.wait()
         raise
+    finally:
+        if profiler is not None:
+            profiler.stop()
     retcode = process.returncode
     stdout, stderr = "".join(out_chunks), "".join(err_chunks)
     if check and retcode != 0:
@@ -53,6 +67,129 @@ def run_subprocess_wait(*popen_args, check=False, **popen_kwargs):
     return proc_output(retcode, stdout, stderr, popen_args[0] if popen_args else [])
 
 
+class proc_stream:
+    """
+    Yields parsed JSON records from the stdout of a running subprocess, line by line.
+    Lines that are not valid JSON are skipped. stderr is drained on a background thread;
+    'returncode' and 'stderr' are available once the stream is exhausted.
+    With a profiler, on_finished(usage, returncode) is called once the process exited.
+    """
+
+    def __init__(self, args, profiler=None, on_finished=None, **popen_kwargs):
+        self.args = args
+        self.returncode = None
+        self.stderr = None
+        self.count = 0
+        self._profiler = profiler
+        self._on_finished = on_finished
+        self._finished = False
+        self._process = subprocess.Popen(
+            args, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, bufsize=1, **popen_kwargs
+        )
+        if profiler is not None:
+            profiler.start(self._process.pid)
+            profiler.sample_in_background()
+        self._err_chunks = []
+        self._err_reader = threading.Thread(
+            target=lambda: self._err_chunks.extend(self._process.stderr), daemon=True
+        )
+        self._err_reader.start()
+
+    def __iter__(self) -> Iterator[dict]:
+        process = self._process
+        try:
+            for line in process.stdout:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                self.count += 1
+                yield record
+            process.wait()
+        except BaseException:
+            # includes GeneratorExit when the consumer stops early
+            self.close()
+            raise
+        finally:
+            self._finish()
+
+    def close(self):
+        process = self._process
+        if process.poll() is None:
+            process.terminate()
+            try:
+                process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+        self._finish()
+
+    def _finish(self):
+        self._err_reader.join(timeout=5)
+        self.returncode = self._process.returncode
+        self.stderr = "".join(self._err_chunks)
+        if self._profiler is not None and not self._finished:
+            self._finished = True
+            usage = self._profiler.stop()
+            if self._on_finished:
+                self._on_finished(usage, self.returncode)
+
+
+def _recv_exactly(sock_file, size):
+    data = sock_file.read(size)
+    if data is None or len(data) != size:
+        raise ConnectionError("Check daemon closed the connection prematurely")
+    return data
+
+
+def run_in_check_daemon(command, socket_path, env=None, on_started=None, profiler=None):
+    """
+    Executes a Python check program in the warm check daemon (see checks/check_daemon.py).
+    Returns None when the daemon is not available, so callers can fall back to a subprocess.
+    The forked check is sampled by the profiler, if any, and reports its own CPU time and peak RSS.
+    """
+    if not socket_path or not command or command[0] != sys.executable or len(command) < 2:
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(socket_path)
+    except OSError:
+        sock.close()
+        return None
+
+    pid = None
+    try:
+        with sock, sock.makefile('rwb') as f:
+            request = {'argv': command[1:], 'cwd': os.getcwd(), 'env': env if env is not None else os.environ.copy()}
+            f.write(json.dumps(request).encode('utf-8') + b'\n')
+            f.flush()
+            pid = json.loads(f.readline())['pid']
+            if profiler is not None:
+                profiler.start(pid, child=False)
+                profiler.sample_in_background()
+            if on_started:
+                on_started(pid)
+            result = json.loads(f.readline())
+            returncode = result['returncode']
+            if profiler is not None:
+                profiler.stop(rusage=result.get('rusage'))
+            stdout, stderr = (
+                _recv_exactly(f, int.from_bytes(_recv_exactly(f, 8), 'big')).decode('utf-8', errors='replace')
+                for _ in range(2)
+            )
+    except BaseException:
+        if profiler is not None:
+            profiler.stop()
+        # terminate the forked check when the task times out or is revoked
+        if pid is not None:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except OSError:
+                pass
+        raise
+    return proc_output(returncode, stdout, stderr, command)
+
+
 checks_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "checks"))
 
 
@@ -70,55 +207,28 @@ def check_syntax(context:TaskContext):
 
 
 def check_header_syntax(context:TaskContext):
-    proc = run_subprocess(context.task, [sys.executable, "-m", "ifcopenshell.simple_spf", "--json", "--only-header", context.file_path])
-    output = proc.stdout 
-    error_output = proc.stderr
-    success = (len(list(filter(None, output.split("\n")))) == 0) and len(error_output) == 0
-    context.result = {
-        'output': proc.stdout, 
-        'error_output': proc.stderr, 
-        'success': success
-    }
+    # in-process and cached per file, so check_header() reuses the same parse when it runs in this worker
+    with profile_in_process(context.task):
+        context.result, _ = analyze_header.analyze_file(context.file_path)
     return context
 
 
-def is_schema_error(line):
-    try:
-        json.loads(line)
-    except ValueError:
-        return False 
-    return True
-
-
 def check_schema(context:TaskContext):
-    proc = run_subprocess(
+    # errors are consumed while ifcopenshell.validate is still running;
+    # success and validity are only known once the stream is exhausted
+    stream = run_subprocess_stream(
         task = context.task, 
         command = [sys.executable, "-m", "ifcopenshell.validate", "--json", "--rules", "--fields", "--recursion-limit", "10000", context.file_path]
     )
-    output = list(filter(is_schema_error, proc.stdout.split("\n")))
-    success = proc.returncode >= 0
-    valid = len(output) == 0
-    
     context.result =  {
-        'output': output,
-        'success': success, 
-        'valid': valid
+        'output': stream,
     }
     return context
     
     
 def check_header(context:TaskContext):
-    proc = run_subprocess(
-        task=context.task,
-        command=[sys.executable, os.path.join(checks_dir, "header_policy", "validate_header.py"), context.file_path] 
-    )
-    header_validation = {}
-    for line in proc.stdout.splitlines():
-        try:
-            header_validation = json.loads(line)
-        except json.JSONDecodeError:
-            continue 
-    context.result = header_validation
+    with profile_in_process(context.task):
+        _, context.result = analyze_header.analyze_file(context.file_path)
     return context
 
 
@@ -203,7 +313,7 @@ def check_digital_signatures(context:TaskContext):
 def check_bsdd(context:TaskContext):
     proc = run_subprocess(
         task=context.task, 
-        command=[sys.executable, os.path.join(checks_dir, "check_bsdd.py"), "-file-name", context.file_path, "--task-id", str(context.task.id) ]
+        command=[sys.executable, os.path.join(checks_dir, "check_bsdd.py"), "--file-name", context.file_path, "--task-id", str(context.task.id) ]
     )
     raw_output = check_proc_success_or_fail(proc, context.task) 
     logger.info(f'Output for {context.config.type}: {raw_output}')
@@ -280,6 +390,51 @@ def check_industry_practices(context:TaskContext):
     return context
 
 
+def check_gherkin_fused(contexts:List[TaskContext]):
+    """
+    Runs the gherkin rule types of several tasks in a single process and a single parse of the file.
+    Each context gets its own result; contexts whose rule type failed get result None.
+    """
+    rule_types = [GHERKIN_RULE_TYPES[context.config.type] for context in contexts]
+    command = [
+        sys.executable,
+        os.path.join(checks_dir, "check_gherkin.py"),
+        "--file-name", contexts[0].file_path,
+        "--task-id", ",".join(str(context.task.id) for context in contexts),
+        "--rule-type", ",".join(rule_types),
+        "--max-outcomes", str(MAX_OUTCOMES_PER_RULE),
+    ]
+    for context in contexts[1:]:
+        context.task.set_process_details(None, command)
+    proc = run_subprocess(task=contexts[0].task, command=command)
+
+    succeeded = set()
+    for line in proc.stdout.splitlines():
+        try:
+            summary = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        if isinstance(summary, dict) and summary.get('success'):
+            succeeded.add(summary.get('rule_type'))
+
+    for context, rule_type in zip(contexts, rule_types):
+        if rule_type in succeeded:
+            context.result = proc.stdout
+        else:
+            context.result = None
+            context.task.mark_as_failed(
+                f"Rule type {rule_type} failed in fused execution (exit code {proc.returncode})\n{proc.stderr}"
+            )
+    return contexts
+
+
+GHERKIN_RULE_TYPES = {
+    ValidationTask.Type.NORMATIVE_IA: "IMPLEMENTER_AGREEMENT",
+    ValidationTask.Type.NORMATIVE_IP: "INFORMAL_PROPOSITION",
+    ValidationTask.Type.INDUSTRY_PRACTICES: "INDUSTRY_PRACTICE",
+}
+
+
 def check_instance_completion(context:TaskContext):
     return context
 
@@ -302,17 +457,72 @@ def run_subprocess(
     logger.debug(f'Command for {task.type}: {" ".join(command)}')
     task.set_process_details(None, command)
     try:
-        proc = run_subprocess_wait(
+        profiler = ResourceProfiler()
+        proc = run_in_check_daemon(
             command,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            env= os.environ.copy()
+            CHECK_DAEMON_SOCKET,
+            env=os.environ.copy(),
+            on_started=lambda pid: task.set_process_details(pid, command),
+            profiler=profiler
         )
-        logger.info(f'test run task task name {task.type}, task value : {task}')
+        in_daemon = proc is not None
+        if not in_daemon:
+            profiler = ResourceProfiler()
+            proc = run_subprocess_wait(
+                command,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                env= os.environ.copy(),
+                profiler=profiler
+            )
+        logger.info(f"Ran {task.type} for task {task.id} {'in the check daemon' if in_daemon else 'as a subprocess'} (exit code {proc.returncode})")
+        record_usage(task, profiler.usage, proc.returncode)
         return proc
     
     except Exception as err:
         logger.exception(f"{type(err).__name__} in task {task.id} : {task.type}")
         task.mark_as_failed(str(err))
-        raise type(err)(f"Unknown error during validation task {task.id}: {task.type}") from err
\ No newline at end of file
+        raise type(err)(f"Unknown error during validation task {task.id}: {task.type}") from err
+
+def run_subprocess_stream(
+    task: ValidationTask,
+    command: List[str],
+) -> proc_stream:
+    logger.debug(f'Command for {task.type}: {" ".join(command)}')
+    task.set_process_details(None, command)
+    try:
+        return proc_stream(
+            command,
+            env=os.environ.copy(),
+            profiler=ResourceProfiler(),
+            on_finished=lambda usage, returncode: record_usage(task, usage, returncode)
+        )
+    
+    except Exception as err:
+        logger.exception(f"{type(err).__name__} in task {task.id} : {task.type}")
+        task.mark_as_failed(str(err))
+        raise type(err)(f"Unknown error during validation task {task.id}: {task.type}") from err
+
+
+def record_usage(task, usage, returncode):
+    # profiling must never fail a check
+    try:
+        record_resource_usage(task, usage, returncode)
+    except Exception as err:
+        logger.warning(f"Could not record resource usage of task {task.id}: {err}")
+
+
+@contextlib.contextmanager
+def profile_in_process(task):
+    """
+    Records the resources used by a check that runs in this worker process, e.g. the header checks.
+    """
+    profiler = ResourceProfiler()
+    profiler.start(os.getpid(), in_process=True)
+    returncode = 1
+    try:
+        yield
+        returncode = 0
+    finally:
+        record_usage(task, profiler.stop(), returncode)
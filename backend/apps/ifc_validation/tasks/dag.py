@@ -0,0 +1,109 @@
+"""
+Validation workflow as a dependency graph, derived from the task registry.
+
+A task depends on its blockers (TaskConfig.blocks) and tasks of the 'final' stage depend on all
+tasks of the 'parallel' stage, as they complete the outcomes written by those. Each task is sent
+to the workers as soon as all of its dependencies have completed, so eg. the header policy check
+overlaps with schema, signatures and the rules checks. When several tasks become ready at once,
+those on the longest remaining (critical) path are sent first.
+
+Progress of a running workflow is kept in Redis: a counter of unfinished dependencies per task.
+"""
+
+import functools
+
+from core.redis_lock import redis_client
+
+from .configs import task_registry
+
+STATE_TTL = 7 * 24 * 3600  # 7 days
+REMAINING = "__remaining__"
+
+
+def node_of(task_type):
+    return str(task_type)
+
+
+def build_dag(task_types, fused=None):
+    """
+    Returns {node: set of nodes it depends on} for the given task types.
+    'fused' maps a node name to the task types that run as a single task.
+    """
+    fused = fused or {}
+    node_by_type = {node_of(t): node_of(t) for t in task_types}
+    for node, types in fused.items():
+        for t in types:
+            node_by_type[node_of(t)] = node
+
+    final = [t for t in task_types if task_registry[t].execution_stage == "final"]
+    parallel = [t for t in task_types if task_registry[t].execution_stage == "parallel"]
+
+    dag = {node: set() for node in node_by_type.values()}
+    for t in task_types:
+        node = node_by_type[node_of(t)]
+        dependencies = [b for b in task_registry.get_blockers_of(t) if node_of(b) in node_by_type]
+        if t in final:
+            dependencies += parallel
+        dag[node].update(node_by_type[node_of(d)] for d in dependencies)
+        dag[node].discard(node)
+    return dag
+
+
+def dependents_of(dag):
+    dependents = {node: set() for node in dag}
+    for node, dependencies in dag.items():
+        for dependency in dependencies:
+            dependents[dependency].add(node)
+    return dependents
+
+
+def critical_path_lengths(dag, cost):
+    """
+    Length of the longest path from each node to the end of the workflow, including the node itself.
+    """
+    dependents = dependents_of(dag)
+
+    @functools.cache
+    def length(node):
+        return cost(node) + max((length(d) for d in dependents[node]), default=0)
+
+    return {node: length(node) for node in dag}
+
+
+class WorkflowDag:
+
+    def __init__(self, dag, cost):
+        self.dag = dag
+        self.dependents = dependents_of(dag)
+        self.priority = critical_path_lengths(dag, cost)
+
+    def by_priority(self, nodes):
+        return sorted(nodes, key=lambda n: (-self.priority[n], n))
+
+    def start(self, id):
+        """
+        Initializes the state of a workflow; returns the nodes that can start right away.
+        """
+        key = f"validation:workflow:{id}"
+        with redis_client.pipeline() as pipe:
+            pipe.delete(key, f"{key}:done")
+            pipe.hset(key, mapping={**{node: len(deps) for node, deps in self.dag.items()}, REMAINING: len(self.dag)})
+            pipe.expire(key, STATE_TTL)
+            pipe.execute()
+        return self.by_priority(node for node, deps in self.dag.items() if not deps)
+
+    def complete(self, id, node):
+        """
+        Marks a node as completed; returns the nodes that became ready and whether the workflow is done.
+        """
+        key = f"validation:workflow:{id}"
+        # a redelivered callback must not count twice
+        if not redis_client.sadd(f"{key}:done", node):
+            return [], False
+        redis_client.expire(f"{key}:done", STATE_TTL)
+
+        ready = [d for d in self.dependents[node] if redis_client.hincrby(key, d, -1) == 0]
+        done = redis_client.hincrby(key, REMAINING, -1) == 0
+        if done:
+            redis_client.delete(key, f"{key}:done")
+        return self.by_priority(ready), done
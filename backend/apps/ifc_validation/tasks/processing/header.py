@@ -80,7 +80,7 @@ def process_header(context:TaskContext):
                         
         # update header validation
         model.header_validation = header_validation
-        model.save(update_fields=['status_header', 'header_validation']) 
-        model.save()
+        # only the fields set here: checks running alongside HEADER update other status fields of the same row
+        model.save(update_fields=['status_header', 'header_validation', 'size', 'schema', 'date', 'mvd', 'produced_by'])
         
         return f'agg_status = {Model.Status(agg_status).label}\nraw_output = {header_validation}'
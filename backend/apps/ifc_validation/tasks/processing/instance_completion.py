@@ -1,12 +1,14 @@
 import json
+import itertools
 import subprocess
 import sys
 import textwrap
-from typing import Any
-import ifcopenshell
+import threading
+from typing import Any, Iterable, Iterator
 from .. import TaskContext, logger
 
-from apps.ifc_validation_models.models import ModelInstance
+from core.settings import DJANGO_DB_BULK_CREATE_BATCH_SIZE
+from apps.ifc_validation_models.models import ModelInstance, ValidationTask
 
 from django.db import transaction
 
@@ -18,8 +20,7 @@ _completion_script_str = textwrap.dedent(
     import itertools
     import functools
 
-    file_path, step_ids = json.load(sys.stdin)
-    ifc_file = ifcopenshell.open(file_path)
+    ifc_file = ifcopenshell.open(sys.argv[1])
     def filter_serializable(v):
         def inner(k, v):
             if k == "type":
@@ -31,39 +32,94 @@ _completion_script_str = textwrap.dedent(
             if v:
                 return k, v
         return dict(filter(None, itertools.starmap(inner, v.items())))
-    json.dump([(ifc_file[step_id].is_a(), filter_serializable(ifc_file[step_id].get_info(include_identifier=False))) for step_id in step_ids], sys.stdout)
+    # step ids are streamed in, one per line; one json line per instance is streamed out
+    for line in sys.stdin:
+        step_id = int(line)
+        inst = ifc_file[step_id]
+        print(json.dumps([step_id, inst.is_a(), filter_serializable(inst.get_info(include_identifier=False))]))
     """
 )
 
 
-def _obtain_ifc_types_and_args(file_path: str, step_ids: list[int]) -> list[tuple[str, dict[str, Any]]]:
-    proc = subprocess.run(
-        [sys.executable, "-u", "-c", _completion_script_str],
-        input=json.dumps([file_path, step_ids]),
-        capture_output=True,
+def _iter_ifc_types_and_args(file_path: str, step_ids: Iterable[int]) -> Iterator[tuple[int, str, dict[str, Any]]]:
+    """
+    Yields (step id, ifc type, attributes) for each step id, while the subprocess is still running.
+    """
+    proc = subprocess.Popen(
+        [sys.executable, "-u", "-c", _completion_script_str, file_path],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
         text=True,
+        bufsize=1,
     )
+
+    def feed():
+        try:
+            for step_id in step_ids:
+                proc.stdin.write(f"{step_id}\n")
+        except BrokenPipeError:
+            pass # subprocess failed, reported below
+        finally:
+            try:
+                proc.stdin.close()
+            except BrokenPipeError:
+                pass
+
+    err_chunks = []
+    threads = [
+        threading.Thread(target=feed, daemon=True),
+        threading.Thread(target=lambda: err_chunks.extend(proc.stderr), daemon=True),
+    ]
+    for t in threads:
+        t.start()
+    try:
+        for line in proc.stdout:
+            yield tuple(json.loads(line))
+        proc.wait()
+    except BaseException:
+        proc.kill()
+        proc.wait()
+        raise
+    finally:
+        for t in threads:
+            t.join(timeout=5)
+
     if proc.returncode != 0:
-        logger.error(proc.stderr)
+        logger.error("".join(err_chunks))
         raise RuntimeError(f"Subprocess exited with code {proc.returncode}")
-    return json.loads(proc.stdout)
 
 
 def process_instance_completion(context:TaskContext):
     # the current task doesn't have any execution layer and links instance ids to outcomes
     model_id = context.request.model.id
     model_instances = ModelInstance.objects.filter(model_id=model_id, ifc_type__in=[None, ''])
-    instance_count = model_instances.count()
+    pk_by_step_id = dict(model_instances.values_list("stepfile_id", "id"))
+    instance_count = len(pk_by_step_id)
     logger.info(f'Retrieved {instance_count:,} ModelInstance record(s)')
+    if not instance_count:
+        # no need to open the file
+        return f'Updated {instance_count:,} ModelInstance record(s)'
 
-    step_ids = list(
-        model_instances.values_list("stepfile_id", flat=True)
-    )
-    step_id_to_type_and_attrs = dict(zip(step_ids, _obtain_ifc_types_and_args(context.file_path, step_ids)))
-
-    with transaction.atomic():
-        for inst in model_instances.iterator():
-            inst.ifc_type, inst.fields = step_id_to_type_and_attrs[inst.stepfile_id]
-            inst.save()
+    # one transaction per chunk, so progress is visible while the task runs; should the task fail,
+    # completed chunks are kept and only the remaining instances (without ifc_type) are completed on a retry
+    updated = 0
+    for chunk in _chunked(_iter_ifc_types_and_args(context.file_path, pk_by_step_id.keys()), DJANGO_DB_BULK_CREATE_BATCH_SIZE):
+        updated += len(chunk)
+        progress = int(100 * updated / instance_count)
+        with transaction.atomic():
+            ModelInstance.objects.bulk_update(
+                [ModelInstance(id=pk_by_step_id[step_id], ifc_type=ifc_type, fields=fields) for step_id, ifc_type, fields in chunk],
+                ['ifc_type', 'fields'],
+                batch_size=DJANGO_DB_BULK_CREATE_BATCH_SIZE
+            )
+            ValidationTask.objects.filter(pk=context.task.id).update(progress=progress)
+        logger.info(f'Updated {updated:,} of {instance_count:,} ModelInstance record(s) ({progress}%)')
 
     return f'Updated {instance_count:,} ModelInstance record(s)'
+
+
+def _chunked(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(itertools.islice(iterator, size)):
+        yield chunk
@@ -0,0 +1,63 @@
+from core.settings import DJANGO_DB_BULK_CREATE_BATCH_SIZE
+
+from apps.ifc_validation_models.models import ModelInstance, ValidationOutcome
+
+# reverse lookups of choice labels, e.g. 'Error' -> ValidationOutcome.OutcomeSeverity.ERROR
+SEVERITY_BY_LABEL = {label: value for value, label in ValidationOutcome.OutcomeSeverity.choices}
+OUTCOME_CODE_BY_LABEL = {label: value for value, label in ValidationOutcome.ValidationOutcomeCode.choices}
+
+
+class OutcomeWriter:
+    """
+    Collects the ValidationOutcomes of a task, and the ModelInstances they refer to,
+    and writes them with bulk_create in batches of DJANGO_DB_BULK_CREATE_BATCH_SIZE.
+
+    Usage:
+        with OutcomeWriter(task, model) as writer:
+            writer.add(severity=..., outcome_code=..., observed=..., stepfile_id=5, ifc_type='IfcWall')
+    """
+
+    def __init__(self, task, model=None, batch_size=DJANGO_DB_BULK_CREATE_BATCH_SIZE):
+        self.task = task
+        self.model = model
+        self.batch_size = batch_size
+        self.count = 0
+        self._outcomes = []
+        self._stepfile_ids = []
+        self._instances = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.flush()
+
+    def add(self, stepfile_id=None, ifc_type=None, **fields):
+        self._outcomes.append(ValidationOutcome(validation_task=self.task, **fields))
+        self._stepfile_ids.append(stepfile_id)
+        if stepfile_id is not None and stepfile_id not in self._instances:
+            instance = ModelInstance(stepfile_id=stepfile_id, model=self.model)
+            if ifc_type is not None:
+                instance.ifc_type = ifc_type
+            self._instances[stepfile_id] = instance
+        self.count += 1
+        if len(self._outcomes) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self._outcomes:
+            return
+
+        if self._instances:
+            ModelInstance.objects.bulk_create(self._instances.values(), batch_size=self.batch_size, ignore_conflicts=True) # ignore existing
+            instance_ids = dict(ModelInstance.objects.filter(
+                model_id=self.model.id,
+                stepfile_id__in=self._instances.keys()
+            ).values_list('stepfile_id', 'id'))
+            for outcome, stepfile_id in zip(self._outcomes, self._stepfile_ids):
+                if stepfile_id is not None:
+                    outcome.instance_id = instance_ids.get(stepfile_id)
+
+        ValidationOutcome.objects.bulk_create(self._outcomes, batch_size=self.batch_size)
+        self._outcomes, self._stepfile_ids, self._instances = [], [], {}
@@ -1,35 +1,24 @@
 import json
-from django.db import transaction 
 
-from core.settings import DJANGO_DB_BULK_CREATE_BATCH_SIZE
-
-from apps.ifc_validation_models.models import ModelInstance, Model, ValidationOutcome
-from .. import TaskContext, logger, with_model
+from apps.ifc_validation_models.models import Model, ValidationOutcome
+from .. import TaskContext, with_model
+from .outcome_writer import OutcomeWriter
 
 
 def process_schema(context:TaskContext):
-    output, success, valid = (context.result.get(k) for k in ("output", "success", "valid"))
+    output = context.result.get("output")
 
     with with_model(context.request.id) as model:
 
-        if valid:
-            setattr(model, context.config.status_field.name, Model.Status.VALID)
-            context.task.outcomes.create(
-                severity=ValidationOutcome.OutcomeSeverity.PASSED,
-                outcome_code=ValidationOutcome.ValidationOutcomeCode.PASSED,
-                observed=None
-            )
-        else:
-            model.status_schema = Model.Status.INVALID
-            outcomes_to_save = list()
-            outcomes_instances_to_save = list()
-
-            for line in output:
-                message = json.loads(line)
+        # write errors in batches while 'ifcopenshell.validate' is still producing them
+        with OutcomeWriter(context.task, model) as writer:
+            for message in output:
                 if message["level"] == "info":
                     # This currently only happens due to caught RecursionErrors in rule executor
                     continue
-                outcome = ValidationOutcome(
+                instance = message.get('instance')
+                has_instance = instance is not None and 'id' in instance and 'type' in instance
+                writer.add(
                     severity=ValidationOutcome.OutcomeSeverity.ERROR,
                     outcome_code=ValidationOutcome.ValidationOutcomeCode.SCHEMA_ERROR,
                     observed=message['message'],
@@ -37,29 +26,23 @@ def process_schema(context:TaskContext):
                         'type': message['type'] if 'type' in message else None,
                         'attribute': message['attribute'] if 'attribute' in message else None
                     }),
-                    validation_task=context.task
+                    stepfile_id=instance['id'] if has_instance else None,
+                    ifc_type=instance['type'] if has_instance else None,
                 )
-                outcomes_to_save.append(outcome)
-                if 'instance' in message and message['instance'] is not None and 'id' in message['instance'] and 'type' in message['instance']:
-                    instance = ModelInstance(
-                            stepfile_id=message['instance']['id'],
-                            ifc_type=message['instance']['type'],
-                            model=model
-                        )
-                    outcome.instance_id = instance.stepfile_id # store for later reference (not persisted)
-                    outcomes_instances_to_save.append(instance)
 
-            ModelInstance.objects.bulk_create(outcomes_instances_to_save, batch_size=DJANGO_DB_BULK_CREATE_BATCH_SIZE, ignore_conflicts=True) #ignore existing
-            model_instances = dict(ModelInstance.objects.filter(model_id=model.id).values_list('stepfile_id', 'id')) # retrieve all
+        success = output.returncode >= 0
+        valid = output.count == 0
 
-            for outcome in outcomes_to_save:
-                if outcome.instance_id:
-                    instance_id = model_instances[outcome.instance_id]
-                    if instance_id:
-                        outcome.instance_id = instance_id
-
-            ValidationOutcome.objects.bulk_create(outcomes_to_save, batch_size=DJANGO_DB_BULK_CREATE_BATCH_SIZE)
+        if valid:
+            setattr(model, context.config.status_field.name, Model.Status.VALID)
+            context.task.outcomes.create(
+                severity=ValidationOutcome.OutcomeSeverity.PASSED,
+                outcome_code=ValidationOutcome.ValidationOutcomeCode.PASSED,
+                observed=None
+            )
+        else:
+            model.status_schema = Model.Status.INVALID
 
         model.save(update_fields=['status_schema'])
 
-        return "No IFC schema errors." if success else f"'ifcopenshell.validate' returned {len(output):,} errors."
+        return "No IFC schema errors." if success else f"'ifcopenshell.validate' returned {output.count:,} errors."
@@ -3,6 +3,7 @@ import json
 
 from apps.ifc_validation_models.models import Model, ValidationOutcome
 from .. import TaskContext, logger, with_model
+from .outcome_writer import OutcomeWriter
 
 
 def process_syntax_outcomes(context:TaskContext):
@@ -28,13 +29,15 @@ def process_syntax_outcomes(context:TaskContext):
                 observed=list(filter(None, error_output.split("\n")))[-1]
             )
         else:
-            for msg in json.loads(output):
+            with OutcomeWriter(task) as writer:
+                for msg in json.loads(output):
+                    writer.add(
+                        severity=ValidationOutcome.OutcomeSeverity.ERROR,
+                        outcome_code=ValidationOutcome.ValidationOutcomeCode.SYNTAX_ERROR,
+                        observed=msg.get("message")
+                    )
+            if writer.count:
                 setattr(model, status_field, Model.Status.INVALID)
-                task.outcomes.create(
-                    severity=ValidationOutcome.OutcomeSeverity.ERROR,
-                    outcome_code=ValidationOutcome.ValidationOutcomeCode.SYNTAX_ERROR,
-                    observed=msg.get("message")
-                )
 
         model.save(update_fields=[status_field])
         
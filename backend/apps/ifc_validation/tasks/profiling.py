@@ -0,0 +1,140 @@
+"""
+Resources consumed by checks: wall time, user/system CPU, peak RSS and bytes read.
+
+CPU time comes from getrusage(), which is exact: of waited-for children for subprocesses, as reported
+by the forked process itself for checks run in the check daemon, or of this process for in-process checks.
+Peak RSS and bytes read are sampled with psutil (over the process and its own children) while it runs.
+Usage is stored per ValidationTask and aggregated into the Prometheus metrics (see apps/ifc_validation/metrics.py).
+"""
+
+import resource
+import threading
+import time
+from dataclasses import dataclass
+
+import psutil
+
+SAMPLE_INTERVAL = 0.2  # seconds
+
+
+@dataclass
+class ResourceUsage:
+    wall_time: float = 0.0    # seconds
+    user_cpu: float = 0.0     # seconds
+    system_cpu: float = 0.0   # seconds
+    peak_rss: int = 0         # bytes
+    read_bytes: int = 0       # bytes, including reads served from the page cache
+
+
+class ResourceProfiler:
+    """
+    Profiles a single check; call start() right after its process was spawned, sample() while
+    waiting for it (or sample_in_background() when blocked on its output) and stop() once it exited.
+
+    Processes that are not our children (start(pid, child=False), e.g. forked by the check daemon)
+    report their own getrusage() to stop(); without it, CPU time falls back to the sampled values.
+    In-process checks are profiled with start(os.getpid(), in_process=True).
+    """
+
+    def __init__(self):
+        self.usage = ResourceUsage()
+        self._process = None
+        self._started = None
+        self._rusage = None
+        self._in_process = False
+        self._child = True
+        self._read_before = 0
+        self._cpu = (0.0, 0.0)
+        self._stopped = None
+        self._sampler = None
+
+    def start(self, pid, child=True, in_process=False):
+        self._started = time.monotonic()
+        self._child = child and not in_process
+        self._in_process = in_process
+        self._rusage = resource.getrusage(resource.RUSAGE_SELF if in_process else resource.RUSAGE_CHILDREN)
+        try:
+            self._process = psutil.Process(pid)
+        except psutil.Error:
+            self._process = None
+        if in_process:
+            self._read_before = self._read_chars([self._process]) if self._process else 0
+
+    def sample(self):
+        if self._process is None or self._in_process:
+            return
+        rss, read, user, system = 0, 0, 0.0, 0.0
+        try:
+            for p in [self._process] + self._process.children(recursive=True):
+                rss += p.memory_info().rss
+                read += self._read_chars([p])
+                cpu = p.cpu_times()
+                user, system = user + cpu.user, system + cpu.system
+        except psutil.Error:
+            # exited meanwhile
+            return
+        self.usage.peak_rss = max(self.usage.peak_rss, rss)
+        self.usage.read_bytes = max(self.usage.read_bytes, read)
+        self._cpu = max(self._cpu[0], user), max(self._cpu[1], system)
+
+    def sample_in_background(self):
+        self._stopped = threading.Event()
+
+        def run():
+            while not self._stopped.wait(SAMPLE_INTERVAL):
+                self.sample()
+
+        self._sampler = threading.Thread(target=run, daemon=True)
+        self._sampler.start()
+
+    def stop(self, rusage=None):
+        """
+        Finishes profiling; `rusage` is the usage reported by a process that isn't our child
+        (a dict of user_cpu, system_cpu and peak_rss, as sent by the check daemon).
+        """
+        if self._sampler is not None:
+            self._stopped.set()
+            self._sampler.join()
+            self._sampler = None
+        if self._started is None:
+            return self.usage
+        self.usage.wall_time = time.monotonic() - self._started
+
+        if rusage is not None:
+            self.usage.user_cpu = rusage['user_cpu']
+            self.usage.system_cpu = rusage['system_cpu']
+            self.usage.peak_rss = max(self.usage.peak_rss, rusage['peak_rss'])
+            return self.usage
+
+        if self._in_process:
+            before, after = self._rusage, resource.getrusage(resource.RUSAGE_SELF)
+            self.usage.user_cpu = after.ru_utime - before.ru_utime
+            self.usage.system_cpu = after.ru_stime - before.ru_stime
+            # the peak of this process so far, an upper bound for the check
+            self.usage.peak_rss = after.ru_maxrss * 1024
+            if self._process is not None:
+                self.usage.read_bytes = max(0, self._read_chars([self._process]) - self._read_before)
+            return self.usage
+
+        if not self._child:
+            self.usage.user_cpu, self.usage.system_cpu = self._cpu
+            return self.usage
+
+        before, after = self._rusage, resource.getrusage(resource.RUSAGE_CHILDREN)
+        self.usage.user_cpu = after.ru_utime - before.ru_utime
+        self.usage.system_cpu = after.ru_stime - before.ru_stime
+        # ru_maxrss (KiB) is the largest child so far; it only tells something if this one raised it
+        if after.ru_maxrss > before.ru_maxrss:
+            self.usage.peak_rss = max(self.usage.peak_rss, after.ru_maxrss * 1024)
+        return self.usage
+
+    @staticmethod
+    def _read_chars(processes):
+        read = 0
+        for p in processes:
+            try:
+                io = p.io_counters()
+            except (psutil.Error, AttributeError):
+                continue
+            read += getattr(io, "read_chars", io.read_bytes)
+        return read
@@ -0,0 +1,159 @@
+"""
+Content-addressed cache of validation results.
+
+Maps the SHA-256 of an uploaded file (plus a fingerprint of everything that determines
+the outcome of a validation run) to the id of a completed ValidationRequest, so identical
+files can reuse its tasks and outcomes instead of running all checks again.
+
+Allowlisting (WhiteListEntry) is applied when outcomes are read, not when they are stored,
+so cloned outcomes stay correct when the allowlist changes.
+"""
+
+import os
+import hashlib
+import functools
+
+import ifcopenshell
+from django.utils import timezone
+
+from core.redis_lock import redis_client
+from core.settings import RESULT_CACHE_TTL, MAX_OUTCOMES_PER_RULE, DJANGO_DB_BULK_CREATE_BATCH_SIZE
+
+from apps.ifc_validation_models.models import ValidationRequest, ValidationOutcome, ModelInstance
+
+from .logger import logger
+
+
+CHUNK_SIZE = 1024 * 1024
+CHECKS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "checks"))
+
+
+def compute_file_digest(file_path, chunk_size=CHUNK_SIZE):
+    sha256 = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        while chunk := f.read(chunk_size):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def _tree_digest(path):
+    # digest of all files below 'path' - rules, policies and certificates
+    sha256 = hashlib.sha256()
+    for root, dirs, files in os.walk(path):
+        dirs[:] = sorted(d for d in dirs if d not in ('.git', '__pycache__', 'tests', 'test_files'))
+        for name in sorted(files):
+            if name.endswith('.pyc'):
+                continue
+            file_path = os.path.join(root, name)
+            sha256.update(os.path.relpath(file_path, path).encode('utf-8'))
+            try:
+                sha256.update(compute_file_digest(file_path).encode('ascii'))
+            except OSError:
+                continue
+    return sha256.hexdigest()
+
+
+@functools.lru_cache(maxsize=1)
+def validation_fingerprint():
+    """
+    Identifies the versions of the service, ifcopenshell, gherkin rules, header policy and signature store.
+    """
+    parts = [
+        os.environ.get("VERSION", "UNDEFINED"),
+        ifcopenshell.version,
+        str(MAX_OUTCOMES_PER_RULE),
+        _tree_digest(os.path.join(CHECKS_DIR, "ifc_gherkin_rules")),
+        _tree_digest(os.path.join(CHECKS_DIR, "header_policy")),
+        _tree_digest(os.path.join(CHECKS_DIR, "signatures")),
+    ]
+    return hashlib.sha256("|".join(parts).encode('utf-8')).hexdigest()[:16]
+
+
+def _cache_key(digest):
+    return f"validation:result:{validation_fingerprint()}:{digest}"
+
+
+def lookup(digest):
+    """
+    Returns the completed ValidationRequest for a file digest, or None.
+    """
+    key = _cache_key(digest)
+    source_id = redis_client.get(key)
+    if source_id is None:
+        return None
+
+    source = ValidationRequest.objects.filter(pk=int(source_id)).select_related('model').first()
+    if source is None or source.deleted or source.model is None or source.status != ValidationRequest.Status.COMPLETED:
+        redis_client.delete(key)
+        return None
+    return source
+
+
+def store(digest, request_id):
+    redis_client.set(_cache_key(digest), request_id, ex=RESULT_CACHE_TTL)
+    logger.debug(f"Stored validation result of request {request_id} for digest {digest}")
+
+
+def clone_validation_result(source: ValidationRequest, target: ValidationRequest):
+    """
+    Copies the Model, ModelInstances, ValidationTasks and ValidationOutcomes of 'source' to 'target'.
+    Should be called inside a transaction.
+    """
+    model = source.model
+    source_model_id = model.id
+
+    # model
+    model.pk = None
+    model._state.adding = True
+    model.file = target.file
+    model.file_name = target.file_name
+    model.size = target.size
+    model.uploaded_by = target.created_by
+    model.save()
+    target.model = model
+    target.save()
+
+    # instances (resolved via step file id, as bulk_create doesn't always return pk's)
+    stepfile_ids = {}
+    instances = list(ModelInstance.objects.filter(model_id=source_model_id))
+    for instance in instances:
+        stepfile_ids[instance.id] = instance.stepfile_id
+        instance.pk = None
+        instance.model = model
+    ModelInstance.objects.bulk_create(instances, batch_size=DJANGO_DB_BULK_CREATE_BATCH_SIZE)
+    new_instance_ids = dict(ModelInstance.objects.filter(model_id=model.id).values_list('stepfile_id', 'id'))
+    instance_map = {old_id: new_instance_ids[stepfile_id] for old_id, stepfile_id in stepfile_ids.items()}
+
+    # tasks (only the latest run of each type, in case the source was revalidated);
+    # they ran now, without a process of their own
+    latest_tasks = {task.type: task for task in source.tasks.all().order_by('id')}
+    task_map = {}
+    now = timezone.now()
+    for task in sorted(latest_tasks.values(), key=lambda t: t.id):
+        old_id = task.id
+        task.pk = None
+        task._state.adding = True
+        task.request = target
+        task.started = now
+        task.ended = now
+        task.process_id = None
+        task.process_cmd = None
+        task.save()
+        task_map[old_id] = task.id
+
+    # outcomes
+    batch = []
+    outcomes = ValidationOutcome.objects.filter(validation_task_id__in=task_map.keys()).order_by('id')
+    for outcome in outcomes.iterator(chunk_size=DJANGO_DB_BULK_CREATE_BATCH_SIZE):
+        outcome.pk = None
+        outcome.validation_task_id = task_map[outcome.validation_task_id]
+        if outcome.instance_id:
+            outcome.instance_id = instance_map.get(outcome.instance_id)
+        batch.append(outcome)
+        if len(batch) >= DJANGO_DB_BULK_CREATE_BATCH_SIZE:
+            ValidationOutcome.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        ValidationOutcome.objects.bulk_create(batch)
+
+    return model
@@ -0,0 +1,173 @@
+"""
+Admission of validation workflows, so one user submitting many (large) files can't starve everyone else.
+
+- Subtasks of a workflow are routed to a queue per size tier (small/medium/large by ValidationRequest.size);
+  workers take turns between the tiers (see CELERY_BROKER_TRANSPORT_OPTIONS), so small files don't wait
+  behind a backlog of large ones, nor the other way around.
+- With SCHEDULER_ENABLED, at most SCHEDULER_MAX_RUNNING workflows run at once. Other workflows wait in a
+  sorted set per user (smallest file first) until a running workflow completes or fails.
+- A free slot goes to the waiting user with the lowest share of running workflows, relative to the
+  weight of the channel their next file was submitted through (interactive uploads weigh more than
+  bulk API submissions); ties go to the smallest file.
+
+Scheduler state is kept in Redis. Slots of workflows whose request is no longer in progress are reclaimed
+periodically (see release_finished); workflows that show no sign of life (see heartbeat) for SCHEDULER_STALE_AFTER
+are released as well.
+"""
+
+import json
+import time
+
+from core.redis_lock import redis_client
+from core.settings import (
+    SCHEDULER_MAX_RUNNING,
+    SCHEDULER_SMALL_FILE_SIZE_IN_MB,
+    SCHEDULER_LARGE_FILE_SIZE_IN_MB,
+    SCHEDULER_CHANNEL_WEIGHTS,
+    SCHEDULER_STALE_AFTER,
+)
+
+from .logger import logger
+
+TIERS = ("small", "medium", "large")
+
+KEY_PREFIX = "validation:scheduler"
+LOCK_KEY = f"{KEY_PREFIX}:lock"
+RUNNING_KEY = f"{KEY_PREFIX}:running"     # sorted set: request id -> admitted at, or last heartbeat
+OWNERS_KEY = f"{KEY_PREFIX}:owners"       # hash: request id -> user id
+USAGE_KEY = f"{KEY_PREFIX}:usage"         # hash: user id -> nbr of running workflows
+WAITING_KEY = f"{KEY_PREFIX}:waiting"     # set: user ids with pending workflows
+
+
+def pending_key(user_id):
+    # sorted set: job -> file size
+    return f"{KEY_PREFIX}:pending:{user_id}"
+
+
+def tier_of(size):
+    if size is None or size <= SCHEDULER_SMALL_FILE_SIZE_IN_MB * 1024 * 1024:
+        return "small"
+    if size <= SCHEDULER_LARGE_FILE_SIZE_IN_MB * 1024 * 1024:
+        return "medium"
+    return "large"
+
+
+def queue_for(size):
+    return f"validation-{tier_of(size)}"
+
+
+def pick_next(candidates):
+    """
+    Picks the user that gets the next free slot.
+    'candidates' maps user ids to (nbr of running workflows, weight, size of their next file).
+    """
+    if not candidates:
+        return None
+    return min(candidates, key=lambda u: (candidates[u][0] / candidates[u][1], candidates[u][2]))
+
+
+def submit(user_id, size, job):
+    """
+    Queues a workflow for a user; returns the jobs (possibly including this one) that can start now.
+    A job is a dict with at least 'id' and 'channel'.
+    """
+    with redis_client.lock(LOCK_KEY, timeout=10, blocking_timeout=10):
+        redis_client.zadd(pending_key(user_id), {json.dumps(job, sort_keys=True): size or 0})
+        redis_client.sadd(WAITING_KEY, user_id)
+        return _dispatch()
+
+
+def release(id):
+    """
+    Frees the slot of a completed or failed workflow; returns the jobs that can start now.
+    """
+    with redis_client.lock(LOCK_KEY, timeout=10, blocking_timeout=10):
+        _remove_running([str(id)])
+        return _dispatch()
+
+
+def heartbeat(id):
+    """
+    Records that a running workflow is still making progress.
+    """
+    redis_client.zadd(RUNNING_KEY, {str(id): time.time()}, xx=True)
+
+
+def running():
+    """
+    Ids of the running workflows.
+    """
+    return [int(id) for id in redis_client.zrange(RUNNING_KEY, 0, -1)]
+
+
+def release_finished(ids):
+    """
+    Frees the slots of workflows that finished without releasing them (eg. a lost callback); returns the jobs that can start now.
+    """
+    with redis_client.lock(LOCK_KEY, timeout=10, blocking_timeout=10):
+        if ids:
+            logger.warning(f"Releasing slots of finished workflows: {', '.join(map(str, ids))}")
+            _remove_running([str(id) for id in ids])
+        return _dispatch()
+
+
+def _remove_running(ids):
+    for id in ids:
+        user_id = redis_client.hget(OWNERS_KEY, id)
+        # error callbacks can fire more than once for a workflow
+        if redis_client.zrem(RUNNING_KEY, id) and user_id is not None:
+            if redis_client.hincrby(USAGE_KEY, user_id, -1) <= 0:
+                redis_client.hdel(USAGE_KEY, user_id)
+        redis_client.hdel(OWNERS_KEY, id)
+
+
+def _dispatch():
+    now = time.time()
+    if stale := redis_client.zrangebyscore(RUNNING_KEY, 0, now - SCHEDULER_STALE_AFTER):
+        logger.warning(f"Releasing slots of workflows that did not report back: {', '.join(stale)}")
+        _remove_running(stale)
+
+    jobs = []
+    while redis_client.zcard(RUNNING_KEY) < SCHEDULER_MAX_RUNNING:
+        candidates, heads = {}, {}
+        for user_id in redis_client.smembers(WAITING_KEY):
+            head = redis_client.zrange(pending_key(user_id), 0, 0, withscores=True)
+            if not head:
+                redis_client.srem(WAITING_KEY, user_id)
+                continue
+            member, size = head[0]
+            heads[user_id] = member
+            running = int(redis_client.hget(USAGE_KEY, user_id) or 0)
+            weight = SCHEDULER_CHANNEL_WEIGHTS.get(json.loads(member).get("channel"), 1)
+            candidates[user_id] = (running, weight, size)
+
+        user_id = pick_next(candidates)
+        if user_id is None:
+            break
+
+        redis_client.zrem(pending_key(user_id), heads[user_id])
+        if not redis_client.zcard(pending_key(user_id)):
+            redis_client.srem(WAITING_KEY, user_id)
+
+        job = json.loads(heads[user_id])
+        redis_client.zadd(RUNNING_KEY, {str(job["id"]): now})
+        redis_client.hset(OWNERS_KEY, str(job["id"]), user_id)
+        redis_client.hincrby(USAGE_KEY, user_id, 1)
+        jobs.append(job)
+
+    return jobs
+
+
+def queue_depths():
+    """
+    Nbr of queued subtasks per size tier and nbr of running/pending workflows per user.
+    """
+    tiers = {tier: redis_client.llen(f"validation-{tier}") for tier in TIERS}
+
+    users = {}
+    for user_id, running in redis_client.hgetall(USAGE_KEY).items():
+        users.setdefault(user_id, {"running": 0, "pending": 0})["running"] = int(running)
+    for user_id in redis_client.smembers(WAITING_KEY):
+        users.setdefault(user_id, {"running": 0, "pending": 0})["pending"] = redis_client.zcard(pending_key(user_id))
+
+    return {"tiers": tiers, "users": users}
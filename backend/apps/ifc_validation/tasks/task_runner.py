@@ -1,24 +1,35 @@
 import functools
 import psutil
-import random
 
-from celery import shared_task, chain, chord, group
-from celery.exceptions import SoftTimeLimitExceeded
+from celery import shared_task, signature
+from celery.exceptions import Ignore, SoftTimeLimitExceeded
+from kombu.utils.json import dumps, loads
 
+from django.db import transaction
 from django.db.models import F, Value
 from django.db.models.functions import Least
+from django.utils import timezone
 
-from core.redis_lock import acquire_user_lock, LockError
+from core.redis_lock import new_permit_token, acquire_user_permit, refresh_user_permit, release_user_permit, release_expired_permits
+from core.settings import GHERKIN_FUSED_EXECUTION, RESULT_CACHE_ENABLED, SCHEDULER_ENABLED
 from core.utils import log_execution
 
 from apps.ifc_validation_models.decorators import requires_django_user_context
 from apps.ifc_validation_models.models import *
+from apps.ifc_validation.progress_events import publish_request_changed
+from apps.ifc_validation import report_cache
+from apps.ifc_validation_bff.tasks import materialize_report_task
 from .configs import task_registry
 from .context import TaskContext
+from .check_programs import check_gherkin_fused
+from . import result_cache
+from . import scheduler
+from .dag import WorkflowDag, build_dag, node_of
 from .utils import get_absolute_file_path
 from .logger import logger
 from .email_tasks import *
 from .file_retention_tasks import *
+from .chart_rollup_tasks import *
 
 
 def terminate_subprocesses():
@@ -56,34 +67,50 @@ def kill_subprocesses_on_timeout(task_func):
     return wrapper
 
 
-def with_user_task_lock(task_name: str):
-    
-    def decorator(task_func):
-        @functools.wraps(task_func)
-        def wrapper(self, *args, **kwargs):
+PERMIT_KWARG = '_permit_token'
 
-            id = kwargs.get('id')
-            request = ValidationRequest.objects.get(pk=id)
-            user_id = request.created_by.id
-            
-            try:
-                with acquire_user_lock(user_id, task_name):
-                    return task_func(self, *args, **kwargs)
-                
-            except LockError as exc:
-                base_backoff = 10 + self.request.retries * 7
-                jitter_backoff = random.randint(0,10)
-                raise self.retry(
-                    exc=exc, 
-                    countdown=base_backoff+jitter_backoff, 
-                    max_retries=None # infinite
-                )
-            
-            except Exception as exc:
-                # other errors — fail permanently
-                raise
-        return wrapper
-    return decorator
+
+def resume_waiting_tasks(payloads):
+    for payload in payloads:
+        signature(loads(payload)).apply_async()
+
+
+def with_user_semaphore(task_func):
+    """
+    Runs a subtask under a permit of the user's semaphore (see core.redis_lock).
+    Without a free permit the task is parked - not retried - and sent to the workers
+    again, with its permit, as soon as one frees up.
+    """
+    @functools.wraps(task_func)
+    def wrapper(self, *args, **kwargs):
+
+        token = kwargs.pop(PERMIT_KWARG, None)
+        id = kwargs.get('id')
+        user_id = ValidationRequest.objects.filter(pk=id).values_list('created_by_id', flat=True).get()
+
+        # a resumed task holds a permit since it was handed one, which may have expired while queued
+        if token is None or not refresh_user_permit(user_id, token):
+            token = token or new_permit_token()
+            # resending the task keeps its callbacks, like a retry
+            payload = dumps(self.signature_from_request(kwargs={**kwargs, PERMIT_KWARG: token}))
+            acquired, granted = acquire_user_permit(user_id, token, payload)
+            resume_waiting_tasks(granted)
+            if not acquired:
+                raise Ignore()
+
+        try:
+            return task_func(self, *args, **kwargs)
+        finally:
+            resume_waiting_tasks(release_user_permit(user_id, token))
+
+    return wrapper
+
+
+@shared_task(bind=True)
+@log_execution
+def release_expired_user_permits(self, *args, **kwargs):
+
+    resume_waiting_tasks(release_expired_permits())
 
 
 assert task_registry.total_increment() == 100
@@ -114,6 +141,9 @@ def on_workflow_started(self, *args, **kwargs):
     request = ValidationRequest.objects.get(pk=id)
     request.mark_as_initiated(reason)
 
+    # drop the report of a previous run
+    report_cache.invalidate(id)
+
     # queue sending emails
     nbr_of_tasks = request.tasks.count()
     if nbr_of_tasks == 0:
@@ -149,6 +179,15 @@ def on_workflow_completed(self, result, **kwargs):
         # queue sending email
         send_completion_email_task.delay(id=id, file_name=request.file_name)
 
+        # build report sections once, instead of on every read
+        materialize_report_task.delay(id=id)
+
+        # make results available for identical files
+        if digest := kwargs.get('digest'):
+            result_cache.store(digest, id)
+
+    release_workflow(id)
+
 
 @shared_task(bind=True)
 @log_execution
@@ -160,6 +199,7 @@ def on_workflow_failed(self, *args, **kwargs):
     # update status
     id = args[1]
     request = ValidationRequest.objects.get(pk=id)
+    release_workflow(id)
 
     # Both error callbacks can fire for one failure; skip if already finalized so the
     # failure emails aren't sent twice.
@@ -179,11 +219,31 @@ def on_workflow_failed(self, *args, **kwargs):
     send_failure_admin_email_task.delay(id=id, file_name=request.file_name)
     
 
+def get_invalid_blockers(request, task_type):
+    if model := request.model:
+        return list(filter(
+            lambda b: getattr(model, task_registry[b].status_field.name) == Model.Status.INVALID,
+            task_registry.get_blockers_of(task_type)
+        ))
+    else: # for testing, we're not instantiating a model
+        return []
+
+
+def increment_progress(id, increment):
+    # Atomic: parallel tasks increment together.
+    ValidationRequest.objects.filter(pk=id).update(
+        progress=Least(F("progress") + increment, Value(100))
+    )
+    # queryset updates don't emit post_save; notify subscribers explicitly
+    user_id = ValidationRequest.objects.filter(pk=id).values_list('created_by_id', flat=True).first()
+    publish_request_changed(id, user_id)
+
+
 def task_factory(task_type, queue='celery'):
     config = task_registry[task_type]
     
-    @shared_task(bind=True, name=config.celery_task_name, max_retries=None, queue=queue)
-    @with_user_task_lock(task_name=config.celery_task_name)
+    @shared_task(bind=True, name=config.celery_task_name, queue=queue)
+    @with_user_semaphore
     @log_execution
     @requires_django_user_context
     @kill_subprocesses_on_timeout
@@ -197,14 +257,7 @@ def task_factory(task_type, queue='celery'):
         # Always create the task record, even if it will be skipped due to blocking conditions,
         # so it is logged and its status can be marked as 'skipped'
         task = ValidationTask.objects.create(request=request, type=task_type)
-        
-        if model := request.model:
-            invalid_blockers = list(filter(
-                lambda b: getattr(model, task_registry[b].status_field.name) == Model.Status.INVALID,
-                task_registry.get_blockers_of(task_type)
-            ))
-        else: # for testing, we're not instantiating a model
-            invalid_blockers = []
+        invalid_blockers = get_invalid_blockers(request, task_type)
         
         # run or skip
         if not invalid_blockers:
@@ -241,60 +294,283 @@ def task_factory(task_type, queue='celery'):
 
         # Advance progress only after the work is done, so a request never shows
         # 100% while a long-running task (e.g. instance completion) is still running.
-        # Failed tasks returned early above. Atomic: parallel tasks increment together.
-        ValidationRequest.objects.filter(pk=id).update(
-            progress=Least(F("progress") + config.increment, Value(100))
-        )
+        # Failed tasks returned early above.
+        increment_progress(id, config.increment)
 
     validation_subtask_runner.__doc__ = f"Validation task for {task_type} generated by the task_factory func."    
     return validation_subtask_runner
 
 
+FUSED_GHERKIN_TASK_TYPES = [
+    ValidationTask.Type.NORMATIVE_IA,
+    ValidationTask.Type.NORMATIVE_IP,
+    ValidationTask.Type.INDUSTRY_PRACTICES,
+]
+
+
+@shared_task(bind=True, name="apps.ifc_validation.tasks.gherkin_rules_fused_subtask", queue='celery')
+@with_user_semaphore
+@log_execution
+@requires_django_user_context
+@kill_subprocesses_on_timeout
+def gherkin_rules_fused_subtask(self, *args, **kwargs):
+    """
+    Runs the IA, IP and industry practice rules on a single parse of the file,
+    while still reporting status and progress on one ValidationTask per rule type.
+    """
+    id = kwargs.get('id')
+
+    request = ValidationRequest.objects.get(pk=id)
+    file_path = get_absolute_file_path(request.file.name)
+
+    contexts, increment = [], 0
+    for task_type in FUSED_GHERKIN_TASK_TYPES:
+        config = task_registry[task_type]
+        task = ValidationTask.objects.create(request=request, type=task_type)
+        if invalid_blockers := get_invalid_blockers(request, task_type):
+            reason = f"Skipped due to fail in blocking tasks: {', '.join(invalid_blockers)}"
+            logger.debug(reason)
+            task.mark_as_skipped(reason)
+            increment += config.increment
+        else:
+            task.mark_as_initiated()
+            contexts.append(TaskContext(config=config, task=task, request=request, file_path=file_path))
+
+    # Execution Layer
+    if contexts:
+        try:
+            check_gherkin_fused(contexts)
+        except Exception as err:
+            for context in contexts:
+                context.task.mark_as_failed(str(err))
+            logger.exception(f"Execution failed in fused gherkin task: {err}")
+            contexts = []
+
+    # Processing Layer / write to DB
+    for context in contexts:
+        if context.result is None:
+            # marked as failed by the execution layer
+            continue
+        try:
+            reason = context.config.process_results(context)
+            context.task.mark_as_completed(reason)
+            increment += context.config.increment
+            logger.debug(f"Task {context.config.type} completed, reason: {reason}")
+        except Exception as err:
+            context.task.mark_as_failed(str(err))
+            logger.exception(f"Processing failed in task {context.config.type}: {err}")
+
+    increment_progress(id, increment)
+
+
+@shared_task(bind=True)
+@log_execution
+@requires_django_user_context
+def reuse_validation_result_subtask(self, *args, **kwargs):
+    """
+    Completes a request by cloning the results of an earlier request for an identical file.
+    """
+    id = kwargs.get('id')
+    source_id = kwargs.get('source_id')
+
+    request = ValidationRequest.objects.get(pk=id)
+    source = ValidationRequest.objects.get(pk=source_id)
+    with transaction.atomic():
+        result_cache.clone_validation_result(source, request)
+        ValidationRequest.objects.filter(pk=id).update(progress=100)
+    logger.info(f"Reused validation results of request {source_id} for request {id}")
+
+
+def get_cached_result(id, force=False):
+    """
+    Returns the file digest of a request and, when not forced, an earlier request with identical results.
+    """
+    if not RESULT_CACHE_ENABLED:
+        return None, None
+    try:
+        request = ValidationRequest.objects.get(pk=id)
+        digest = result_cache.compute_file_digest(get_absolute_file_path(request.file.name))
+        if force or request.model is not None:
+            return digest, None
+        source = result_cache.lookup(digest)
+        return digest, source if source is not None and source.id != id else None
+    except Exception as err:
+        # never let the cache stand in the way of a regular validation
+        logger.warning(f"Result cache not available for request {id}: {err}")
+        return None, None
+
+
+def release_workflow(id):
+    if not SCHEDULER_ENABLED:
+        return
+    try:
+        jobs = scheduler.release(id)
+    except Exception as err:
+        # don't fail finalizing the request; stale slots expire (see scheduler)
+        logger.warning(f"Could not release scheduler slot of request {id}: {err}")
+        return
+    start_scheduled_workflows(jobs)
+
+
+def workflow_heartbeat(id):
+    if not SCHEDULER_ENABLED:
+        return
+    try:
+        scheduler.heartbeat(id)
+    except Exception as err:
+        logger.warning(f"Could not record progress of request {id} with the scheduler: {err}")
+
+
 @shared_task(bind=True)
 @log_execution
-def ifc_file_validation_task(self, id, file_name, *args, **kwargs):
+def release_finished_workflows(self, *args, **kwargs):
+
+    # slots of workflows whose completion (or error) callback got lost
+    if not SCHEDULER_ENABLED:
+        return
+    running = scheduler.running()
+    in_progress = set(ValidationRequest.objects.filter(
+        pk__in=running,
+        status__in=[ValidationRequest.Status.PENDING, ValidationRequest.Status.INITIATED]
+    ).values_list('id', flat=True))
+    start_scheduled_workflows(scheduler.release_finished([id for id in running if id not in in_progress]))
+
+
+def start_scheduled_workflows(jobs):
+    for job in jobs:
+        try:
+            start_workflow(job['id'], job['file_name'], force=job['force'])
+        except Exception:
+            logger.exception(f"Failed to start scheduled workflow for request {job['id']}")
+            release_workflow(job['id'])
+
+
+@shared_task(bind=True)
+@log_execution
+def ifc_file_validation_task(self, id, file_name, *args, force=False, **kwargs):
 
     if id is None or file_name is None:
         raise ValueError("Arguments 'id' and/or 'file_name' are required.")
 
+    if not SCHEDULER_ENABLED:
+        return start_workflow(id, file_name, force=force)
+
+    # wait for a free slot, shared fairly between users
+    request = ValidationRequest.objects.get(pk=id)
+    job = {'id': id, 'file_name': file_name, 'force': force, 'channel': request.channel}
+    start_scheduled_workflows(scheduler.submit(request.created_by_id, request.size, job))
+
+
+def start_workflow(id, file_name, force=False):
+
     error_task = error_handler.s(id, file_name)
-    chord_error_task = chord_error_handler.s(id, file_name)
 
-    workflow_started = on_workflow_started.s(id=id, file_name=file_name)
-    workflow_completed = on_workflow_completed.s(id=id, file_name=file_name)
-
-    serial_tasks = chain(
-        magic_clamav_subtask.s(id=id, file_name=file_name),
-        header_syntax_validation_subtask.s(id=id, file_name=file_name),
-        header_validation_subtask.s(id=id, file_name=file_name),
-        syntax_validation_subtask.s(id=id, file_name=file_name),
-        prerequisites_subtask.s(id=id, file_name=file_name),
-    )
+    digest, source = get_cached_result(id, force=force)
 
-    parallel_tasks = group([
-        digital_signatures_subtask.s(id=id, file_name=file_name),
-        schema_validation_subtask.s(id=id, file_name=file_name),
-        #bsdd_validation_subtask.s(id=id, file_name=file_name), # disabled
-        normative_rules_ia_validation_subtask.s(id=id, file_name=file_name),
-        normative_rules_ip_validation_subtask.s(id=id, file_name=file_name),
-        industry_practices_subtask.s(id=id, file_name=file_name)
-    ])
-
-    final_tasks = chain(
-        instance_completion_subtask.s(id=id, file_name=file_name)
-    )
+    workflow_started = on_workflow_started.s(id=id, file_name=file_name)
+    workflow_completed = on_workflow_completed.s(id=id, file_name=file_name, digest=digest)
 
-    workflow = (
-        workflow_started |
-        serial_tasks |
-        chord(
-            chord(parallel_tasks, final_tasks).on_error(chord_error_task),
+    # identical file was validated before - reuse results
+    if source is not None:
+        workflow = (
+            workflow_started |
+            workflow_subtask(reuse_validation_result_subtask, id, file_name, source_id=source.id) |
             workflow_completed
-        ).on_error(chord_error_task))
+        )
+        workflow.set(link_error=[error_task])
+        workflow.apply_async()
+        return
+
+    workflow = workflow_started | run_workflow_dag.si(id=id, file_name=file_name, digest=digest)
     workflow.set(link_error=[error_task])
     workflow.apply_async()
 
 
+def workflow_subtask(task, id, file_name, **kwargs):
+    return workflow_subtasks([task], id, file_name, **kwargs)[0]
+
+
+def workflow_subtasks(tasks, id, file_name, **kwargs):
+    # subtasks of small files are picked up before those of larger files
+    size = ValidationRequest.objects.filter(pk=id).values_list('size', flat=True).first()
+    queue = scheduler.queue_for(size)
+    return [
+        task.s(id=id, file_name=file_name, **kwargs).set(**({} if task is magic_clamav_subtask else {'queue': queue}))
+        for task in tasks
+    ]
+
+
+def dispatch_workflow_nodes(nodes, id, file_name, digest):
+    if not nodes:
+        return
+    for node, subtask in zip(nodes, workflow_subtasks([WORKFLOW_NODES[n] for n in nodes], id, file_name)):
+        subtask.apply_async(
+            link=on_workflow_node_completed.si(id=id, file_name=file_name, node=node, digest=digest),
+            link_error=error_handler.s(id, file_name),
+        )
+
+
+@shared_task(bind=True)
+@log_execution
+def run_workflow_dag(self, *args, **kwargs):
+
+    id = kwargs.get('id')
+    workflow_heartbeat(id)
+    nodes = workflow_dag.start(id)
+    dispatch_workflow_nodes(nodes, id, kwargs.get('file_name'), kwargs.get('digest'))
+
+
+@shared_task(bind=True)
+@log_execution
+def on_workflow_node_completed(self, *args, **kwargs):
+
+    id, file_name, digest = kwargs.get('id'), kwargs.get('file_name'), kwargs.get('digest')
+    workflow_heartbeat(id)
+    ready, done = workflow_dag.complete(id, kwargs.get('node'))
+
+    # tasks behind an invalid result are recorded as skipped here, instead of being sent to the workers
+    request = ValidationRequest.objects.select_related('model').get(pk=id)
+    skipped = []
+    while ready:
+        blocked = [n for n in ready if all(get_invalid_blockers(request, t) for t in workflow_node_types(n))]
+        dispatch_workflow_nodes([n for n in ready if n not in blocked], id, file_name, digest)
+        ready = []
+        for node in blocked:
+            skipped.append(node)
+            newly_ready, node_done = workflow_dag.complete(id, node)
+            ready += newly_ready
+            done = done or node_done
+
+    if skipped:
+        skip_workflow_nodes(request, skipped)
+    if done:
+        on_workflow_completed.delay(None, id=id, file_name=file_name, digest=digest)
+
+
+def skip_workflow_nodes(request, nodes):
+    """
+    Creates the ValidationTasks of blocked workflow nodes as skipped, in one transaction, and advances progress once.
+    """
+    now = timezone.now()
+    tasks, increment = [], 0
+    for node in nodes:
+        for task_type in workflow_node_types(node):
+            reason = f"Skipped due to fail in blocking tasks: {', '.join(get_invalid_blockers(request, task_type))}"
+            tasks.append(ValidationTask(
+                request=request,
+                type=task_type,
+                status=ValidationTask.Status.SKIPPED,
+                status_reason=reason,
+                progress=100,
+                started=now,
+                ended=now,
+            ))
+            increment += task_registry[task_type].increment
+    ValidationTask.objects.bulk_create(tasks)
+    logger.debug(f"Skipped {len(tasks)} task(s) of request {request.id}: {', '.join(t.type for t in tasks)}")
+    increment_progress(request.id, increment)
+
+
 instance_completion_subtask = task_factory(ValidationTask.Type.INSTANCE_COMPLETION)
 
 normative_rules_ia_validation_subtask = task_factory(ValidationTask.Type.NORMATIVE_IA)
@@ -318,3 +594,42 @@ bsdd_validation_subtask = task_factory(ValidationTask.Type.BSDD)
 industry_practices_subtask = task_factory(ValidationTask.Type.INDUSTRY_PRACTICES)
 
 magic_clamav_subtask = task_factory(ValidationTask.Type.MAGIC_AND_CLAMAV, queue='antivirus')
+
+
+FUSED_GHERKIN_NODE = 'GHERKIN_FUSED'
+
+WORKFLOW_NODES = {
+    node_of(ValidationTask.Type.MAGIC_AND_CLAMAV): magic_clamav_subtask,
+    node_of(ValidationTask.Type.HEADER_SYNTAX): header_syntax_validation_subtask,
+    node_of(ValidationTask.Type.HEADER): header_validation_subtask,
+    node_of(ValidationTask.Type.SYNTAX): syntax_validation_subtask,
+    node_of(ValidationTask.Type.PREREQUISITES): prerequisites_subtask,
+    node_of(ValidationTask.Type.DIGITAL_SIGNATURES): digital_signatures_subtask,
+    node_of(ValidationTask.Type.SCHEMA): schema_validation_subtask,
+    # node_of(ValidationTask.Type.BSDD): bsdd_validation_subtask, # disabled
+    node_of(ValidationTask.Type.NORMATIVE_IA): normative_rules_ia_validation_subtask,
+    node_of(ValidationTask.Type.NORMATIVE_IP): normative_rules_ip_validation_subtask,
+    node_of(ValidationTask.Type.INDUSTRY_PRACTICES): industry_practices_subtask,
+    node_of(ValidationTask.Type.INSTANCE_COMPLETION): instance_completion_subtask,
+    FUSED_GHERKIN_NODE: gherkin_rules_fused_subtask,
+}
+
+
+def workflow_node_types(node):
+    if node == FUSED_GHERKIN_NODE:
+        return FUSED_GHERKIN_TASK_TYPES
+    return [ValidationTask.Type(node)]
+
+
+def workflow_node_cost(node):
+    # progress increments approximate the relative duration of tasks
+    return sum(task_registry[t].increment for t in workflow_node_types(node))
+
+
+workflow_dag = WorkflowDag(
+    build_dag(
+        [t for t in task_registry.all() if node_of(t) in WORKFLOW_NODES],
+        fused={FUSED_GHERKIN_NODE: FUSED_GHERKIN_TASK_TYPES} if GHERKIN_FUSED_EXECUTION else None,
+    ),
+    cost=workflow_node_cost,
+)
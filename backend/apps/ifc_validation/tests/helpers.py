@@ -0,0 +1,139 @@
+import os
+import sys
+import time
+import tempfile
+import contextlib
+import subprocess
+from unittest import mock
+
+CHECK_DAEMON = os.path.join(os.path.dirname(__file__), "..", "checks", "check_daemon.py")
+
+
+@contextlib.contextmanager
+def check_daemon():
+    """
+    Runs a check daemon (without preloaded modules) for the duration of the block; yields its socket path.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        socket_path = os.path.join(tmp, "check-daemon.sock")
+        daemon = subprocess.Popen([sys.executable, CHECK_DAEMON, "--socket", socket_path, "--preload"], stderr=subprocess.DEVNULL)
+        try:
+            deadline = time.monotonic() + 10
+            while not os.path.exists(socket_path):
+                if daemon.poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError("Check daemon did not start")
+                time.sleep(0.05)
+            yield socket_path
+        finally:
+            daemon.terminate()
+            daemon.wait(timeout=10)
+
+
+def without_user_permits(cls):
+    """
+    Class decorator that replaces the redis-backed user semaphore (see core.redis_lock), so tests stay hermetic.
+    """
+    from ..tasks import task_runner
+
+    stubs = {
+        "acquire_user_permit": lambda *args, **kwargs: (True, []),
+        "refresh_user_permit": lambda *args, **kwargs: True,
+        "release_user_permit": lambda *args, **kwargs: [],
+    }
+    for name, stub in stubs.items():
+        cls = mock.patch.object(task_runner, name, stub)(cls)
+    return cls
+
+
+class FakeRedis:
+    """
+    In-memory stand-in for the (decoded) Redis commands used by the chart cache, the scheduler and the workflow DAG.
+    Values are stored as strings, scores as given.
+    """
+
+    def __init__(self):
+        self.data = {}
+
+    def pipeline(self):
+        # commands are applied at once
+        return mock.MagicMock(**{"__enter__.return_value": self})
+
+    def execute(self):
+        return []
+
+    def lock(self, *args, **kwargs):
+        return contextlib.nullcontext()
+
+    def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+    def expire(self, key, ttl):
+        pass
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None, nx=False):
+        if nx and key in self.data:
+            return None
+        self.data[key] = str(value)
+        return True
+
+    def incr(self, key):
+        value = int(self.data.get(key, 0)) + 1
+        self.data[key] = str(value)
+        return value
+
+    def llen(self, key):
+        return len(self.data.get(key, []))
+
+    def hget(self, key, field):
+        return self.data.get(key, {}).get(field)
+
+    def hset(self, key, field=None, value=None, mapping=None):
+        h = self.data.setdefault(key, {})
+        if field is not None:
+            h[field] = str(value)
+        h.update({k: str(v) for k, v in (mapping or {}).items()})
+
+    def hdel(self, key, field):
+        self.data.get(key, {}).pop(field, None)
+
+    def hincrby(self, key, field, amount=1):
+        h = self.data.setdefault(key, {})
+        value = int(h.get(field, 0)) + amount
+        h[field] = str(value)
+        return value
+
+    def hgetall(self, key):
+        return dict(self.data.get(key, {}))
+
+    def sadd(self, key, member):
+        members = self.data.setdefault(key, set())
+        added = str(member) not in members
+        members.add(str(member))
+        return int(added)
+
+    def srem(self, key, member):
+        self.data.get(key, set()).discard(str(member))
+
+    def smembers(self, key):
+        return set(self.data.get(key, set()))
+
+    def zadd(self, key, mapping, xx=False):
+        members = self.data.setdefault(key, {})
+        members.update({k: v for k, v in mapping.items() if not xx or k in members})
+
+    def zrem(self, key, member):
+        return int(self.data.get(key, {}).pop(member, None) is not None)
+
+    def zcard(self, key):
+        return len(self.data.get(key, {}))
+
+    def zrange(self, key, start, end, withscores=False):
+        items = sorted(self.data.get(key, {}).items(), key=lambda kv: (kv[1], kv[0]))[start:end + 1 or None]
+        return items if withscores else [k for k, _ in items]
+
+    def zrangebyscore(self, key, low, high):
+        return [k for k, v in self.data.get(key, {}).items() if low <= v <= high]
@@ -0,0 +1,54 @@
+import tempfile
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+
+from apps.ifc_validation import submission
+from apps.ifc_validation.models import ValidationBatch
+from apps.ifc_validation_models.models import ValidationRequest, set_user_context
+
+import apps.ifc_validation.signals as signals
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class BatchSubmissionTestCase(TestCase):
+    """Files of a batch are inserted at once and their workflows are published as one group after commit."""
+
+    def setUp(self):
+        self.user, _ = User.objects.get_or_create(
+            id=1, defaults={"username": "SYSTEM", "is_active": True}
+        )
+        set_user_context(self.user)
+
+    def _files(self, n):
+        return [SimpleUploadedFile(f"file_{i}.ifc", b"ISO-10303-21;" * (i + 1)) for i in range(n)]
+
+    def test_batch_is_inserted_and_published_as_one_group(self):
+        with mock.patch.object(submission, "group") as group, \
+             mock.patch.object(signals, "publish_request_changed") as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                batch, requests = submission.submit_batch(self.user, self._files(3), channel="API", force=True)
+                group.return_value.apply_async.assert_not_called()  # not before commit
+
+        group.return_value.apply_async.assert_called_once_with()
+        self.assertEqual(len(list(group.call_args.args[0])), 3)
+        self.assertEqual(publish.call_count, 3)  # signals are sent for bulk inserted requests
+
+        self.assertEqual(batch.request_ids, [r.id for r in requests])
+        self.assertEqual(
+            list(ValidationRequest.objects.filter(id__in=batch.request_ids).values_list("file_name", "size", "created_by_id")),
+            [("file_0.ifc", 13, 1), ("file_1.ifc", 26, 1), ("file_2.ifc", 39, 1)],
+        )
+
+    def test_progress_is_aggregated(self):
+        with mock.patch.object(submission, "group"):
+            batch, requests = submission.submit_batch(self.user, self._files(2), channel="WEBUI")
+
+        progress = submission.batch_progress(ValidationBatch.objects.get(pk=batch.pk))
+        self.assertEqual((progress["total"], progress["finished"]), (2, False))
+
+        ValidationRequest.objects.filter(id__in=batch.request_ids).update(status="COMPLETED", progress=100)
+        progress = submission.batch_progress(batch)
+        self.assertEqual((progress["status"], progress["progress"], progress["finished"]), ({"COMPLETED": 2}, 100, True))
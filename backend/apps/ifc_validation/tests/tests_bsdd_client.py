@@ -0,0 +1,185 @@
+import os
+import io
+import json
+import tempfile
+import threading
+import contextlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import ifcopenshell
+from django.test import SimpleTestCase
+from unittest import mock
+
+from apps.ifc_validation.checks import check_bsdd
+from apps.ifc_validation.checks.bsdd_client import BsddClient, ResponseCache
+
+CLASS_URI = "https://identifier.buildingsmart.org/uri/buildingsmart/ifc/4.3/class/IfcWall"
+PROPERTY_URI = "https://identifier.buildingsmart.org/uri/buildingsmart/ifc/4.3/prop/FireRating"
+UNKNOWN_URI = "https://identifier.buildingsmart.org/uri/buildingsmart/ifc/4.3/class/IfcUnknown"
+DICTIONARY_URI = "https://identifier.buildingsmart.org/uri/buildingsmart/ifc/4.3"
+
+
+class StandInBsdd(ThreadingHTTPServer):
+    """
+    Local stand-in for the bSDD API: serves items by path and 'uri' parameter, with ETags.
+    """
+
+    def __init__(self, items):
+        self.items = items
+        self.requests = []
+        super().__init__(("127.0.0.1", 0), StandInHandler)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *args):
+        self.shutdown()
+        self.server_close()
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        uri = parse_qs(url.query).get("uri", [None])[0]
+        self.server.requests.append((url.path, uri, self.headers.get("If-None-Match")))
+
+        item = self.server.items.get(url.path, {}).get(uri)
+        if item is None:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        etag = f'"{hash(json.dumps(item, sort_keys=True))}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        body = json.dumps(item).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class BsddClientTestCase(SimpleTestCase):
+
+    ITEMS = {
+        "/api/Class/v1": {CLASS_URI: {"uri": CLASS_URI, "name": "Wall", "relatedIfcEntityNames": ["IfcWall"]}},
+        "/api/Property/v4": {PROPERTY_URI: {"uri": PROPERTY_URI, "name": "FireRating", "dataType": "String", "propertyValueKind": "Single"}},
+    }
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.cache_path = os.path.join(tmp.name, "bsdd-cache.sqlite3")
+
+    def test_lookups_are_cached_across_clients(self):
+        with StandInBsdd(self.ITEMS) as server:
+            client = BsddClient(base_url=server.url, cache=ResponseCache(self.cache_path))
+            self.assertEqual(client.find_class_by_uri(CLASS_URI)["name"], "Wall")
+            self.assertEqual(client.find_property_by_uri(PROPERTY_URI)["dataType"], "String")
+            self.assertIsNone(client.find_class_by_uri(UNKNOWN_URI))
+            self.assertEqual(len(server.requests), 3)
+
+            # e.g. the next check run, in another process
+            client = BsddClient(base_url=server.url, cache=ResponseCache(self.cache_path))
+            self.assertEqual(client.find_class_by_uri(CLASS_URI)["name"], "Wall")
+            self.assertIsNone(client.find_class_by_uri(UNKNOWN_URI))
+            self.assertEqual(len(server.requests), 3)
+
+    def test_stale_entries_are_revalidated(self):
+        with StandInBsdd(self.ITEMS) as server:
+            client = BsddClient(base_url=server.url, cache=ResponseCache(self.cache_path, ttl=0))
+            client.find_class_by_uri(CLASS_URI)
+            self.assertEqual(client.find_class_by_uri(CLASS_URI)["name"], "Wall")
+
+            (_, _, first), (_, _, second) = server.requests
+            self.assertIsNone(first)
+            self.assertIsNotNone(second)
+
+    def test_concurrent_lookups(self):
+        with StandInBsdd(self.ITEMS) as server:
+            client = BsddClient(base_url=server.url, cache=ResponseCache(self.cache_path), max_workers=4)
+            classes = client.find_classes_by_uri([CLASS_URI, UNKNOWN_URI, CLASS_URI])
+
+            self.assertEqual(list(classes), [CLASS_URI, UNKNOWN_URI])
+            self.assertEqual(classes[CLASS_URI]["name"], "Wall")
+            self.assertIsNone(classes[UNKNOWN_URI])
+            self.assertEqual(len(server.requests), 2)
+
+
+class PerReferenceClient(BsddClient):
+    """
+    Looks up every reference on its own, duplicates included, as check_bsdd did before batching.
+    """
+
+    def get_many(self, path, param, values):
+        results = {}
+        for value in values:
+            results[value] = self.get(path, {param: value})
+        return results
+
+
+class CheckBsddTestCase(SimpleTestCase):
+
+    ITEMS = {
+        **BsddClientTestCase.ITEMS,
+        "/api/Dictionary/v1": {DICTIONARY_URI: {"count": 1, "dictionaries": [{"uri": DICTIONARY_URI, "name": "IFC", "version": "4.3"}]}},
+    }
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = tmp.name
+
+        # a dictionary, classes and properties that reference the same uris more than once
+        f = ifcopenshell.file(schema="IFC4")
+        dictionary = f.createIfcClassification(Name="IFC", Edition="4.3", Location=DICTIONARY_URI)
+        for name, uri in (("Wall", CLASS_URI), ("Wall", CLASS_URI), ("Unknown", UNKNOWN_URI), ("Wall", CLASS_URI)):
+            f.createIfcClassificationReference(Location=uri, Name=name, ReferencedSource=dictionary)
+        for _ in range(3):
+            f.createIfcPropertySingleValue(Name="FireRating", Description=PROPERTY_URI, NominalValue=f.createIfcLabel("EI60"))
+        self.file_name = os.path.join(self.tmp, "bsdd.ifc")
+        f.write(self.file_name)
+
+    def perform(self, client):
+        out = io.StringIO()
+        # perform() runs as a script and exits when done
+        with mock.patch.object(check_bsdd, "client", client), contextlib.redirect_stdout(out), self.assertRaises(SystemExit):
+            check_bsdd.perform(self.file_name, task_id=1, verbose=True)
+        return json.loads(out.getvalue())
+
+    def test_each_uri_is_requested_once(self):
+        with StandInBsdd(self.ITEMS) as server:
+            results = self.perform(BsddClient(base_url=server.url, cache=ResponseCache(os.path.join(self.tmp, "cache.sqlite3"))))
+            requested = sorted(uri for _, uri, _ in server.requests)
+
+        self.assertEqual(requested, sorted([DICTIONARY_URI, CLASS_URI, UNKNOWN_URI, PROPERTY_URI]))
+        self.assertEqual([c["class_in_bsdd"] for c in results["classes"]], [True, True, False, True])
+        self.assertEqual({p["property_bsdd_datatype"] for p in results["properties"]}, {"String"})
+        self.assertTrue(results["dictionaries"][0]["dictionary_in_bsdd"])
+
+    def test_output_is_unchanged(self):
+        with StandInBsdd(self.ITEMS) as server:
+            batched = self.perform(BsddClient(base_url=server.url, cache=ResponseCache(os.path.join(self.tmp, "batched.sqlite3"))))
+            per_reference = self.perform(PerReferenceClient(base_url=server.url, cache=ResponseCache(os.path.join(self.tmp, "single.sqlite3"), ttl=0)))
+            self.assertEqual(len(server.requests), 4 + 1 + 4 + 3)
+
+        self.assertEqual(batched, per_reference)
@@ -0,0 +1,52 @@
+import datetime as dt
+import json
+from unittest import mock
+
+from django.http import JsonResponse
+from django.test import RequestFactory, SimpleTestCase
+
+from apps.ifc_validation import chart_cache
+from .helpers import FakeRedis
+
+
+class ChartCacheTestCase(SimpleTestCase):
+    """Chart responses are cached per (endpoint, year, period, window)."""
+
+    def setUp(self):
+        self.rf = RequestFactory()
+        self.calls = 0
+        for patcher in (
+            mock.patch.object(chart_cache, "redis_client", FakeRedis()),
+            mock.patch.object(chart_cache, "CHART_CACHE_ENABLED", True),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        @chart_cache.cached_chart
+        def get_some_chart(request, year):
+            self.calls += 1
+            return JsonResponse({"calls": self.calls, "year": year})
+
+        self.view = get_some_chart
+
+    def _get(self, year, **params):
+        response = self.view(self.rf.get("/api/charts/some/", params), year=year)
+        return response["X-Cache"], json.loads(response.content)
+
+    def test_hits_and_misses_per_key(self):
+        self.assertEqual(self._get(2020, period="month"), ("MISS", {"calls": 1, "year": 2020}))
+        self.assertEqual(self._get(2020, period="month"), ("HIT", {"calls": 1, "year": 2020}))
+        self.assertEqual(self._get(2020, period="week")[0], "MISS")
+        self.assertEqual(self._get(2020, period="week", window=4)[0], "MISS")
+
+        self.assertEqual(chart_cache.stats(), {"get_some_chart": {"hit": 1, "miss": 3}})
+
+    def test_changes_only_invalidate_current_year(self):
+        current = dt.date.today().year
+        self._get(2020)
+        self._get(current)
+
+        chart_cache.bump_current_generation()
+
+        self.assertEqual(self._get(2020)[0], "HIT")
+        self.assertEqual(self._get(current)[0], "MISS")
@@ -0,0 +1,65 @@
+import datetime as dt
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.ifc_validation import chart_rollups
+from apps.ifc_validation.models import RequestDailyRollup, UploaderDailyRollup
+from apps.ifc_validation_models.models import ValidationRequest, set_user_context
+
+DAY = dt.date(2026, 3, 2)
+
+
+class ChartRollupsTestCase(TestCase):
+    """Daily rollups are recomputed per day and replace the previous rows of that day."""
+
+    def setUp(self):
+        self.user = User.objects.create_user("staff", is_staff=True, is_active=True)
+        set_user_context(self.user)
+
+    def _request(self, status, size, minutes=None):
+        created = timezone.make_aware(dt.datetime(DAY.year, DAY.month, DAY.day, 12, 0))
+        r = ValidationRequest.objects.create(file_name="a.ifc", file="a.ifc", size=size, status=status)
+        ValidationRequest.objects.filter(pk=r.pk).update(
+            created=created,
+            started=created if minutes is not None else None,
+            completed=created + dt.timedelta(minutes=minutes) if minutes is not None else None,
+        )
+        return r
+
+    def test_requests_are_rolled_up_per_day_and_status(self):
+        self._request("COMPLETED", 100, minutes=2)
+        self._request("COMPLETED", 300, minutes=4)
+        failed = self._request("FAILED", 50)
+
+        chart_rollups.refresh_dates([DAY])
+
+        completed = RequestDailyRollup.objects.get(date=DAY, status="COMPLETED")
+        self.assertEqual((completed.count, completed.size_sum, completed.duration_count), (2, 400, 2))
+        self.assertAlmostEqual(completed.duration_sum, 6 * 60)
+        self.assertEqual(RequestDailyRollup.objects.get(date=DAY, status="FAILED").duration_count, 0)
+        self.assertEqual(UploaderDailyRollup.objects.get(date=DAY).count, 3)
+
+        # a refresh replaces the rows of the day
+        ValidationRequest.objects.filter(pk=failed.pk).update(status="COMPLETED")
+        chart_rollups.refresh_dates([DAY])
+        self.assertFalse(RequestDailyRollup.objects.filter(date=DAY, status="FAILED").exists())
+        self.assertEqual(RequestDailyRollup.objects.get(date=DAY, status="COMPLETED").count, 3)
+
+    def test_days_are_bounded_at_midnight(self):
+        for created in (
+            dt.datetime(DAY.year, DAY.month, DAY.day) - dt.timedelta(microseconds=1),
+            dt.datetime(DAY.year, DAY.month, DAY.day),
+            dt.datetime(DAY.year, DAY.month, DAY.day, 23, 59, 59, 999999),
+            dt.datetime(DAY.year, DAY.month, DAY.day) + dt.timedelta(days=1),
+        ):
+            r = ValidationRequest.objects.create(file_name="a.ifc", file="a.ifc", size=1, status="COMPLETED")
+            ValidationRequest.objects.filter(pk=r.pk).update(created=timezone.make_aware(created))
+
+        # consecutive and separate days
+        chart_rollups.refresh_dates([DAY, DAY + dt.timedelta(days=1), DAY + dt.timedelta(days=3)])
+
+        self.assertEqual(UploaderDailyRollup.objects.get(date=DAY).count, 2)
+        self.assertEqual(UploaderDailyRollup.objects.get(date=DAY + dt.timedelta(days=1)).count, 1)
+        self.assertFalse(UploaderDailyRollup.objects.filter(date=DAY - dt.timedelta(days=1)).exists())
@@ -25,7 +25,7 @@ from django.contrib.auth.models import User
 from django.test import RequestFactory, TestCase
 from django.utils import timezone
 
-from apps.ifc_validation import chart_views
+from apps.ifc_validation import chart_cache, chart_views, chart_rollups
 from apps.ifc_validation.chart_views import MONTHS, _rolling_labels, _window_start
 from apps.ifc_validation_models.models import (
     AuthoringTool, Model, ValidationRequest, set_user_context,
@@ -91,6 +91,10 @@ class ChartWindowQueryTests(TestCase):
         self.rf = RequestFactory()
         self.user = User.objects.create_user("staff", is_staff=True, is_active=True)
         set_user_context(self.user)  # required by the models' audit-trail save()
+        # responses of the same (endpoint, year, period, window) differ per test
+        patcher = mock.patch.object(chart_cache, "CHART_CACHE_ENABLED", False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
 
     def _set_created(self, obj, d):
         # `created` is auto_now_add; .update() issues raw SQL and bypasses it.
@@ -121,6 +125,7 @@ class ChartWindowQueryTests(TestCase):
         for name, status, d in rows.values():
             r = ValidationRequest.objects.create(file_name=name, file=name, size=1, status=status)
             self._set_created(r, d)
+        chart_rollups.refresh_dates(chart_rollups.all_dates())  # charts read daily rollups
 
     def test_processing_status_no_window_is_full_year(self):
         self._seed_requests()
@@ -151,6 +156,7 @@ class ChartWindowQueryTests(TestCase):
                 schema="IFC2X3", produced_by=tool, uploaded_by=self.user,
             )
             self._set_created(m, d)
+        chart_rollups.refresh_dates(chart_rollups.all_dates())  # charts read daily rollups
         return tool
 
     def test_top_tools_no_window_counts_full_year(self):
@@ -0,0 +1,75 @@
+import os
+import sys
+import tempfile
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from ..tasks import check_programs
+from ..tasks.check_programs import run_in_check_daemon, run_subprocess
+from .helpers import check_daemon
+
+# echoes its arguments, an environment variable and the working directory; fails with exit code 3
+CHECK = """
+import os, sys
+print(' '.join(sys.argv[1:]), os.environ.get('CHECK_DAEMON_TEST'), os.getcwd())
+print('some warning', file=sys.stderr)
+sys.exit(3)
+"""
+
+
+class CheckDaemonTestCase(SimpleTestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.script = os.path.join(tmp.name, "check.py")
+        with open(self.script, "w") as f:
+            f.write(CHECK)
+        self.command = [sys.executable, self.script, "--file-name", "model.ifc"]
+
+    def test_round_trip(self):
+        started = []
+        with check_daemon() as socket_path:
+            proc = run_in_check_daemon(
+                self.command,
+                socket_path,
+                env={**os.environ, "CHECK_DAEMON_TEST": "value"},
+                on_started=started.append
+            )
+
+        self.assertEqual(proc.returncode, 3)
+        self.assertEqual(proc.stdout, f"--file-name model.ifc value {os.getcwd()}\n")
+        self.assertEqual(proc.stderr, "some warning\n")
+        self.assertEqual(len(started), 1)
+
+    def test_missing_socket_is_not_used(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            self.assertIsNone(run_in_check_daemon(self.command, os.path.join(tmp, "missing.sock")))
+        self.assertIsNone(run_in_check_daemon(self.command, None))
+
+    def test_run_subprocess_uses_check_daemon(self):
+        task = mock.Mock()
+        with check_daemon() as socket_path, \
+             mock.patch.object(check_programs, "CHECK_DAEMON_SOCKET", socket_path), \
+             mock.patch.object(check_programs, "record_usage") as record_usage, \
+             mock.patch.object(check_programs, "run_subprocess_wait") as run_subprocess_wait:
+            proc = run_subprocess(task, self.command)
+
+        self.assertEqual((proc.returncode, proc.stderr), (3, "some warning\n"))
+        run_subprocess_wait.assert_not_called()
+        record_usage.assert_called_once_with(task, mock.ANY, 3)
+        # the pid of the forked check, for the task to be killed on timeout
+        self.assertIsNotNone(task.set_process_details.call_args.args[0])
+
+    def test_run_subprocess_falls_back_without_check_daemon(self):
+        task = mock.Mock()
+        with tempfile.TemporaryDirectory() as tmp, \
+             mock.patch.object(check_programs, "CHECK_DAEMON_SOCKET", os.path.join(tmp, "missing.sock")), \
+             mock.patch.object(check_programs, "record_usage") as record_usage:
+            proc = run_subprocess(task, self.command)
+
+        self.assertEqual(proc.returncode, 3)
+        self.assertEqual(proc.stdout.split()[:2], ["--file-name", "model.ifc"])
+        self.assertEqual(proc.stderr, "some warning\n")
+        record_usage.assert_called_once_with(task, mock.ANY, 3)
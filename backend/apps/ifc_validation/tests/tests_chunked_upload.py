@@ -0,0 +1,104 @@
+import io
+import os
+import fcntl
+import hashlib
+import tempfile
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.ifc_validation import chunked_upload
+from apps.ifc_validation.models import ChunkedUpload
+from apps.ifc_validation_models.models import ValidationRequest, set_user_context
+
+MEDIA_ROOT = tempfile.mkdtemp()
+CONTENT = b"ISO-10303-21;\nHEADER;\nENDSEC;\nDATA;\nENDSEC;\nEND-ISO-10303-21;\n"
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+@mock.patch.object(chunked_upload, "UPLOADS_DIR", os.path.join(MEDIA_ROOT, "uploads"))
+class ChunkedUploadTestCase(TestCase):
+    """Chunks are appended at the current offset; the last one assembles a Validation Request."""
+
+    def setUp(self):
+        self.user, _ = User.objects.get_or_create(
+            id=1, defaults={"username": "SYSTEM", "is_active": True}
+        )
+        set_user_context(self.user)
+
+    def test_resumable_upload_is_assembled(self):
+        upload = chunked_upload.create_upload(self.user, "model.ifc", len(CONTENT))
+
+        with mock.patch.object(chunked_upload, "ifc_file_validation_task") as task:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.assertEqual(chunked_upload.append_chunk(upload, 0, io.BytesIO(CONTENT[:20])), 20)
+
+                # a retried (or stale) chunk doesn't match the current offset
+                with self.assertRaises(chunked_upload.UploadOffsetMismatch):
+                    chunked_upload.append_chunk(upload, 0, io.BytesIO(CONTENT[:20]))
+
+                checksum = hashlib.sha256(CONTENT[20:]).digest()
+                chunked_upload.append_chunk(upload, 20, io.BytesIO(CONTENT[20:]), checksum=checksum)
+
+        request = ValidationRequest.objects.get(pk=upload.request_id)
+        self.assertEqual((request.file_name, request.size, request.channel), ("model.ifc", len(CONTENT), "API"))
+        with open(os.path.join(MEDIA_ROOT, request.file.name), "rb") as f:
+            self.assertEqual(f.read(), CONTENT)
+        self.assertFalse(os.path.exists(chunked_upload.part_path(upload)))
+        task.delay.assert_called_once_with(request.id, "model.ifc", force=False)
+
+    def test_chunk_with_wrong_checksum_is_discarded(self):
+        upload = chunked_upload.create_upload(self.user, "model.ifc", len(CONTENT))
+
+        with self.assertRaises(chunked_upload.UploadChecksumMismatch):
+            chunked_upload.append_chunk(upload, 0, io.BytesIO(CONTENT[:20]), checksum=b"\x00" * 32)
+
+        upload.refresh_from_db()
+        self.assertEqual(upload.offset, 0)
+        self.assertEqual(os.path.getsize(chunked_upload.part_path(upload)), 0)
+
+    def test_chunk_beyond_announced_length(self):
+        upload = chunked_upload.create_upload(self.user, "model.ifc", 10)
+
+        with self.assertRaises(chunked_upload.UploadTooLarge):
+            chunked_upload.append_chunk(upload, 0, io.BytesIO(CONTENT))
+        self.assertIsNone(upload.request_id)
+
+    def test_concurrent_chunk_is_rejected(self):
+        upload = chunked_upload.create_upload(self.user, "model.ifc", len(CONTENT))
+
+        # another request is writing a chunk at the same offset
+        with open(chunked_upload.part_path(upload), "rb") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            with self.assertRaises(chunked_upload.UploadOffsetMismatch):
+                chunked_upload.append_chunk(upload, 0, io.BytesIO(CONTENT[:20]))
+
+        # ... and stored it before this request took the lock
+        ChunkedUpload.objects.filter(pk=upload.pk).update(offset=20)
+        with self.assertRaises(chunked_upload.UploadOffsetMismatch):
+            chunked_upload.append_chunk(upload, 0, io.BytesIO(CONTENT[:20]))
+        self.assertEqual(os.path.getsize(chunked_upload.part_path(upload)), 0)
+
+    def test_expired_uploads_are_removed(self):
+        expired = chunked_upload.create_upload(self.user, "expired.ifc", len(CONTENT))
+        active = chunked_upload.create_upload(self.user, "active.ifc", len(CONTENT))
+        orphan = os.path.join(chunked_upload.UPLOADS_DIR, "orphan.part")
+        open(orphan, "wb").close()
+
+        long_ago = timezone.now() - timezone.timedelta(hours=chunked_upload.CHUNKED_UPLOAD_EXPIRY_HOURS + 1)
+        ChunkedUpload.objects.filter(pk=expired.pk).update(updated=long_ago)
+        os.utime(orphan, (long_ago.timestamp(), long_ago.timestamp()))
+        expired.refresh_from_db()
+        self.assertTrue(chunked_upload.is_expired(expired))
+        self.assertFalse(chunked_upload.is_expired(active))
+
+        self.assertEqual(chunked_upload.remove_expired_uploads(dry_run=True), 2)
+        self.assertTrue(os.path.exists(chunked_upload.part_path(expired)))
+
+        self.assertEqual(chunked_upload.remove_expired_uploads(), 2)
+        self.assertFalse(ChunkedUpload.objects.filter(pk=expired.pk).exists())
+        self.assertFalse(os.path.exists(chunked_upload.part_path(expired)))
+        self.assertFalse(os.path.exists(orphan))
+        self.assertTrue(os.path.exists(chunked_upload.part_path(active)))
@@ -0,0 +1,103 @@
+from contextlib import ExitStack
+from unittest import mock
+
+from django.test import TransactionTestCase
+from django.contrib.auth.models import User
+
+from apps.ifc_validation_models.models import (
+    ValidationRequest,
+    ValidationTask,
+    set_user_context,
+)
+
+from ..tasks.configs import task_registry
+from ..tasks import gherkin_rules_fused_subtask
+import apps.ifc_validation.tasks.task_runner as task_runner
+from .helpers import without_user_permits
+
+
+@without_user_permits
+class GherkinFusedTaskTestCase(TransactionTestCase):
+    """The fused gherkin task runs IA, IP and industry practices in one check program,
+    but must still report status and progress per ValidationTask."""
+
+    def setUp(self):
+        user, _ = User.objects.get_or_create(
+            id=1, defaults={"username": "SYSTEM", "is_active": True}
+        )
+        set_user_context(user)
+
+    def _make_request(self):
+        request = ValidationRequest.objects.create(
+            file_name="valid_file.ifc", file="valid_file.ifc", size=280
+        )
+        request.mark_as_initiated()  # progress -> 0
+        return request
+
+    def _run(self, request):
+        gherkin_rules_fused_subtask(
+            prev_result={"is_valid": True, "reason": "test"},
+            id=request.id,
+            file_name=request.file_name,
+        )
+
+    def _patch_process_results(self, stack):
+        for task_type in task_runner.FUSED_GHERKIN_TASK_TYPES:
+            stack.enter_context(
+                mock.patch.object(task_registry[task_type], "process_results", return_value="ok")
+            )
+
+    def _total_increment(self):
+        return sum(task_registry[t].increment for t in task_runner.FUSED_GHERKIN_TASK_TYPES)
+
+    def test_fused_task_reports_one_task_per_rule_type(self):
+        request = self._make_request()
+        seen = {}
+
+        def fake_check(contexts):
+            seen["task_types"] = [c.config.type for c in contexts]
+            for context in contexts:
+                context.result = ""
+            return contexts
+
+        with ExitStack() as stack:
+            stack.enter_context(mock.patch.object(task_runner, "check_gherkin_fused", side_effect=fake_check))
+            self._patch_process_results(stack)
+            self._run(request)
+
+        # single execution for all rule types
+        self.assertEqual(seen["task_types"], task_runner.FUSED_GHERKIN_TASK_TYPES)
+
+        tasks = ValidationTask.objects.filter(request_id=request.id)
+        self.assertEqual(
+            sorted(t.type for t in tasks),
+            sorted(task_runner.FUSED_GHERKIN_TASK_TYPES)
+        )
+        self.assertTrue(all(t.status == ValidationTask.Status.COMPLETED for t in tasks))
+
+        request.refresh_from_db()
+        self.assertEqual(request.progress, self._total_increment())
+
+    def test_failed_rule_type_does_not_advance_its_progress(self):
+        request = self._make_request()
+        failed_type = ValidationTask.Type.NORMATIVE_IP
+
+        def fake_check(contexts):
+            for context in contexts:
+                if context.config.type == failed_type:
+                    context.result = None
+                    context.task.mark_as_failed("boom")
+                else:
+                    context.result = ""
+            return contexts
+
+        with ExitStack() as stack:
+            stack.enter_context(mock.patch.object(task_runner, "check_gherkin_fused", side_effect=fake_check))
+            self._patch_process_results(stack)
+            self._run(request)
+
+        task = ValidationTask.objects.get(request_id=request.id, type=failed_type)
+        self.assertEqual(task.status, ValidationTask.Status.FAILED)
+
+        request.refresh_from_db()
+        self.assertEqual(request.progress, self._total_increment() - task_registry[failed_type].increment)
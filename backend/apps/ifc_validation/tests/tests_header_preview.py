@@ -0,0 +1,96 @@
+import threading
+from unittest import mock
+
+from django.test import RequestFactory, SimpleTestCase
+
+from apps.ifc_validation import header_preview
+from apps.ifc_validation.header_preview import HeaderSniffer, HeaderPreviewUploadHandler, MAX_HEADER_BYTES
+
+HEADER = (
+    b"ISO-10303-21;\n"
+    b"HEADER;\n"
+    b"FILE_DESCRIPTION(('ViewDefinition [CoordinationView]'),'2;1');\n"
+    b"FILE_NAME('model.ifc','2026-10-17T12:00:00',(''),(''),'IfcOpenShell','App - Tool - 1.0','');\n"
+    b"FILE_SCHEMA(('IFC4'));\n"
+    b"ENDSEC;"
+)
+BODY = b"\nDATA;\n#1=IFCPROJECT('0YvctVUKr0kugbFTf53O9L',$,$,$,$,$,$,$,$);\nENDSEC;\nEND-ISO-10303-21;\n"
+
+
+class HeaderSnifferTestCase(SimpleTestCase):
+
+    def test_header_is_returned_once_when_complete(self):
+        sniffer = HeaderSniffer()
+        content = HEADER + BODY
+        results = [sniffer.feed(content[i:i + 16]) for i in range(0, len(content), 16)]
+
+        self.assertEqual([r for r in results if r is not None], [HEADER])
+
+    def test_gives_up_after_max_header_bytes(self):
+        sniffer = HeaderSniffer()
+        self.assertIsNone(sniffer.feed(b"ISO-10303-21;\nHEADER;\n" + b" " * MAX_HEADER_BYTES))
+        self.assertIsNone(sniffer.feed(b"ENDSEC;"))
+        self.assertTrue(sniffer.done)
+
+
+class HeaderPreviewUploadHandlerTestCase(SimpleTestCase):
+    """The preview starts as soon as the header has arrived, while the rest of the file is still streaming."""
+
+    def test_header_available_is_sent_during_upload(self):
+        request = RequestFactory().post("/api/")
+        handler = HeaderPreviewUploadHandler(request)
+        handler.new_file("file", "model.ifc", "application/octet-stream", None)
+
+        with mock.patch.object(header_preview, "start") as start:
+            self.assertEqual(handler.receive_data_chunk(HEADER[:40], 0), HEADER[:40])  # passed on
+            start.assert_not_called()
+            handler.receive_data_chunk(HEADER[40:] + BODY[:10], 40)
+            start.assert_called_once_with(request.header_previews["model.ifc"], HEADER)
+            handler.receive_data_chunk(BODY[10:], len(HEADER) + 10)
+
+        self.assertEqual(start.call_count, 1)
+        self.assertIsNone(handler.file_complete(len(HEADER + BODY)))
+
+    def test_handler_is_added_per_request(self):
+        request = RequestFactory().post("/api/")
+        handlers = len(request.upload_handlers)
+        header_preview.add_upload_handler(request)
+
+        self.assertIsInstance(request.upload_handlers[0], HeaderPreviewUploadHandler)
+        self.assertEqual(len(request.upload_handlers), handlers + 1)
+
+
+class HeaderPreviewTestCase(SimpleTestCase):
+    """Header checks run in-process on the header alone, from a single parse, but off the request."""
+
+    def test_preview_runs_in_background(self):
+        release, stored = threading.Event(), threading.Event()
+
+        def analyze(header):
+            release.wait(5)
+            return {"status": "COMPLETED"}
+
+        with mock.patch.object(header_preview.redis_client, "set", return_value=True), \
+             mock.patch.object(header_preview, "analyze", side_effect=analyze), \
+             mock.patch.object(header_preview, "store", side_effect=lambda *args: stored.set()) as store:
+            header_preview.start("key", HEADER)
+            store.assert_not_called()  # start() returned while the header is being analyzed
+            release.set()
+            self.assertTrue(stored.wait(5))
+
+        store.assert_called_once_with("key", {"status": "COMPLETED"})
+
+    def test_header_is_checked(self):
+        preview = header_preview.analyze(HEADER)
+
+        self.assertTrue(preview["magic_valid"])
+        self.assertTrue(preview["header_syntax_valid"])
+        self.assertEqual(preview["header"]["application_name"], "Tool")
+        self.assertEqual(preview["header"]["schema_identifier"], "IFC4")
+
+    def test_header_syntax_errors_are_reported(self):
+        preview = header_preview.analyze(HEADER.replace(b"'2;1');", b"'2;1';"))
+
+        self.assertFalse(preview["header_syntax_valid"])
+        self.assertIn("Unexpected semicolon", preview["header_syntax_errors"][0])
+        self.assertNotIn("header", preview)
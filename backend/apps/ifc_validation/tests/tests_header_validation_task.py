@@ -1,4 +1,6 @@
 import datetime
+import contextlib
+from unittest import mock
 
 from django.test import TransactionTestCase
 from django.contrib.auth.models import User
@@ -6,6 +8,7 @@ from django.contrib.auth.models import User
 from apps.ifc_validation_models.models import *
 
 from ..tasks import header_validation_subtask
+from ..tasks.processing import header as header_processing
 
 class HeaderValidationTaskTestCase(TransactionTestCase):
 
@@ -207,3 +210,36 @@ class HeaderValidationTaskTestCase(TransactionTestCase):
         self.assertEquals('MyFabTool', model.produced_by.name)
         self.assertEquals('2025.1', model.produced_by.version)
         self.assertEquals('Acme Inc.', model.produced_by.company.name)
+
+    def test_header_validation_task_keeps_concurrent_status_updates(self):
+
+        # arrange
+        HeaderValidationTaskTestCase.set_user_context()
+        request = ValidationRequest.objects.create(
+            file_name='valid_file.ifc',
+            file='valid_file.ifc', 
+            size=1
+        )
+        request.mark_as_initiated()
+
+        original_with_model = header_processing.with_model
+
+        @contextlib.contextmanager
+        def with_model_and_concurrent_update(request_id):
+            with original_with_model(request_id) as model:
+                # e.g. the syntax check, running alongside, finishes after the model was loaded
+                Model.objects.filter(id=model.id).update(status_syntax=Model.Status.INVALID)
+                yield model
+
+        # act
+        with mock.patch.object(header_processing, 'with_model', with_model_and_concurrent_update):
+            header_validation_subtask(
+                prev_result={'is_valid': True, 'reason': 'test'}, 
+                id=request.id, 
+                file_name=request.file_name
+            )
+
+        # assert
+        model = Model.objects.get(id=request.id)
+        self.assertEqual(model.status_syntax, Model.Status.INVALID)
+        self.assertEqual(model.schema, 'IFC4')
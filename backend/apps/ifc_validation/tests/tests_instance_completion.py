@@ -0,0 +1,83 @@
+import os
+import tempfile
+from unittest import mock
+
+from django.test import TestCase
+from django.contrib.auth.models import User
+
+from apps.ifc_validation_models.models import *
+
+from ..tasks.context import TaskContext
+from ..tasks.processing import instance_completion
+
+INSTANCE_COUNT = 5
+CHUNK_SIZE = 2
+
+
+class InstanceCompletionTestCase(TestCase):
+    """ModelInstances are completed in chunks, each committed with the progress of the task."""
+
+    def setUp(self):
+        user, _ = User.objects.get_or_create(id=1, defaults={'username': 'SYSTEM', 'is_active': True})
+        set_user_context(user)
+        self.model = Model.objects.create(file_name='a.ifc', size=1, uploaded_by=user)
+        self.request = ValidationRequest.objects.create(file_name='a.ifc', file='a.ifc', size=1, model=self.model)
+        self.task = ValidationTask.objects.create(request=self.request, type=ValidationTask.Type.INSTANCE_COMPLETION)
+        for step_id in range(1, INSTANCE_COUNT + 1):
+            ModelInstance.objects.create(model=self.model, stepfile_id=step_id)
+        # already completed instances are left alone
+        ModelInstance.objects.create(model=self.model, stepfile_id=100, ifc_type='IfcWall')
+
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.file_path = os.path.join(tmp.name, 'a.ifc')
+        with open(self.file_path, 'w') as f:
+            f.write("ISO-10303-21;\nHEADER;\nFILE_DESCRIPTION((''),'2;1');\nFILE_NAME('','',(''),(''),'','','');\n")
+            f.write("FILE_SCHEMA(('IFC4'));\nENDSEC;\nDATA;\n")
+            for step_id in range(1, INSTANCE_COUNT + 1):
+                f.write(f"#{step_id}=IFCPERSON($,'Person {step_id}',$,$,$,$,$,$);\n")
+            f.write("ENDSEC;\nEND-ISO-10303-21;\n")
+
+    def test_instances_are_completed_in_chunks(self):
+        iter_ifc_types_and_args = instance_completion._iter_ifc_types_and_args
+        progress = []
+
+        def observed(*args):
+            # the progress committed before each instance is handed to the task
+            for record in iter_ifc_types_and_args(*args):
+                progress.append(ValidationTask.objects.get(pk=self.task.id).progress)
+                yield record
+
+        context = TaskContext(config=None, request=self.request, task=self.task, file_path=self.file_path)
+        with mock.patch.object(instance_completion, 'DJANGO_DB_BULK_CREATE_BATCH_SIZE', CHUNK_SIZE), \
+             mock.patch.object(instance_completion, '_iter_ifc_types_and_args', observed):
+            result = instance_completion.process_instance_completion(context)
+
+        self.assertEqual(result, f'Updated {INSTANCE_COUNT} ModelInstance record(s)')
+        # 3 chunks: 2 + 2 + 1 instances
+        self.assertEqual(progress, [0, 0, 40, 40, 80])
+        self.assertEqual(ValidationTask.objects.get(pk=self.task.id).progress, 100)
+
+        instances = ModelInstance.objects.filter(model=self.model).order_by('stepfile_id')
+        self.assertEqual([i.ifc_type for i in instances], ['IfcPerson'] * INSTANCE_COUNT + ['IfcWall'])
+        self.assertEqual(instances.get(stepfile_id=3).fields, {'FamilyName': 'Person 3'})
+
+    def test_completed_chunks_are_kept_when_the_task_fails(self):
+        iter_ifc_types_and_args = instance_completion._iter_ifc_types_and_args
+
+        def failing(*args):
+            for i, record in enumerate(iter_ifc_types_and_args(*args)):
+                if i == CHUNK_SIZE + 1:
+                    raise RuntimeError("Subprocess exited with code 1")
+                yield record
+
+        context = TaskContext(config=None, request=self.request, task=self.task, file_path=self.file_path)
+        with mock.patch.object(instance_completion, 'DJANGO_DB_BULK_CREATE_BATCH_SIZE', CHUNK_SIZE), \
+             mock.patch.object(instance_completion, '_iter_ifc_types_and_args', failing):
+            with self.assertRaises(RuntimeError):
+                instance_completion.process_instance_completion(context)
+
+        self.assertEqual(ValidationTask.objects.get(pk=self.task.id).progress, 40)
+        # the first chunk is committed, a retry completes the rest
+        incomplete = ModelInstance.objects.filter(model=self.model, ifc_type__in=[None, ''])
+        self.assertEqual(incomplete.count(), INSTANCE_COUNT - CHUNK_SIZE)
@@ -2,7 +2,7 @@ from django.core.management import call_command
 from django.contrib.auth.models import User
 from django.test import TransactionTestCase
 
-from core.redis_lock import acquire_user_lock
+from core.redis_lock import new_permit_token, acquire_user_permit, release_user_permit
 
 
 class DisplayUserLocksManagementCommandTestCase(TransactionTestCase):
@@ -23,12 +23,16 @@ class DisplayUserLocksManagementCommandTestCase(TransactionTestCase):
 
         # arrange
         test_user = User.objects.create_user(username='testuser', password='testpass')
-        with acquire_user_lock(user_id=test_user.id, task_name='test_task') as lock:
-            
+        token = new_permit_token()
+        acquire_user_permit(user_id=test_user.id, token=token, payload='{}')
+        try:
+
             # act
             with self.assertLogs(level='INFO') as cm:
                 call_command('display_user_locks')
 
                 # assert
                 print(cm.output)  # for debugging if test fails
-                self.assertTrue(any(f"User ID: {test_user.id}, Task: test_task" in message for message in cm.output))
\ No newline at end of file
+                self.assertTrue(any(f"User ID: {test_user.id}, Permits: 1/" in message for message in cm.output))
+        finally:
+            release_user_permit(user_id=test_user.id, token=token)
\ No newline at end of file
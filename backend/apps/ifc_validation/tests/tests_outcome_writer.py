@@ -0,0 +1,40 @@
+from django.test import TestCase
+from django.contrib.auth.models import User
+
+from apps.ifc_validation_models.models import *
+
+from ..tasks.processing.outcome_writer import OutcomeWriter, SEVERITY_BY_LABEL, OUTCOME_CODE_BY_LABEL
+
+
+class OutcomeWriterTestCase(TestCase):
+
+    def setUp(self):
+        user, _ = User.objects.get_or_create(id=1, defaults={'username': 'SYSTEM', 'is_active': True})
+        set_user_context(user)
+        self.model = Model.objects.create(file_name='a.ifc', size=1, uploaded_by=user)
+        request = ValidationRequest.objects.create(file_name='a.ifc', file='a.ifc', size=1, model=self.model)
+        self.task = ValidationTask.objects.create(request=request, type=ValidationTask.Type.BSDD)
+
+    def test_reverse_choice_maps(self):
+        self.assertEqual(SEVERITY_BY_LABEL['Error'], ValidationOutcome.OutcomeSeverity.ERROR)
+        self.assertEqual(OUTCOME_CODE_BY_LABEL['Passed'], ValidationOutcome.ValidationOutcomeCode.PASSED)
+
+    def test_outcomes_and_instances_are_written_in_batches(self):
+        ModelInstance.objects.create(model=self.model, stepfile_id=1, ifc_type='IfcWall')
+
+        with self.assertNumQueries(6):  # 2 batches x (instances, instance ids, outcomes)
+            with OutcomeWriter(self.task, self.model, batch_size=3) as writer:
+                for stepfile_id in (1, 2, 2, 3, None):
+                    writer.add(
+                        severity=ValidationOutcome.OutcomeSeverity.ERROR,
+                        outcome_code=ValidationOutcome.ValidationOutcomeCode.SCHEMA_ERROR,
+                        stepfile_id=stepfile_id,
+                    )
+
+        self.assertEqual(writer.count, 5)
+        self.assertEqual(self.task.outcomes.count(), 5)
+        self.assertEqual(self.model.instances.count(), 3)
+        self.assertEqual(self.task.outcomes.filter(instance__stepfile_id=2).count(), 2)
+        self.assertEqual(self.task.outcomes.filter(instance=None).count(), 1)
+        # existing instances are reused, not duplicated
+        self.assertEqual(self.model.instances.get(stepfile_id=1).ifc_type, 'IfcWall')
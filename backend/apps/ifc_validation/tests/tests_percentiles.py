@@ -0,0 +1,58 @@
+import datetime as dt
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from apps.ifc_validation.percentiles import RELATIVE_ACCURACY, LogHistogram, duration_percentiles
+from apps.ifc_validation_models.models import ValidationRequest, set_user_context
+
+
+class LogHistogramTestCase(SimpleTestCase):
+
+    def test_quantiles_are_within_relative_accuracy(self):
+        values = [i * 1000 for i in range(1, 1001)]
+        histogram = LogHistogram()
+        for v in values:
+            histogram.add(v)
+
+        for q, expected in ((0.5, 500_500), (0.9, 900_100), (0.99, 990_010)):
+            self.assertAlmostEqual(histogram.quantile(q), expected, delta=expected * RELATIVE_ACCURACY * 2)
+
+    def test_empty_histogram(self):
+        self.assertIsNone(LogHistogram().quantile(0.5))
+
+
+class DurationPercentilesTestCase(TestCase):
+    """Percentiles are computed in the database, without fetching rows."""
+
+    def setUp(self):
+        user = User.objects.create_user("staff", is_staff=True, is_active=True)
+        set_user_context(user)
+
+    def _request(self, channel, queued_seconds):
+        created = timezone.make_aware(dt.datetime(2026, 3, 2, 12, 0))
+        r = ValidationRequest.objects.create(file_name="a.ifc", file="a.ifc", size=1, channel=channel)
+        ValidationRequest.objects.filter(pk=r.pk).update(
+            created=created,
+            started=created + dt.timedelta(seconds=queued_seconds) if queued_seconds is not None else None,
+        )
+
+    def test_percentiles_per_group(self):
+        for s in range(1, 101):
+            self._request("WEBUI", s)
+        self._request("API", 60)
+        self._request("API", None)  # not started
+        self._request("API", -5)    # clock skew
+
+        with self.assertNumQueries(1):
+            result = duration_percentiles(ValidationRequest.objects.all(), "created", "started", by=["channel"])
+
+        self.assertEqual(set(result), {"WEBUI", "API"})
+        self.assertAlmostEqual(result["API"][50], 60, delta=60 * RELATIVE_ACCURACY)
+        self.assertAlmostEqual(result["WEBUI"][50], 50.5, delta=50.5 * RELATIVE_ACCURACY * 2)
+        self.assertAlmostEqual(result["WEBUI"][95], 95.05, delta=95.05 * RELATIVE_ACCURACY * 2)
+        self.assertAlmostEqual(result["WEBUI"][99], 99.01, delta=99.01 * RELATIVE_ACCURACY * 2)
+
+    def test_no_rows(self):
+        self.assertEqual(duration_percentiles(ValidationRequest.objects.none(), "created", "started"), {})
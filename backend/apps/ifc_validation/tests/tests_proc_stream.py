@@ -0,0 +1,96 @@
+import signal
+import subprocess
+import sys
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from ..tasks import check_programs
+from ..tasks.check_programs import proc_stream, run_subprocess_stream
+
+# prints a record, waits for a line on stdin, then prints the rest (and a line that is not JSON)
+INTERACTIVE = """
+import sys
+print('{"id": 1}', flush=True)
+sys.stdin.readline()
+print('not json')
+print('{"id": 2}')
+"""
+
+# prints a record, then keeps running
+ENDLESS = """
+import time
+print('{"id": 1}', flush=True)
+time.sleep(60)
+"""
+
+# fills the stderr pipe several times over before exiting with an error
+FAILING = """
+import sys
+print('{"id": 1}')
+sys.stderr.write('x' * 200000 + '\\n')
+sys.stderr.write('some error\\n')
+sys.exit(2)
+"""
+
+
+class ProcStreamTestCase(SimpleTestCase):
+
+    def test_records_are_parsed_while_the_process_runs(self):
+        stream = proc_stream([sys.executable, "-c", INTERACTIVE], stdin=subprocess.PIPE)
+        records = iter(stream)
+
+        self.assertEqual(next(records), {"id": 1})
+        self.assertIsNone(stream._process.poll())
+
+        stream._process.stdin.write("\n")
+        stream._process.stdin.close()
+        self.assertEqual(list(records), [{"id": 2}])
+        self.assertEqual(stream.count, 2)
+        self.assertEqual(stream.returncode, 0)
+        self.assertEqual(stream.stderr, "")
+
+    def test_process_is_terminated_when_the_consumer_stops_early(self):
+        stream = proc_stream([sys.executable, "-c", ENDLESS])
+        records = iter(stream)
+        start = time.monotonic()
+
+        self.assertEqual(next(records), {"id": 1})
+        records.close()
+
+        self.assertLess(time.monotonic() - start, 10)
+        self.assertEqual(stream.returncode, -signal.SIGTERM)
+        self.assertEqual(stream.count, 1)
+
+    def test_returncode_and_stderr_are_available_after_exhausting(self):
+        stream = proc_stream([sys.executable, "-c", FAILING])
+
+        self.assertIsNone(stream.returncode)
+        self.assertEqual(list(stream), [{"id": 1}])
+        self.assertEqual(stream.returncode, 2)
+        self.assertTrue(stream.stderr.endswith("some error\n"))
+        self.assertEqual(len(stream.stderr), 200000 + len("\nsome error\n"))
+
+
+class RunSubprocessStreamTestCase(SimpleTestCase):
+
+    def test_usage_is_recorded_with_returncode(self):
+        task = mock.Mock()
+        command = [sys.executable, "-c", FAILING]
+        with mock.patch.object(check_programs, "record_usage") as record_usage:
+            stream = run_subprocess_stream(task, command)
+            self.assertEqual(list(stream), [{"id": 1}])
+
+        task.set_process_details.assert_called_once_with(None, command)
+        record_usage.assert_called_once_with(task, mock.ANY, 2)
+        self.assertIn("some error", stream.stderr)
+
+    def test_task_is_failed_when_the_process_cannot_start(self):
+        task = mock.Mock()
+        with mock.patch.object(check_programs, "record_usage") as record_usage:
+            with self.assertRaises(FileNotFoundError):
+                run_subprocess_stream(task, ["/nonexistent/check"])
+
+        task.mark_as_failed.assert_called_once()
+        record_usage.assert_not_called()
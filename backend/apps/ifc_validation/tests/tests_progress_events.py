@@ -0,0 +1,99 @@
+import time
+from unittest import mock
+
+from django.test import TestCase, SimpleTestCase, RequestFactory
+from django.contrib.auth.models import User
+
+from apps.ifc_validation_models.models import (
+    ValidationRequest,
+    ValidationTask,
+    set_user_context,
+)
+
+import apps.ifc_validation.signals as signals
+from apps.ifc_validation import progress_events
+from apps.ifc_validation.progress_events import acquire_stream, release_stream, streams_key
+from apps.ifc_validation_bff import views_legacy
+
+USER_ID = "test-streams"
+
+
+class ProgressEventsTestCase(TestCase):
+    """Changes to requests and tasks are published (after commit) to the owner's channel,
+    so the dashboard stream only has to load the rows that actually changed."""
+
+    def setUp(self):
+        self.user, _ = User.objects.get_or_create(
+            id=1, defaults={"username": "SYSTEM", "is_active": True}
+        )
+        set_user_context(self.user)
+
+    def test_request_transition_is_published_on_commit(self):
+        with mock.patch.object(signals, "publish_request_changed") as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                request = ValidationRequest.objects.create(
+                    file_name="valid_file.ifc", file="valid_file.ifc", size=280
+                )
+                publish.assert_not_called()  # not before commit
+
+        publish.assert_called_with(request.id, self.user.id)
+
+    def test_task_transition_is_published_for_its_request(self):
+        request = ValidationRequest.objects.create(
+            file_name="valid_file.ifc", file="valid_file.ifc", size=280
+        )
+        with mock.patch.object(signals, "publish_request_changed") as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                task = ValidationTask.objects.create(request=request, type=ValidationTask.Type.SYNTAX)
+                task.mark_as_initiated()
+
+        publish.assert_called_with(request.id, self.user.id)
+
+    def test_task_transition_does_not_load_its_request(self):
+        request = ValidationRequest.objects.create(
+            file_name="valid_file.ifc", file="valid_file.ifc", size=280
+        )
+        task = ValidationTask.objects.create(request=request, type=ValidationTask.Type.SYNTAX)
+        task = ValidationTask.objects.get(pk=task.pk)
+
+        with mock.patch.object(signals, "publish_request_changed") as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                task.mark_as_initiated()
+
+        self.assertFalse(ValidationTask.request.is_cached(task))
+        publish.assert_called_with(request.id, self.user.id)
+
+
+@mock.patch.object(progress_events, "PROGRESS_STREAM_MAX_PER_USER", 2)
+class ProgressStreamLimitTestCase(SimpleTestCase):
+    """Each open stream holds a web worker thread, so the streams of a user are limited."""
+
+    def setUp(self):
+        self.addCleanup(progress_events.redis_client.delete, streams_key(USER_ID))
+
+    def test_streams_are_limited_per_user(self):
+        first = acquire_stream(USER_ID)
+        self.assertIsNotNone(first)
+        self.assertIsNotNone(acquire_stream(USER_ID))
+        self.assertIsNone(acquire_stream(USER_ID))
+
+        release_stream(USER_ID, first)
+        self.assertIsNotNone(acquire_stream(USER_ID))
+
+    def test_streams_that_were_not_released_expire(self):
+        stale = acquire_stream(USER_ID)
+        acquire_stream(USER_ID)
+        progress_events.redis_client.zadd(streams_key(USER_ID), {stale: time.time() - 1})
+
+        self.assertIsNotNone(acquire_stream(USER_ID))
+
+    def test_stream_is_refused_to_inactive_users_and_beyond_the_limit(self):
+        request = RequestFactory().get("/api/models/stream")
+        user = mock.Mock(id=USER_ID, is_active=False)
+        with mock.patch.object(views_legacy, "get_current_user", return_value=user):
+            self.assertIn("redirect", views_legacy.models_stream(request).json())
+
+            user.is_active = True
+            acquire_stream(USER_ID)
+            acquire_stream(USER_ID)
+            self.assertEqual(views_legacy.models_stream(request).status_code, 429)
@@ -1,4 +1,3 @@
-from contextlib import contextmanager
 from unittest import mock
 
 from django.test import TransactionTestCase
@@ -12,16 +11,10 @@ from apps.ifc_validation_models.models import (
 
 from ..tasks.configs import task_registry
 from ..tasks import schema_validation_subtask
-import apps.ifc_validation.tasks.task_runner as task_runner
+from .helpers import without_user_permits
 
 
-@contextmanager
-def _noop_lock(*args, **kwargs):
-    # Replaces the redis-backed user task lock so these tests stay hermetic.
-    yield None
-
-
-@mock.patch.object(task_runner, "acquire_user_lock", _noop_lock)
+@without_user_permits
 class ProgressUpdateTaskTestCase(TransactionTestCase):
     """Progress must advance only after a subtask's work finishes, so a request
     never reports 100% while a task is still running."""
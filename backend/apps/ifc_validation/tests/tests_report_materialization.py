@@ -0,0 +1,124 @@
+import json
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase
+from django.contrib.auth.models import User
+
+from apps.ifc_validation_models.models import *
+
+from apps.ifc_validation import report_cache
+from apps.ifc_validation.models import ReportSection
+from apps.ifc_validation_bff import report
+from core.settings import MAX_OUTCOMES_PER_RULE, REPORT_CACHE_TTL
+
+from .helpers import FakeRedis
+
+S = ValidationOutcome.OutcomeSeverity
+T = ValidationTask.Type
+
+
+class ReportMaterializationTestCase(TestCase):
+    """Report sections are built with a fixed number of queries and read from their materialized form."""
+
+    def setUp(self):
+        user, _ = User.objects.get_or_create(id=1, defaults={'username': 'SYSTEM', 'is_active': True})
+        set_user_context(user)
+        self.request = ValidationRequest.objects.create(file_name='a.ifc', file='a.ifc', size=1)
+
+        ValidationTask.objects.create(request=self.request, type=T.NORMATIVE_IA)  # earlier run, ignored
+        ia = ValidationTask.objects.create(request=self.request, type=T.NORMATIVE_IA)
+        ip = ValidationTask.objects.create(request=self.request, type=T.NORMATIVE_IP)
+        for feature, task, n in (('ALB001 - first', ia, MAX_OUTCOMES_PER_RULE + 5), ('GEM001 - second', ip, 2)):
+            for _ in range(n):
+                ValidationOutcome.objects.create(validation_task=task, severity=S.ERROR, feature=feature)
+
+    def test_gherkin_section_is_capped_per_feature(self):
+        with self.assertNumQueries(3):  # latest tasks, counts, ranked outcomes
+            counts, results = report.map_gherkin(self.request, 'normative', {})
+
+        self.assertEqual(counts, {'ALB001 - first': MAX_OUTCOMES_PER_RULE + 5, 'GEM001 - second': 2})
+        self.assertEqual(len(results), MAX_OUTCOMES_PER_RULE + 2)
+
+    def test_completed_request_is_served_from_materialized_section(self):
+        self.request.mark_as_completed('test')
+
+        with mock.patch.object(report, 'report_cache') as cache:
+            cache.get_section.return_value = None
+            cache.allowlist_generation.return_value = 3
+            content = report.get_section(self.request, 'normative')
+            cache.store_section.assert_called_once_with(self.request.id, 'normative', content, 3)
+
+            cache.get_section.return_value = b'{"instances": {}, "results": {}}'
+            with self.assertNumQueries(0):
+                self.assertEqual(report.get_section(self.request, 'normative'), cache.get_section.return_value)
+
+        self.assertEqual(len(json.loads(content)['results']['norm_rules']['results']), MAX_OUTCOMES_PER_RULE + 2)
+
+    def test_streamed_section_is_paginated_by_cursor(self):
+        records = list(report.iter_section_records(self.request, 'norm_rules', limit=10))
+        self.assertEqual(records[0], {'type': 'counts', 'section': 'norm_rules', 'counts': {'ALB001 - first': MAX_OUTCOMES_PER_RULE + 5, 'GEM001 - second': 2}})
+        self.assertEqual(sum(r['type'] == 'result' for r in records), 10)
+
+        cursor = records[-1]['next_cursor']
+        self.assertIsNotNone(cursor)
+        records = list(report.iter_section_records(self.request, 'norm_rules', cursor=cursor, limit=100))
+        self.assertEqual(records[0]['type'], 'result')  # counts are only sent with the first page
+        self.assertEqual(sum(r['type'] == 'result' for r in records), MAX_OUTCOMES_PER_RULE + 7 - 10)
+        self.assertEqual(records[-1], {'type': 'end', 'section': 'norm_rules', 'next_cursor': None})
+
+    def test_streamed_counts_match_materialized_section(self):
+        self.request.model = Model.objects.create(file_name='a.ifc', size=1, uploaded_by=User.objects.get(id=1))
+        self.request.save()
+        prerequisites = ValidationTask.objects.create(request=self.request, type=T.PREREQUISITES)
+        for feature, n in (('GEM051 - first', 3), ('IFC101 - second', 4), ('SPS001 - third', 1)):
+            for _ in range(n):
+                ValidationOutcome.objects.create(validation_task=prerequisites, severity=S.ERROR, feature=feature)
+
+        # prerequisite features share a title, their outcomes are added up
+        materialized = report.build_section(self.request, 'schema')['results']['prereq_rules']['counts'][0]
+        streamed = next(report.iter_section_records(self.request, 'prereq_rules'))['counts']
+        self.assertEqual(materialized, {'Schema - Version': 8})
+        self.assertEqual(streamed, materialized)
+
+        materialized = report.build_section(self.request, 'normative')['results']['norm_rules']['counts']
+        streamed = next(report.iter_section_records(self.request, 'norm_rules'))['counts']
+        self.assertEqual(streamed, materialized)
+
+
+class ReportCacheTestCase(TestCase):
+    """Materialized sections are stored in the database, per allowlist generation."""
+
+    def setUp(self):
+        patcher = mock.patch.object(report_cache, 'redis_client', FakeRedis())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_sections_are_stale_after_allowlist_change(self):
+        generation = report_cache.allowlist_generation()
+        self.assertEqual(report_cache.allowlist_generation(), generation)
+
+        report_cache.store_section(1, 'schema', b'{"a": 1}', generation)
+        report_cache.store_section(1, 'schema', b'{"a": 2}', generation)
+        self.assertEqual(report_cache.get_section(1, 'schema'), b'{"a": 2}')
+        self.assertEqual(ReportSection.objects.filter(request_id=1).count(), 1)
+
+        report_cache.bump_allowlist_generation()
+        self.assertIsNone(report_cache.get_section(1, 'schema'))
+
+        # a lost counter starts from a later generation, not from 0
+        report_cache.redis_client.delete(report_cache.ALLOWLIST_GENERATION_KEY)
+        self.assertGreater(report_cache.allowlist_generation(), generation)
+
+    def test_invalidate_and_expiry(self):
+        generation = report_cache.allowlist_generation()
+        for request_id in (1, 2):
+            report_cache.store_section(request_id, 'schema', b'{}', generation)
+
+        report_cache.invalidate(1)
+        self.assertIsNone(report_cache.get_section(1, 'schema'))
+
+        ReportSection.objects.update(updated=ReportSection.objects.get().updated - timedelta(seconds=REPORT_CACHE_TTL + 1))
+        self.assertEqual(report_cache.remove_expired_sections(dry_run=True), 1)
+        self.assertEqual(report_cache.remove_expired_sections(), 1)
+        self.assertFalse(ReportSection.objects.exists())
@@ -0,0 +1,80 @@
+import os
+import sys
+import tempfile
+import subprocess
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from apps.ifc_validation import metrics
+from ..tasks.check_programs import run_subprocess_wait, run_in_check_daemon, proc_stream
+from ..tasks.profiling import ResourceProfiler
+from .helpers import check_daemon
+
+MB = 1024 * 1024
+
+# allocates and touches ~200 MB, burns some CPU, then idles so it gets sampled
+CHILD = "import time; b = bytearray(200 * 1024 * 1024); sum(range(10**6)); time.sleep(0.6)"
+
+
+class ResourceProfilerTestCase(SimpleTestCase):
+
+    def test_usage_of_subprocess_is_captured(self):
+        profiler = ResourceProfiler()
+        proc = run_subprocess_wait([sys.executable, "-c", CHILD], stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, profiler=profiler)
+
+        self.assertEqual(proc.returncode, 0)
+        usage = profiler.usage
+        self.assertGreaterEqual(usage.wall_time, 0.6)
+        self.assertGreater(usage.user_cpu + usage.system_cpu, 0)
+        self.assertGreater(usage.peak_rss, 200 * MB)
+
+    def test_usage_of_check_daemon_is_captured(self):
+        with tempfile.TemporaryDirectory() as tmp, check_daemon() as socket_path:
+            script = os.path.join(tmp, "check.py")
+            with open(script, "w") as f:
+                f.write(CHILD)
+            profiler = ResourceProfiler()
+            proc = run_in_check_daemon([sys.executable, script], socket_path, profiler=profiler)
+
+        self.assertEqual(proc.returncode, 0)
+        usage = profiler.usage
+        self.assertGreaterEqual(usage.wall_time, 0.6)
+        self.assertGreater(usage.user_cpu + usage.system_cpu, 0)
+        self.assertGreater(usage.peak_rss, 200 * MB)
+
+    def test_usage_of_stream_is_captured(self):
+        finished = []
+        stream = proc_stream(
+            [sys.executable, "-c", CHILD + "; print('{}')"],
+            profiler=ResourceProfiler(),
+            on_finished=lambda usage, returncode: finished.append((usage, returncode))
+        )
+
+        self.assertEqual(list(stream), [{}])
+        (usage, returncode), = finished
+        self.assertEqual(returncode, 0)
+        self.assertGreaterEqual(usage.wall_time, 0.6)
+        self.assertGreater(usage.user_cpu + usage.system_cpu, 0)
+        self.assertGreater(usage.peak_rss, 200 * MB)
+
+
+class MetricsTestCase(SimpleTestCase):
+
+    def test_histograms_are_cumulative(self):
+        stored = {
+            "SCHEMA|runs": "3",
+            "SCHEMA|user_cpu": "1.5",
+            f"SCHEMA|peak_rss|{64 * MB}": "1",
+            f"SCHEMA|peak_rss|{256 * MB}": "2",
+            "SCHEMA|peak_rss|sum": str(300 * MB),
+        }
+        with mock.patch.object(metrics.redis_client, "hgetall", return_value=stored):
+            text = metrics.render()
+
+        self.assertIn('validation_check_runs_total{task_type="SCHEMA"} 3', text)
+        self.assertIn('validation_check_user_cpu_seconds_total{task_type="SCHEMA"} 1.5', text)
+        self.assertIn(f'validation_check_peak_rss_bytes_bucket{{task_type="SCHEMA",le="{128 * MB}"}} 1', text)
+        self.assertIn(f'validation_check_peak_rss_bytes_bucket{{task_type="SCHEMA",le="{256 * MB}"}} 3', text)
+        self.assertIn('validation_check_peak_rss_bytes_bucket{task_type="SCHEMA",le="+Inf"} 3', text)
+        self.assertIn('validation_check_peak_rss_bytes_count{task_type="SCHEMA"} 3', text)
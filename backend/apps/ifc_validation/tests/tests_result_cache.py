@@ -0,0 +1,84 @@
+import datetime
+
+from django.test import TestCase
+from django.utils import timezone
+from django.contrib.auth.models import User
+
+from apps.ifc_validation_models.models import (
+    Model, ModelInstance, ValidationRequest, ValidationTask, ValidationOutcome, set_user_context,
+)
+
+from ..tasks import result_cache
+
+S = ValidationOutcome.OutcomeSeverity
+T = ValidationTask.Type
+
+
+class ResultCacheCloneTestCase(TestCase):
+    """Results of an identical, earlier validated file are cloned onto a new request."""
+
+    @staticmethod
+    def _user():
+        u, _ = User.objects.get_or_create(id=1, defaults={'username': 'SYSTEM', 'is_active': True})
+        set_user_context(u)
+        return u
+
+    def _source(self):
+        u = self._user()
+        m = Model.objects.create(file_name='a.ifc', size=1, uploaded_by=u, status_schema=Model.Status.INVALID)
+        r = ValidationRequest.objects.create(file_name='a.ifc', file='a.ifc', size=1)
+        r.model = m; r.save()
+        instance = ModelInstance.objects.create(model=m, stepfile_id=5, ifc_type='IfcWall')
+
+        # an older run of the same task type (revalidation) must not be copied
+        ValidationTask.objects.create(request=r, type=T.SCHEMA)
+        started = timezone.now() - datetime.timedelta(days=1)
+        schema = ValidationTask.objects.create(
+            request=r, type=T.SCHEMA, started=started, ended=started, process_id=123, process_cmd='python -m ifcopenshell.validate a.ifc'
+        )
+        ValidationOutcome.objects.create(validation_task=schema, severity=S.ERROR, instance=instance)
+        ValidationOutcome.objects.create(validation_task=schema, severity=S.ERROR)
+        syntax = ValidationTask.objects.create(request=r, type=T.SYNTAX)
+        ValidationOutcome.objects.create(validation_task=syntax, severity=S.PASSED)
+        return r
+
+    def test_clone_copies_latest_tasks_outcomes_and_instances(self):
+        source = self._source()
+        target = ValidationRequest.objects.create(file_name='b.ifc', file='b.ifc', size=1)
+
+        model = result_cache.clone_validation_result(source, target)
+
+        target.refresh_from_db()
+        self.assertEqual(target.model_id, model.id)
+        self.assertNotEqual(model.id, source.model_id)
+        self.assertEqual(model.file_name, 'b.ifc')
+        self.assertEqual(model.status_schema, Model.Status.INVALID)
+
+        self.assertEqual(sorted(t.type for t in target.tasks.all()), sorted([T.SCHEMA, T.SYNTAX]))
+        # the clones did not run the source's processes
+        schema = target.tasks.get(type=T.SCHEMA)
+        self.assertGreaterEqual(schema.started, target.created)
+        self.assertEqual(schema.started, schema.ended)
+        self.assertIsNone(schema.process_id)
+        self.assertIsNone(schema.process_cmd)
+        outcomes = ValidationOutcome.objects.filter(validation_task__request_id=target.id)
+        self.assertEqual(outcomes.count(), 3)
+
+        # instances point to the cloned model
+        with_instance = outcomes.exclude(instance=None)
+        self.assertEqual(with_instance.count(), 1)
+        self.assertEqual(with_instance.first().instance.model_id, model.id)
+        self.assertEqual(with_instance.first().instance.stepfile_id, 5)
+
+        # source is untouched
+        self.assertEqual(ValidationOutcome.objects.filter(validation_task__request_id=source.id).count(), 3)
+
+    def test_file_digest_is_sha256(self):
+        import hashlib, tempfile
+        with tempfile.NamedTemporaryFile() as f:
+            f.write(b'ISO-10303-21;' * 100000)
+            f.flush()
+            self.assertEqual(
+                result_cache.compute_file_digest(f.name, chunk_size=1000),
+                hashlib.sha256(b'ISO-10303-21;' * 100000).hexdigest()
+            )
@@ -0,0 +1,80 @@
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from apps.ifc_validation.tasks import scheduler
+from .helpers import FakeRedis
+
+MB = 1024 * 1024
+
+
+class SchedulerTestCase(SimpleTestCase):
+
+    def setUp(self):
+        self.redis = FakeRedis()
+        patches = [
+            mock.patch.object(scheduler, "redis_client", self.redis),
+            mock.patch.object(scheduler, "SCHEDULER_MAX_RUNNING", 2),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+    @staticmethod
+    def _job(id, channel="API"):
+        return {"id": id, "file_name": f"{id}.ifc", "force": False, "channel": channel}
+
+    def test_size_tiers(self):
+        self.assertEqual(scheduler.queue_for(1 * MB), "validation-small")
+        self.assertEqual(scheduler.queue_for(50 * MB), "validation-medium")
+        self.assertEqual(scheduler.queue_for(200 * MB), "validation-large")
+        self.assertEqual(scheduler.queue_for(None), "validation-small")
+
+    def test_pick_next_prefers_lowest_weighted_share_then_smallest_file(self):
+        self.assertEqual(scheduler.pick_next({"1": (2, 1, 10), "2": (1, 1, 500)}), "2")
+        self.assertEqual(scheduler.pick_next({"1": (2, 2, 500), "2": (1, 1, 10)}), "2")
+        self.assertEqual(scheduler.pick_next({"1": (1, 2, 500), "2": (1, 1, 10)}), "1")
+        self.assertIsNone(scheduler.pick_next({}))
+
+    def test_bulk_submission_does_not_starve_other_users(self):
+        # user 1 submits a batch of large files and fills all slots
+        started = []
+        for id in range(1, 6):
+            started += scheduler.submit(1, 200 * MB, self._job(id))
+        self.assertEqual([j["id"] for j in started], [1, 2])
+
+        # user 2 uploads a small file through the web ui; it waits for a slot
+        self.assertEqual(scheduler.submit(2, 1 * MB, self._job(10, channel="WEBUI")), [])
+
+        # ... and gets the first free slot, ahead of the remaining batch
+        self.assertEqual([j["id"] for j in scheduler.release(1)], [10])
+        self.assertEqual([j["id"] for j in scheduler.release(10)], [3])
+
+        depths = scheduler.queue_depths()
+        self.assertEqual(depths["users"], {"1": {"running": 2, "pending": 2}})
+
+    def test_release_is_idempotent(self):
+        scheduler.submit(1, MB, self._job(1))
+        scheduler.submit(1, MB, self._job(2))
+        scheduler.submit(1, MB, self._job(3))
+
+        self.assertEqual([j["id"] for j in scheduler.release(1)], [3])
+        self.assertEqual(scheduler.release(1), [])
+        self.assertEqual(self.redis.zcard(scheduler.RUNNING_KEY), 2)
+
+    def test_slots_of_finished_and_stalled_workflows_are_reclaimed(self):
+        for id in (1, 2, 3, 4):
+            scheduler.submit(1, MB, self._job(id))
+        self.assertEqual(scheduler.running(), [1, 2])
+
+        # the completion callback of 1 got lost
+        self.assertEqual([j["id"] for j in scheduler.release_finished([1])], [3])
+
+        # 2 shows no progress for longer than SCHEDULER_STALE_AFTER, 3 does
+        with mock.patch("time.time", return_value=time.time() + scheduler.SCHEDULER_STALE_AFTER - 1):
+            scheduler.heartbeat(3)
+            scheduler.heartbeat(10)  # not running, ignored
+        with mock.patch("time.time", return_value=time.time() + scheduler.SCHEDULER_STALE_AFTER + 1):
+            self.assertEqual([j["id"] for j in scheduler.release_finished([])], [4])
+        self.assertEqual(sorted(scheduler.running()), [3, 4])
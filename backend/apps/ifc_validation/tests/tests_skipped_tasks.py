@@ -0,0 +1,73 @@
+from unittest import mock
+
+from django.test import TransactionTestCase
+from django.contrib.auth.models import User
+
+from apps.ifc_validation_models.models import (
+    Model,
+    ValidationRequest,
+    ValidationTask,
+    set_user_context,
+)
+
+from ..tasks import dag as dag_module
+from ..tasks.configs import task_registry
+from ..tasks.dag import node_of
+import apps.ifc_validation.tasks.task_runner as task_runner
+
+from .tests_workflow_dag import _FakeRedis
+
+
+class SkippedTasksTestCase(TransactionTestCase):
+    """Tasks behind an invalid result are recorded as skipped by the orchestrator, without being sent to the workers."""
+
+    def setUp(self):
+        user, _ = User.objects.get_or_create(id=1, defaults={"username": "SYSTEM", "is_active": True})
+        set_user_context(user)
+        self.user = user
+
+        patcher = mock.patch.object(dag_module, "redis_client", _FakeRedis())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _make_request(self, **statuses):
+        model = Model.objects.create(file_name="a.ifc", size=1, uploaded_by=self.user, **statuses)
+        request = ValidationRequest.objects.create(file_name="a.ifc", file="a.ifc", size=1, model=model)
+        request.mark_as_initiated()
+        task_runner.workflow_dag.start(request.id)
+        return request
+
+    def _complete(self, request, task_type):
+        with mock.patch.object(task_runner, "dispatch_workflow_nodes") as dispatch, \
+             mock.patch.object(task_runner, "on_workflow_completed") as completed:
+            task_runner.on_workflow_node_completed(id=request.id, file_name=request.file_name, node=node_of(task_type))
+        dispatched = [n for call in dispatch.call_args_list for n in call.args[0]]
+        return dispatched, completed.delay.called
+
+    def test_blocked_tasks_are_skipped_in_bulk(self):
+        request = self._make_request(status_magic_clamav=Model.Status.INVALID)
+
+        dispatched, completed = self._complete(request, ValidationTask.Type.MAGIC_AND_CLAMAV)
+
+        self.assertEqual(dispatched, [])
+        self.assertTrue(completed)
+        skipped = ValidationTask.objects.filter(request=request, status=ValidationTask.Status.SKIPPED)
+        expected = {
+            str(t) for node in task_runner.workflow_dag.dag if node != node_of(ValidationTask.Type.MAGIC_AND_CLAMAV)
+            for t in task_runner.workflow_node_types(node)
+        }
+        self.assertEqual({str(t) for t in skipped.values_list("type", flat=True)}, expected)
+
+        request.refresh_from_db()
+        self.assertEqual(request.progress, sum(
+            task_registry[t].increment for t in skipped.values_list("type", flat=True)
+        ))
+
+    def test_valid_results_dispatch_next_tasks(self):
+        request = self._make_request(status_magic_clamav=Model.Status.VALID)
+
+        dispatched, completed = self._complete(request, ValidationTask.Type.MAGIC_AND_CLAMAV)
+
+        self.assertEqual(dispatched, [node_of(ValidationTask.Type.HEADER_SYNTAX)])
+        self.assertFalse(completed)
+        self.assertFalse(ValidationTask.objects.filter(request=request).exists())
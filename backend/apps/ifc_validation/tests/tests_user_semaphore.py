@@ -0,0 +1,50 @@
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from core import redis_lock
+from core.redis_lock import new_permit_token, acquire_user_permit, refresh_user_permit, release_user_permit, release_expired_permits
+
+USER_ID = "test-semaphore"
+
+
+@mock.patch.object(redis_lock, "USER_MAX_CONCURRENT_TASKS", 2)
+class UserSemaphoreTestCase(SimpleTestCase):
+
+    def setUp(self):
+        self.addCleanup(redis_lock.redis_client.delete, *redis_lock._keys(USER_ID))
+
+    def test_waiting_tasks_are_resumed_in_order_when_permits_free_up(self):
+        first, second = new_permit_token(), new_permit_token()
+        self.assertEqual(acquire_user_permit(USER_ID, first, "task-1"), (True, []))
+        self.assertEqual(acquire_user_permit(USER_ID, second, "task-2"), (True, []))
+        self.assertEqual(acquire_user_permit(USER_ID, new_permit_token(), "task-3"), (False, []))
+        self.assertEqual(acquire_user_permit(USER_ID, new_permit_token(), "task-4"), (False, []))
+
+        self.assertEqual(release_user_permit(USER_ID, first), ["task-3"])
+        self.assertEqual(release_user_permit(USER_ID, second), ["task-4"])
+
+    def test_expired_permits_are_released(self):
+        token = new_permit_token()
+        acquire_user_permit(USER_ID, token, "task-1")
+        acquire_user_permit(USER_ID, new_permit_token(), "task-2")
+        acquire_user_permit(USER_ID, new_permit_token(), "task-3")
+
+        holders, _ = redis_lock._keys(USER_ID)
+        redis_lock.redis_client.zadd(holders, {token: time.time() - 1})
+
+        self.assertEqual(release_expired_permits(), ["task-3"])
+
+    def test_permits_are_refreshed_while_held(self):
+        token = new_permit_token()
+        acquire_user_permit(USER_ID, token, "task-1")
+
+        holders, _ = redis_lock._keys(USER_ID)
+        redis_lock.redis_client.zadd(holders, {token: time.time() + 1})
+        self.assertTrue(refresh_user_permit(USER_ID, token))
+        self.assertGreater(redis_lock.redis_client.zscore(holders, token), time.time() + redis_lock.USER_PERMIT_TTL - 5)
+
+        release_user_permit(USER_ID, token)
+        self.assertFalse(refresh_user_permit(USER_ID, token))
+        self.assertIsNone(redis_lock.redis_client.zscore(holders, token))
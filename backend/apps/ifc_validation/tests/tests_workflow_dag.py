@@ -0,0 +1,69 @@
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from apps.ifc_validation_models.models import ValidationTask
+
+from ..tasks import dag as dag_module
+from ..tasks.configs import task_registry
+from ..tasks.dag import WorkflowDag, build_dag, node_of
+from .helpers import FakeRedis
+
+T = ValidationTask.Type
+TASK_TYPES = [t for t in task_registry.all() if t != T.BSDD]
+GHERKIN = [T.NORMATIVE_IA, T.NORMATIVE_IP, T.INDUSTRY_PRACTICES]
+
+
+def _nodes(*types):
+    return {node_of(t) for t in types}
+
+
+def _cost(node):
+    return task_registry[node].increment if node != "GHERKIN" else 50
+
+
+class WorkflowDagTestCase(SimpleTestCase):
+
+    def test_tasks_depend_on_their_blockers_only(self):
+        dag = build_dag(TASK_TYPES)
+
+        self.assertEqual(dag[node_of(T.MAGIC_AND_CLAMAV)], set())
+        self.assertEqual(dag[node_of(T.HEADER)], _nodes(T.MAGIC_AND_CLAMAV, T.HEADER_SYNTAX))
+        self.assertEqual(dag[node_of(T.SYNTAX)], _nodes(T.MAGIC_AND_CLAMAV, T.HEADER_SYNTAX))
+        # schema and signatures don't wait for the header policy check
+        self.assertEqual(dag[node_of(T.SCHEMA)], _nodes(T.MAGIC_AND_CLAMAV, T.HEADER_SYNTAX, T.SYNTAX, T.PREREQUISITES))
+        self.assertNotIn(node_of(T.HEADER), dag[node_of(T.DIGITAL_SIGNATURES)])
+
+    def test_final_tasks_wait_for_all_parallel_tasks(self):
+        dag = build_dag(TASK_TYPES, fused={"GHERKIN": GHERKIN})
+
+        self.assertNotIn(node_of(T.NORMATIVE_IA), dag)
+        self.assertEqual(dag["GHERKIN"], _nodes(T.MAGIC_AND_CLAMAV, T.HEADER_SYNTAX, T.SYNTAX, T.PREREQUISITES))
+        self.assertTrue({"GHERKIN"} | _nodes(T.SCHEMA, T.DIGITAL_SIGNATURES) <= dag[node_of(T.INSTANCE_COMPLETION)])
+
+    def test_critical_path_goes_first(self):
+        workflow = WorkflowDag(build_dag(TASK_TYPES, fused={"GHERKIN": GHERKIN}), cost=_cost)
+
+        self.assertEqual(
+            workflow.by_priority(_nodes(T.HEADER, T.SYNTAX)),
+            [node_of(T.SYNTAX), node_of(T.HEADER)],
+        )
+
+    def test_tasks_start_when_all_dependencies_completed(self):
+        workflow = WorkflowDag(build_dag(TASK_TYPES, fused={"GHERKIN": GHERKIN}), cost=_cost)
+
+        with mock.patch.object(dag_module, "redis_client", FakeRedis()):
+            self.assertEqual(workflow.start(1), [node_of(T.MAGIC_AND_CLAMAV)])
+            self.assertEqual(workflow.complete(1, node_of(T.MAGIC_AND_CLAMAV)), ([node_of(T.HEADER_SYNTAX)], False))
+            ready, _ = workflow.complete(1, node_of(T.HEADER_SYNTAX))
+            self.assertEqual(set(ready), _nodes(T.HEADER, T.SYNTAX, T.PREREQUISITES))
+
+            self.assertEqual(workflow.complete(1, node_of(T.SYNTAX)), ([], False))
+            self.assertEqual(workflow.complete(1, node_of(T.SYNTAX)), ([], False))  # redelivered
+            ready, _ = workflow.complete(1, node_of(T.PREREQUISITES))
+            self.assertEqual(ready[0], "GHERKIN")
+            self.assertEqual(set(ready), {"GHERKIN"} | _nodes(T.SCHEMA, T.DIGITAL_SIGNATURES))
+
+            for node in ready + [node_of(T.HEADER)]:
+                self.assertFalse(workflow.complete(1, node)[1])
+            self.assertEqual(workflow.complete(1, node_of(T.INSTANCE_COMPLETION)), ([], True))
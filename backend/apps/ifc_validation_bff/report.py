@@ -0,0 +1,457 @@
+"""
+Sections of the legacy report (syntax, schema, normative, industry, bsdd and file).
+
+Sections of completed requests are built once - when the workflow completes or on first
+read - and served from their materialized JSON (see ifc_validation.report_cache) afterwards.
+"""
+
+import os
+import re
+import json
+import glob
+import logging
+import functools
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, F, Window
+from django.db.models.functions import RowNumber
+
+from apps.ifc_validation_models.models import ValidationRequest, ValidationTask, ValidationOutcome, Model
+from apps.ifc_validation import report_cache
+
+from core.settings import FEATURE_URL, MAX_OUTCOMES_PER_RULE
+
+logger = logging.getLogger(__name__)
+
+SECTIONS = ('syntax', 'schema', 'normative', 'industry', 'bsdd', 'file')
+
+# bSDD checks are disabled
+MATERIALIZED_SECTIONS = ('syntax', 'schema', 'normative', 'industry', 'file')
+
+GHERKIN_GROUPS = {
+    'normative': (ValidationTask.Type.NORMATIVE_IA, ValidationTask.Type.NORMATIVE_IP),
+    'prerequisites': (ValidationTask.Type.PREREQUISITES,),
+    'industry': (ValidationTask.Type.INDUSTRY_PRACTICES,),
+}
+
+
+@functools.lru_cache(maxsize=1024)
+def get_feature_filename(feature_code):
+    """
+    Retrieve the feature filename based on the feature_code (e.g. 'ALB005')
+    """
+    file_folder = os.path.dirname(os.path.realpath(__file__))
+    rules_folder = os.path.join(file_folder, '../ifc_validation/checks/ifc_gherkin_rules/features/rules')
+    return glob.glob(os.path.join(rules_folder, "**", f"{feature_code}*.feature"), recursive=True)
+
+
+@functools.lru_cache(maxsize=1024)
+def get_feature_url(feature_code):
+    """
+    Get the URL for the corresponding feature filename
+    We return the filename in the relevant branch of the repositoy, eg.
+    - 'development' for DEV
+    - 'preview' for PREVIEW
+    - 'main' for MAIN
+    """
+    feature_files = get_feature_filename(feature_code)
+
+    if feature_files:
+        return os.path.join(FEATURE_URL, os.path.basename(feature_files[0].replace(".feature", ".html")))
+    return None
+
+
+@functools.lru_cache(maxsize=1024)
+def get_feature_description(feature_code):
+    feature_files = get_feature_filename(feature_code)
+    if feature_files:
+
+        gherkin_desc = ''
+        reading = False
+
+        with open(feature_files[0], 'r', encoding='utf-8') as input_file:
+            for line in input_file:
+                if 'Feature:' in line:
+                    reading = True
+                if any(keyword in line for keyword in ['Scenario:', 'Background:', 'Scenario Outline:']):
+                    return gherkin_desc
+                if reading and line.strip() and 'Feature:' not in line and '@' not in line:
+                    gherkin_desc += '\n' + line.strip()
+
+    return None
+
+
+def empty_results():
+    return {
+        "syntax_results": [],
+        "schema": {
+            "counts": [{}],
+            "results": [],
+        },
+        "bsdd_results": [],
+        "norm_rules": {
+            "counts": {},
+            "results": [],
+        },
+        "ind_rules": {
+            "counts": {},
+            "results": [],
+        },
+        "prereq_rules": {
+            "counts": [{}],
+            "results": []
+        },
+        "signatures": []
+    }
+
+
+def latest_tasks(request_id, types):
+    """
+    Last run of each task type, in the order of 'types' (one query).
+    """
+    latest = {}
+    for task in ValidationTask.objects.filter(request_id=request_id, type__in=types).order_by('-id'):
+        latest.setdefault(task.type, task)
+    return [latest[t] for t in types if t in latest]
+
+
+def add_instance(instances, outcome):
+    inst = outcome.instance
+    if inst and inst.public_id not in instances:
+        instances[inst.public_id] = {
+            "guid": f'#{inst.stepfile_id}',
+            "type": inst.ifc_type
+        }
+
+
+LINE_RE = re.compile(r"^On line (\d+) column (\d+).*")
+
+
+def map_syntax_outcome(outcome):
+    m = LINE_RE.match(outcome.observed or "")
+    return {
+        "id": outcome.public_id,
+        "lineno": m.group(1) if m else None,
+        "column": m.group(2) if m else None,
+        "severity": outcome.severity,
+        "severity_pre_allowlist": outcome.severity_in_db,
+        "allowlisted": outcome.is_whitelisted,
+        "msg": f"expected: {outcome.expected}, observed: {outcome.observed}" if getattr(outcome, 'expected', None) is not None else outcome.observed,
+        "task_id": outcome.validation_task_public_id,
+    }
+
+
+def failed_syntax_type(model):
+    if model.status_header_syntax == Model.Status.INVALID:
+        return ValidationTask.Type.HEADER_SYNTAX
+    elif model.status_syntax == Model.Status.INVALID:
+        return ValidationTask.Type.SYNTAX
+    return None
+
+
+def map_syntax(request, instances, results):
+    failed_type = failed_syntax_type(request.model)
+    if failed_type is None:
+        return
+
+    task = next(iter(latest_tasks(request.id, (failed_type,))), None)
+    if task is None:
+        return
+
+    for outcome in task.outcomes.all():
+        results["syntax_results"].append(map_syntax_outcome(outcome))
+
+
+def schema_title(feature):
+    key = feature.get('attribute') or 'Uncategorized' # eg. 'IfcSpatialStructureElement.WR41'
+    _type = feature.get('type') or 'Uncategorized'    # 'uncategorized', 'schema', 'global_rule', 'simpletype_rule', 'entity_rule'
+    return _type.replace('_', ' ').capitalize() + ' - ' + key # eg. 'Schema - SegmentStart'
+
+
+def map_schema_outcome(outcome):
+    feature = json.loads(outcome.feature) if outcome.feature else {}
+    return {
+        "id": outcome.public_id,
+        "attribute": feature.get('attribute'),
+        "constraint_type": feature.get('type'),
+        "instance_id": outcome.instance_public_id,
+        "severity": outcome.severity,
+        "severity_pre_allowlist": outcome.severity_in_db,
+        "allowlisted": outcome.is_whitelisted,
+        "msg": outcome.observed,
+        "task_id": outcome.validation_task_public_id,
+        "title": schema_title(feature),
+    }
+
+
+def map_schema(request, instances, results):
+    task = next(iter(latest_tasks(request.id, (ValidationTask.Type.SCHEMA,))), None)
+    if task is None:
+        return
+
+    counts = results["schema"]["counts"][0]
+    schema_results = results["schema"]["results"]
+
+    # we can only sort on severity_in_db, not on severity because that is a computed field
+    for outcome in task.outcomes.select_related('instance').order_by('-severity_in_db').iterator():
+
+        mapped = map_schema_outcome(outcome)
+        title = mapped['title']
+        counts[title] = counts.get(title, 0) + 1
+        if counts[title] > MAX_OUTCOMES_PER_RULE:
+            continue
+
+        schema_results.append(mapped)
+        add_instance(instances, outcome)
+
+
+def gherkin_title(label, feature):
+    # TODO: organize this differently?
+    return 'Schema - Version' if label == 'prerequisites' else feature
+
+
+def count_by_title(outcomes, title):
+    """
+    Number of outcomes per title(feature); features that share a title are added up.
+    """
+    counts = {}
+    for item in outcomes.values('feature').annotate(count=Count('id')).order_by('feature'):
+        key = title(item['feature'])
+        counts[key] = counts.get(key, 0) + item['count']
+    return counts
+
+
+def map_gherkin_outcome(outcome, label):
+    feature = outcome.feature
+    return {
+        "id": outcome.public_id,
+        "title": gherkin_title(label, feature),
+        "feature": feature,
+        "feature_version": outcome.feature_version,
+        "feature_url": get_feature_url(feature[0:6]),
+        "feature_text": get_feature_description(feature[0:6]),
+        "severity": outcome.severity,
+        "severity_pre_allowlist": outcome.severity_in_db,
+        "allowlisted": outcome.is_whitelisted,
+        "instance_id": outcome.instance_public_id,
+        "expected": outcome.expected,
+        "observed": outcome.observed,
+        "message": str(outcome) if outcome.expected and outcome.observed else None,
+        "task_id": outcome.validation_task_public_id,
+        "msg": outcome.observed,
+    }
+
+
+def map_gherkin(request, label, instances):
+    """
+    Counts per feature and the first MAX_OUTCOMES_PER_RULE outcomes per feature and task (two queries).
+    """
+    counts, gherkin_results = {}, []
+    tasks = latest_tasks(request.id, GHERKIN_GROUPS[label])
+    if not tasks:
+        return counts, gherkin_results
+
+    outcomes = ValidationOutcome.objects.filter(validation_task__in=tasks)
+    counts = count_by_title(outcomes, lambda feature: gherkin_title(label, feature))
+
+    ranked = (outcomes
+        .annotate(rank=Window(RowNumber(), partition_by=[F('validation_task_id'), F('feature')], order_by=F('id').asc()))
+        .filter(rank__lte=MAX_OUTCOMES_PER_RULE)
+        .select_related('instance')
+        .order_by('feature', 'validation_task_id', 'id'))
+
+    for outcome in ranked.iterator():
+        gherkin_results.append(map_gherkin_outcome(outcome, label))
+        add_instance(instances, outcome)
+
+    return counts, gherkin_results
+
+
+def map_bsdd_outcome(outcome):
+    feature_json = json.loads(outcome.feature)
+    return {
+        "id": outcome.id,
+        "severity": outcome.severity,
+        "instance_id": outcome.instance_id,
+        "expected": outcome.expected,
+        "observed": outcome.observed,
+        "category": feature_json['category'] if 'category' in feature_json else None,
+        "dictionary": feature_json['dictionary'] if 'dictionary' in feature_json else None,
+        "class": feature_json['class'] if 'class' in feature_json else None,
+        "task_id": outcome.validation_task_public_id,
+    }
+
+
+def map_bsdd(request, instances, results):
+    # only concerned about last run of each task
+    task = next(iter(latest_tasks(request.id, (ValidationTask.Type.BSDD,))), None)
+    if task is None:
+        return
+
+    for outcome in task.outcomes.select_related('instance').iterator():
+        results["bsdd_results"].append(map_bsdd_outcome(outcome))
+        add_instance(instances, outcome)
+
+
+def build_section(request : ValidationRequest, section):
+    """
+    Returns the instances and results of a single report section, e.g. 'schema'.
+    """
+    instances = {}
+    results = empty_results()
+
+    logger.info(f"Fetching and mapping {section} results...")
+
+    if section == 'syntax' and request.model:
+        map_syntax(request, instances, results)
+
+    elif section == 'schema' and request.model:
+        map_schema(request, instances, results)
+        counts, prereq_results = map_gherkin(request, 'prerequisites', instances)
+        results["prereq_rules"] = {"counts": [counts], "results": prereq_results}
+
+    elif section == 'normative':
+        counts, norm_results = map_gherkin(request, 'normative', instances)
+        results["norm_rules"] = {"counts": counts, "results": norm_results}
+
+    elif section == 'industry':
+        counts, ind_results = map_gherkin(request, 'industry', instances)
+        results["ind_rules"] = {"counts": counts, "results": ind_results}
+
+    elif section == 'bsdd' and request.model:
+        map_bsdd(request, instances, results)
+
+    elif section == 'file':
+        task = next(iter(latest_tasks(request.id, (ValidationTask.Type.DIGITAL_SIGNATURES,))), None)
+        results["signatures"] = [t.observed for t in task.outcomes.iterator()] if task else None
+
+    logger.info(f"Fetching and mapping {section} done.")
+
+    return {
+        'instances': instances,
+        'results': results
+    }
+
+
+def serialize_section(payload):
+    return json.dumps(payload, cls=DjangoJSONEncoder).encode('utf-8')
+
+
+def get_section(request : ValidationRequest, section):
+    """
+    Returns the JSON (bytes) of a report section; materialized once the request is completed.
+    """
+    if section not in SECTIONS:
+        return serialize_section(build_section(request, None))
+
+    # results of running or failed requests can still change
+    if request.status != ValidationRequest.Status.COMPLETED:
+        return serialize_section(build_section(request, section))
+
+    content = report_cache.get_section(request.id, section)
+    if content is not None:
+        return content
+
+    try:
+        generation = report_cache.allowlist_generation()
+    except Exception as err:
+        logger.warning(f"Report materialization not available: {err}")
+        generation = None
+
+    content = serialize_section(build_section(request, section))
+    if generation is not None:
+        report_cache.store_section(request.id, section, content, generation)
+    return content
+
+
+def materialize(request_id):
+    """
+    Builds and stores all sections of a completed request.
+    """
+    request = ValidationRequest.objects.select_related('model').get(pk=request_id)
+    if request.status != ValidationRequest.Status.COMPLETED:
+        return
+
+    generation = report_cache.allowlist_generation()
+    report_cache.invalidate(request_id)
+    for section in MATERIALIZED_SECTIONS:
+        report_cache.store_section(request_id, section, serialize_section(build_section(request, section)), generation)
+
+
+# streamed sections, named after the keys of the legacy report 'results'
+STREAMED_SECTIONS = {
+    'syntax_results': None, # the failed syntax task, if any
+    'schema': (ValidationTask.Type.SCHEMA,),
+    'prereq_rules': GHERKIN_GROUPS['prerequisites'],
+    'norm_rules': GHERKIN_GROUPS['normative'],
+    'ind_rules': GHERKIN_GROUPS['industry'],
+    'signatures': (ValidationTask.Type.DIGITAL_SIGNATURES,),
+}
+
+GHERKIN_SECTIONS = {'prereq_rules': 'prerequisites', 'norm_rules': 'normative', 'ind_rules': 'industry'}
+
+STREAM_CHUNK_SIZE = 2000
+
+
+def map_streamed_outcome(section, outcome):
+    if section == 'syntax_results':
+        return map_syntax_outcome(outcome)
+    elif section == 'schema':
+        return map_schema_outcome(outcome)
+    elif section == 'signatures':
+        return outcome.observed
+    return map_gherkin_outcome(outcome, GHERKIN_SECTIONS[section])
+
+
+def section_counts(section, outcomes):
+    """
+    Number of outcomes per title, as in the 'counts' of the legacy report.
+    """
+    if section == 'schema':
+        return count_by_title(outcomes, lambda feature: schema_title(json.loads(feature) if feature else {}))
+    if section in GHERKIN_SECTIONS:
+        return count_by_title(outcomes, lambda feature: gherkin_title(GHERKIN_SECTIONS[section], feature))
+    return {}
+
+
+def iter_section_records(request : ValidationRequest, section, cursor=None, limit=None):
+    """
+    Yields the records of one streamed section: its counts (first page only), results and the
+    instances they refer to, and a final record with the cursor of the next page (if any).
+
+    Outcomes are read in id order through a server-side cursor, 'cursor' is the public id of
+    the last outcome of the previous page.
+    """
+    types = STREAMED_SECTIONS[section]
+    if types is None:
+        failed_type = failed_syntax_type(request.model) if request.model else None
+        types = (failed_type,) if failed_type else ()
+
+    tasks = latest_tasks(request.id, types) if types else []
+    outcomes = ValidationOutcome.objects.filter(validation_task__in=tasks)
+
+    if cursor is None:
+        yield {"type": "counts", "section": section, "counts": section_counts(section, outcomes)}
+    else:
+        outcomes = outcomes.filter(id__gt=ValidationOutcome.to_private_id(cursor))
+
+    outcomes = outcomes.select_related('instance').order_by('id')
+    if limit is not None:
+        outcomes = outcomes[:limit + 1]
+
+    instances = set()
+    last, next_cursor = None, None
+    for n, outcome in enumerate(outcomes.iterator(chunk_size=STREAM_CHUNK_SIZE)):
+        if limit is not None and n == limit:
+            next_cursor = last.public_id
+            break
+
+        inst = outcome.instance
+        if inst and inst.public_id not in instances:
+            instances.add(inst.public_id)
+            yield {"type": "instance", "id": inst.public_id, "guid": f'#{inst.stepfile_id}', "ifc_type": inst.ifc_type}
+
+        yield {"type": "result", "section": section, "result": map_streamed_outcome(section, outcome)}
+        last = outcome
+
+    yield {"type": "end", "section": section, "next_cursor": next_cursor}
@@ -0,0 +1,21 @@
+from celery import shared_task
+from celery.utils.log import get_task_logger
+
+from core.utils import log_execution
+
+from apps.ifc_validation_models.decorators import requires_django_user_context
+
+from . import report
+
+
+logger = get_task_logger(__name__)
+
+
+@shared_task(bind=True)
+@log_execution
+@requires_django_user_context
+def materialize_report_task(self, *args, **kwargs):
+
+    id = kwargs.get('id')
+    report.materialize(id)
+    logger.info(f"Materialized report sections of Validation Request {id}")
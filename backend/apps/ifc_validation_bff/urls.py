@@ -1,7 +1,7 @@
 from django.urls import path
 
-from .views_legacy import get_allowlist, me, logout_view, models_paginated, upload, delete
-from .views_legacy import report, report_error
+from .views_legacy import get_allowlist, me, logout_view, models_paginated, models_stream, upload, delete
+from .views_legacy import report, report_stream, report_error
 
 urlpatterns = [
 
@@ -9,9 +9,11 @@ urlpatterns = [
     path('api/me',                                              me),
     path('api/logout',                                          logout_view),
     path('api/models_paginated/<int:start>/<int:end>',          models_paginated),
+    path('api/models_stream',                                   models_stream),
     path('api/',                                                upload),
     path('api/delete/<str:ids>',                                delete),
     path('api/report/<str:id>',                                 report),
+    path('api/report_stream/<str:id>',                          report_stream),
     path('api/report_error',                                    report_error),
     path('api/allowlist',                                       get_allowlist),
 
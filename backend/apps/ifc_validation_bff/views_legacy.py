@@ -8,14 +8,18 @@ import logging
 import itertools
 import functools
 import typing
+import time
+import hashlib
 from collections import defaultdict
 import glob
 
 from django.db import transaction
 from django.db.models import Count
-from django.http import JsonResponse, HttpResponse, FileResponse, HttpResponseNotFound, HttpResponseNotAllowed
+from django.http import JsonResponse, HttpResponse, FileResponse, HttpResponseNotFound, HttpResponseNotAllowed, HttpResponseBadRequest
+from django.http import StreamingHttpResponse
 from django.contrib.auth.models import User
-from django.views.decorators.csrf import ensure_csrf_cookie, csrf_protect
+from django.core.serializers.json import DjangoJSONEncoder
+from django.views.decorators.csrf import ensure_csrf_cookie, csrf_protect, csrf_exempt
 
 from apps.ifc_validation_models.models import IdObfuscator, ValidationOutcome, WhiteListEntry, set_user_context
 from apps.ifc_validation_models.models import ValidationRequest
@@ -24,11 +28,16 @@ from apps.ifc_validation_models.models import Model
 from apps.ifc_validation_models.models import UserAdditionalInfo
 
 from apps.ifc_validation.tasks import ifc_file_validation_task
+from apps.ifc_validation.progress_events import progress_channel, acquire_stream, release_stream
+from apps.ifc_validation.submission import collect_files, submit_batch
+from apps.ifc_validation import header_preview
 
-from core.settings import MEDIA_ROOT, MAX_FILES_PER_UPLOAD
+from core.redis_lock import redis_client
+
+from core.settings import MEDIA_ROOT
 from core.settings import DEVELOPMENT, PREVIEW
 from core.settings import LOGIN_URL, USE_WHITELIST 
-from core.settings import FEATURE_URL, MAX_OUTCOMES_PER_RULE
+from core.settings import PROGRESS_STREAM_HEARTBEAT, PROGRESS_STREAM_MAX_DURATION
 
 logger = logging.getLogger(__name__)
 
@@ -96,53 +105,9 @@ def create_redirect_response(login=True, dashboard=False):
         "redirect": LOGIN_URL if login else '/dashboard',
     })
 
-@functools.lru_cache(maxsize=1024)
-def get_feature_filename(feature_code):
-    """
-    Retrieve the feature filename based on the feature_code (e.g. 'ALB005')
-    """
-    file_folder = os.path.dirname(os.path.realpath(__file__))
-    rules_folder = os.path.join(file_folder, '../ifc_validation/checks/ifc_gherkin_rules/features/rules')
-    return glob.glob(os.path.join(rules_folder, "**", f"{feature_code}*.feature"), recursive=True)
-
-
-@functools.lru_cache(maxsize=1024)
-def get_feature_url(feature_code):
-    """
-    Get the URL for the corresponding feature filename
-    We return the filename in the relevant branch of the repositoy, eg.
-    - 'development' for DEV
-    - 'preview' for PREVIEW
-    - 'main' for MAIN
-    """
-    feature_files = get_feature_filename(feature_code)
-
-    if feature_files:
-        return os.path.join(FEATURE_URL, os.path.basename(feature_files[0].replace(".feature", ".html")))
-    return None
-
-
-@functools.lru_cache(maxsize=1024)
-def get_feature_description(feature_code):
-    feature_files = get_feature_filename(feature_code)
-    if feature_files: 
-
-        gherkin_desc = ''
-        reading = False
-
-        with open(feature_files[0], 'r', encoding='utf-8') as input_file:
-            for line in input_file:
-                if 'Feature:' in line:
-                    reading = True
-                if any(keyword in line for keyword in ['Scenario:', 'Background:', 'Scenario Outline:']):
-                    return gherkin_desc
-                if reading and line.strip() and 'Feature:' not in line and '@' not in line:
-                    gherkin_desc += '\n' + line.strip()
-
-    return None
-
-
 from apps.ifc_validation_bff.status import status_combine
+from apps.ifc_validation_bff.report import get_section as get_report_section
+from apps.ifc_validation_bff.report import iter_section_records, STREAMED_SECTIONS
 
 
 # IVS-820 follow-up: a not-yet-run check resolves to 'n' (NOT_VALIDATED) once the Model row
@@ -283,23 +248,102 @@ def models_paginated(request, start: int, end: int):
     return JsonResponse(response_data)
 
 
+def _format_request_delta(request : ValidationRequest):
+    if request.deleted:
+        return {"id": request.public_id, "deleted": 1}
+    return format_request(request)
+
+
+def models_stream(request):
+
+    """
+    Server-Sent Events stream of changed Validation Requests of the current user.
+    Only rows whose formatted representation changed are sent ('update' events);
+    clients fetch the initial page via models_paginated.
+    A user holds at most PROGRESS_STREAM_MAX_PER_USER streams, further ones are refused (HTTP 429)
+    and those clients fall back to polling.
+    """
+
+    if request.method != "GET":
+        return HttpResponseNotAllowed(["GET"])
+
+    # fetch current user
+    user = get_current_user(request)
+    if not user:
+        return create_redirect_response(login=True)
+    if not user.is_active:
+        return create_redirect_response(dashboard=True)
+
+    token = acquire_stream(user.id)
+    if token is None:
+        response = HttpResponse("Too many open streams", status=429)
+        response['Retry-After'] = PROGRESS_STREAM_MAX_DURATION
+        return response
+
+    pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+    pubsub.subscribe(progress_channel(user.id))
+
+    def events():
+        sent = {}
+        started = time.monotonic()
+        try:
+            yield "retry: 5000\n\n"
+            while time.monotonic() - started < PROGRESS_STREAM_MAX_DURATION:
+                message = pubsub.get_message(timeout=PROGRESS_STREAM_HEARTBEAT)
+                if message is None:
+                    yield ": keepalive\n\n"
+                    continue
+
+                # coalesce bursts, e.g. parallel tasks of the same request finishing together
+                ids = {int(message['data'])}
+                while (message := pubsub.get_message(timeout=0.1)) is not None and len(ids) < 100:
+                    ids.add(int(message['data']))
+
+                changed = []
+                requests = ValidationRequest.objects.filter(created_by__id=user.id, id__in=ids).select_related('model', 'model__produced_by', 'created_by')
+                for r in requests:
+                    row = _format_request_delta(r)
+                    digest = hashlib.sha1(json.dumps(row, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+                    if sent.get(r.id) != digest:
+                        sent[r.id] = digest
+                        changed.append(row)
+
+                if changed:
+                    yield f"event: update\ndata: {json.dumps({'models': changed}, default=str)}\n\n"
+        finally:
+            pubsub.close()
+            release_stream(user.id, token)
+
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # disable nginx proxy buffering
+    return response
+
+
 @ensure_csrf_cookie
-@csrf_protect
+@csrf_exempt  # checked by _upload(), once the upload handlers are set up
 def upload(request):
 
     if request.method != "POST":
         logger.error(f'Received invalid request: {request}')
         return HttpResponseNotAllowed()
 
-    if request.method == "POST" and request.FILES:
-        
-        # fetch current user
-        user = get_current_user(request)
-        if not user:
-            return create_redirect_response(login=True)
-        if not user.is_active:
-            return create_redirect_response(dashboard=True)
-        
+    # fetch current user (from the session; the body isn't read yet)
+    user = get_current_user(request)
+    if not user:
+        return create_redirect_response(login=True)
+    if not user.is_active:
+        return create_redirect_response(dashboard=True)
+
+    header_preview.add_upload_handler(request)
+    return _upload(request, user)
+
+
+@csrf_protect
+def _upload(request, user):
+
+    if request.FILES:
+
         set_user_context(user)
 
         referrer = request.headers.get("Referer")
@@ -313,29 +357,22 @@ def upload(request):
 
         # parse files
         # can be POST-ed back as file or file[0] or files ...
-        files = request.FILES.getlist('file')
-        for i in range(0, MAX_FILES_PER_UPLOAD):
-            file_i = request.FILES.getlist(f'file[{i}]', None)
-            if file_i is not None: files += file_i
+        files = collect_files(request.FILES)
         logger.info(f"Received {len(files)} file(s) - files: {files}")
 
-        # store and queue file for processing
-        for f in files:
-            with transaction.atomic():
-                
-                instance = ValidationRequest.objects.create(
-                    file=f,
-                    file_name=f.name,
-                    size=f.size,
-                    channel=captured_channel,
-                )
+        # skip reuse of results for identical files?
+        force = request.POST.get('force', 'false').lower() in ('1', 'true', 'yes')
 
-                transaction.on_commit(lambda: ifc_file_validation_task.delay(instance.id, instance.file_name))    
-                logger.info(f"Task 'ifc_file_validation_task' submitted for id: {instance.id} file_name: {instance.file_name} size: {f.size:,} bytes")
+        # store and queue files for processing (one transaction, one group of workflows)
+        batch = None
+        if files:
+            batch, _ = submit_batch(user, files, channel=captured_channel, force=force)
 
         # return to dashboard
         response = { 
-            "url": "/dashboard"
+            "url": "/dashboard",
+            "batch_id": str(batch.public_id) if batch else None,
+            "header_previews": getattr(request, "header_previews", {}),
         }
         return JsonResponse(response)
 
@@ -398,7 +435,7 @@ def revalidate(request, ids: str):
 
             for id in ids.split(','):
                 request = ValidationRequest.objects.filter(created_by__id=user.id, deleted=False, id=ValidationRequest.to_private_id(id)).first()
-                ifc_file_validation_task.delay(request.id, request.file_name)
+                ifc_file_validation_task.delay(request.id, request.file_name, force=True)
                 logger.info(f"Task 'ifc_file_validation_task' re-submitted for Validation Request - id: {request.id} file_name: {request.file_name}")
 
         for id in ids.split(','):
@@ -435,231 +472,64 @@ def report(request, id: str):
     if not request:
         return HttpResponseNotFound()
     
-    # return file metrics as projection of Validation Request + Model attributes
-    instances = {}
-    model = format_request(request)
-    
-    # retrieve and map syntax outcome(s)
-    syntax_results = []
-    
-    if report_type == "syntax" and request.model:
-        if request.model.status_header_syntax == Model.Status.INVALID:
-            failed_type = ValidationTask.Type.HEADER_SYNTAX
-        elif request.model.status_syntax == Model.Status.INVALID:
-            failed_type = ValidationTask.Type.SYNTAX
-        else:
-            failed_type = None                        
-
-        if failed_type:
-            logger.info('Fetching and mapping syntax results...')
-            task = (ValidationTask.objects
-                    .filter(request_id=request.id, type=failed_type)
-                    .order_by("-id")   
-                    .prefetch_related("outcomes")
-                    .first())
-
-            if task and task.outcomes:
-                line_re = re.compile(r"^On line (\d+) column (\d+).*")
-                for outcome in task.outcomes.all():
-                    m = line_re.match(outcome.observed or "")
-                    syntax_results.append({
-                        "id": outcome.public_id,
-                        "lineno": m.group(1) if m else None,
-                        "column": m.group(2) if m else None,
-                        "severity": outcome.severity,
-                        "severity_pre_allowlist": outcome.severity_in_db,
-                        "allowlisted": outcome.is_whitelisted, 
-                        "msg": f"expected: {outcome.expected}, observed: {outcome.observed}" if getattr(outcome, 'expected', None) is not None else outcome.observed,
-                        "task_id": outcome.validation_task_public_id,
-                    })
-            logger.info('Fetching and mapping syntax done.')
-    
-    # retrieve and map schema outcome(s) + instances
-    schema_results_count = defaultdict(int)
-    schema_results = []
-    if report_type == 'schema' and request.model:
-        
-        logger.info('Fetching and mapping schema results...')    
-        
-        task = ValidationTask.objects.filter(request_id=request.id, type=ValidationTask.Type.SCHEMA).last()
-        if task.outcomes:
-            # we can only sort on severity_in_db, not on severity because that is a computed field
-            for outcome in task.outcomes.order_by('-severity_in_db').iterator():
-
-                mapped = {
-                    "id": outcome.public_id,
-                    "attribute": json.loads(outcome.feature)['attribute'] if outcome.feature else None, # eg. 'IfcSpatialStructureElement.WR41',
-                    "constraint_type": json.loads(outcome.feature)['type'] if outcome.feature else None,  # 'uncategorized', 'schema', 'global_rule', 'simpletype_rule', 'entity_rule'
-                    "instance_id": outcome.instance_public_id,
-                    "severity": outcome.severity,
-                    "severity_pre_allowlist": outcome.severity_in_db,
-                    "allowlisted": outcome.is_whitelisted, 
-                    "msg": outcome.observed,
-                    "task_id": outcome.validation_task_public_id
-                }
-
-                key = mapped.get('attribute', None) or 'Uncategorized'
-                _type = mapped.get('constraint_type', None) or 'Uncategorized'
-                title = _type.replace('_', ' ').capitalize() + ' - ' + key
-                mapped['title'] = title # eg. 'Schema - SegmentStart'
-                schema_results_count[title] += 1
-                if schema_results_count[title] > MAX_OUTCOMES_PER_RULE:
-                    continue
-                
-                schema_results.append(mapped)
-
-                inst = outcome.instance
-                if inst and inst.public_id not in instances:
-                    instance = {
-                        "guid": f'#{inst.stepfile_id}',
-                        "type": inst.ifc_type
-                    }
-                    instances[inst.public_id] = instance
-    
-        logger.info('Fetching and mapping schema done.')
-
-    # retrieve and map gherkin rules outcome(s) + instances
-    grouping = (
-        ('normative', (ValidationTask.Type.NORMATIVE_IA, ValidationTask.Type.NORMATIVE_IP)),
-        ('prerequisites', (ValidationTask.Type.PREREQUISITES,)),
-        ('industry', (ValidationTask.Type.INDUSTRY_PRACTICES,)))
-    
-    grouped_gherkin_outcomes_counts = { 
-        'normative': defaultdict(int),
-        'prerequisites': defaultdict(int),
-        'industry': defaultdict(int)
-    }
-    grouped_gherkin_outcomes = {k: list() for k in map(operator.itemgetter(0), grouping)}
-
-    for label, types in grouping:
-
-        if not (report_type == label or (label == 'prerequisites' and report_type == 'schema')):
-            continue
-
-        logger.info(f'Fetching and mapping {label} gherkin results...')
-
-        tasks = [ValidationTask.objects.filter(request_id=request.id, type=t).last() for t in types]
-        all_features = itertools.chain.from_iterable([t.outcomes.values('feature').distinct().annotate(count=Count('feature')) for t in tasks])
-        for item in all_features:
-
-            feature = item.get('feature')
-            count = item.get('count')
-
-            # TODO: organize this differently?
-            key = 'Schema - Version' if label == 'prerequisites' else feature
-            grouped_gherkin_outcomes_counts[label][key] = count
-
-            all_feature_outcomes : typing.Sequence[ValidationOutcome] = itertools.chain.from_iterable(
-                list(t.outcomes.filter(feature=feature)
-                 .prefetch_related("instance")                 
-                 [:MAX_OUTCOMES_PER_RULE])
-                 for t in tasks)
-                 
-            for outcome in all_feature_outcomes:
-
-                mapped = {
-                    "id": outcome.public_id,
-                    "title": key,
-                    "feature": feature,
-                    "feature_version": outcome.feature_version,
-                    "feature_url": get_feature_url(outcome.feature[0:6]),
-                    "feature_text": get_feature_description(outcome.feature[0:6]),
-                    "severity": outcome.severity,
-                    "severity_pre_allowlist": outcome.severity_in_db,
-                    "allowlisted": outcome.is_whitelisted, 
-                    "instance_id": outcome.instance_public_id,
-                    "expected": outcome.expected,
-                    "observed": outcome.observed,
-                    "message": str(outcome) if outcome.expected and outcome.observed else None,
-                    "task_id": outcome.validation_task_public_id,
-                    "msg": outcome.observed,
-                }
-                
-                grouped_gherkin_outcomes[label].append(mapped)
-
-                inst = outcome.instance
-                if inst and inst.public_id not in instances:
-                    instance = {
-                        "guid": f'#{inst.stepfile_id}',
-                        "type": inst.ifc_type
-                    }
-                    instances[inst.public_id] = instance
-
-        logger.info(f'Mapped {label} gherkin results.')
-        
-    # retrieve and map bsdd results + instances
-    bsdd_results = []
+    # bSDD is disabled > 404-NotFound
     if report_type == 'bsdd' and request.model:
-
-        # bSDD is disabled > 404-NotFound
         logger.warning('Note: bSDD checks/reports are disabled.')
         return HttpResponseNotFound('bSDD checks are disabled')
 
-        logger.info('Fetching and mapping bSDD results...')
-
-        # only concerned about last run of each task
-        task = ValidationTask.objects.filter(request_id=request.id, type=ValidationTask.Type.BSDD).last()
-        if task.outcomes:
-            for outcome in task.outcomes.iterator():
-                feature_json = json.loads(outcome.feature)
-                mapped = {
-                    "id": outcome.id,                    
-                    "severity": outcome.severity,
-                    "instance_id": outcome.instance_id,
-                    "expected": outcome.expected,
-                    "observed": outcome.observed,
-                    "category": feature_json['category'] if 'category' in feature_json else None,
-                    "dictionary": feature_json['dictionary'] if 'dictionary' in feature_json else None,
-                    "class": feature_json['class'] if 'class' in feature_json else None,
-                    "task_id": outcome.validation_task_public_id,
-                }
-                bsdd_results.append(mapped)
-
-                inst = outcome.instance
-                if inst and inst.id not in instances:
-                    instance = {
-                        "guid": f'#{inst.stepfile_id}',
-                        "type": inst.ifc_type
-                    }
-                    instances[inst.id] = instance
-
-        logger.info('Fetching and mapping bSDD done.')
-
-    signatures = []
-    if report_type == "file":
-        task = ValidationTask.objects.filter(request_id=request.id, type=ValidationTask.Type.DIGITAL_SIGNATURES).last()
-        signatures = [t.observed for t in task.outcomes.iterator()] if task else None
-        
-    response_data = {
-        'instances': instances,
-        'model': model,
-        'results': {
-            "syntax_results": syntax_results,
-            "schema": {
-                "counts": [schema_results_count],
-                "results": schema_results,
-            },
-            "bsdd_results": bsdd_results,
-            "norm_rules": {
-                "counts": grouped_gherkin_outcomes_counts["normative"],
-                "results": grouped_gherkin_outcomes["normative"],
-            },
-            "ind_rules": {
-                "counts": grouped_gherkin_outcomes_counts["industry"],
-                "results": grouped_gherkin_outcomes["industry"],
-            },
-            "prereq_rules": {
-                "counts": [grouped_gherkin_outcomes_counts["prerequisites"]],
-                "results": grouped_gherkin_outcomes["prerequisites"]
-            },
-            "signatures": signatures
-        }
-    }
+    # instances + results of the requested section, materialized for completed requests
+    section = get_report_section(request, report_type)
+
+    # return file metrics as projection of Validation Request + Model attributes
+    model = json.dumps(format_request(request), cls=DjangoJSONEncoder).encode('utf-8')
+
+    return HttpResponse(b'{"model": ' + model + b', ' + section[1:], content_type='application/json')
+
+
+@ensure_csrf_cookie
+def report_stream(request, id: str):
+
+    """
+    Streams one section of the report as newline-delimited JSON (counts, instances, results),
+    optionally paginated with 'limit' and the 'next_cursor' of the previous page.
+    Memory use of the web worker does not depend on the number of outcomes.
+    """
+
+    if request.method != "GET":
+        logger.error(f'Received invalid request: {request}')
+        return HttpResponseNotAllowed(["GET"])
+
+    section = request.GET.get('section')
+    cursor = request.GET.get('cursor') or None
+    limit = request.GET.get('limit')
+    if section not in STREAMED_SECTIONS:
+        return HttpResponseBadRequest(f"Invalid section, expected one of: {', '.join(STREAMED_SECTIONS)}")
+    if limit is not None and (not limit.isdigit() or int(limit) == 0):
+        return HttpResponseBadRequest("Invalid limit")
+    try:
+        if cursor is not None:
+            ValidationOutcome.to_private_id(cursor)
+    except Exception:
+        return HttpResponseBadRequest("Invalid cursor")
+
+    # fetch current user
+    user = get_current_user(request)
+    if not user:
+        return create_redirect_response(login=True)
+
+    # return 404-NotFound if report is not for current user or if it is deleted
+    request = ValidationRequest.objects.filter(created_by__id=user.id, deleted=False, id=ValidationRequest.to_private_id(id)).select_related('model', 'model__produced_by', 'created_by').first()
+    if not request:
+        return HttpResponseNotFound()
 
-    logger.info('Serializing to JSON...')
-    response = JsonResponse(response_data)
-    logger.info('JSON done.')
+    def lines():
+        if cursor is None:
+            yield json.dumps({"type": "model", "model": format_request(request)}, cls=DjangoJSONEncoder) + "\n"
+        for record in iter_section_records(request, section, cursor=cursor, limit=int(limit) if limit else None):
+            yield json.dumps(record, cls=DjangoJSONEncoder) + "\n"
 
+    response = StreamingHttpResponse(lines(), content_type='application/x-ndjson')
+    response['X-Accel-Buffering'] = 'no'  # disable nginx proxy buffering
     return response
 
 
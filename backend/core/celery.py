@@ -79,4 +79,7 @@ app.autodiscover_tasks()
 app.conf.task_queues = (
     Queue('celery'),    # default queue for general tasks
     Queue('antivirus'), # queue for antivirus task
+    Queue('validation-small'),   # validation subtasks per file size tier, consumed in this order
+    Queue('validation-medium'),  # (see apps/ifc_validation/tasks/scheduler.py)
+    Queue('validation-large'),
 )
\ No newline at end of file
@@ -1,52 +1,131 @@
+"""
+Per-user semaphore: each user holds at most USER_MAX_CONCURRENT_TASKS permits at once.
+
+Tasks that can't get a permit are parked in a FIFO waiting list, together with a payload
+(eg. the serialized task) that is handed back - with the permit already assigned to it - as
+soon as a permit frees up. Permits expire after USER_PERMIT_TTL, so a crashed holder can't
+block a user forever; their expiry is refreshed when the task actually starts, as a resumed
+task may wait in the broker queue for a while.
+
+Keys:
+  semaphore:user:<user_id>:holders  sorted set: permit token -> expires at
+  semaphore:user:<user_id>:waiting  list: '<permit token>:<payload>'
+"""
+
 from redis import Redis
-from redis.lock import Lock
-from contextlib import contextmanager
 import logging
+import time
+import uuid
 
-from .settings import CELERY_BROKER_URL
+from .settings import CELERY_BROKER_URL, USER_MAX_CONCURRENT_TASKS, USER_PERMIT_TTL
 
 logger = logging.getLogger(__name__)
 redis_client: Redis = Redis.from_url(CELERY_BROKER_URL, decode_responses=True)
 
 
-class LockError(Exception):
-    pass
+# hands free permits to waiting entries (oldest first) and returns their payloads
+_GRANT_WAITING = """
+local granted = {}
+while redis.call('ZCARD', KEYS[1]) < tonumber(ARGV[1]) do
+    local entry = redis.call('LPOP', KEYS[2])
+    if not entry then break end
+    local sep = string.find(entry, ':', 1, true)
+    redis.call('ZADD', KEYS[1], tonumber(ARGV[2]) + tonumber(ARGV[3]), string.sub(entry, 1, sep - 1))
+    table.insert(granted, string.sub(entry, sep + 1))
+end
+return granted
+"""
+
+_ACQUIRE = """
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', ARGV[2])
+local acquired = 0
+if redis.call('LLEN', KEYS[2]) == 0 and redis.call('ZCARD', KEYS[1]) < tonumber(ARGV[1]) then
+    redis.call('ZADD', KEYS[1], tonumber(ARGV[2]) + tonumber(ARGV[3]), ARGV[4])
+    acquired = 1
+else
+    redis.call('RPUSH', KEYS[2], ARGV[4] .. ':' .. ARGV[5])
+end
+local function grant_waiting()
+""" + _GRANT_WAITING + """
+end
+return {acquired, grant_waiting()}
+"""
+
+_RELEASE = """
+redis.call('ZREM', KEYS[1], ARGV[4])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', ARGV[2])
+""" + _GRANT_WAITING
+
+# extends a permit that is still held
+_REFRESH = """
+if redis.call('ZSCORE', KEYS[1], ARGV[3]) then
+    redis.call('ZADD', KEYS[1], tonumber(ARGV[1]) + tonumber(ARGV[2]), ARGV[3])
+    return 1
+end
+return 0
+"""
+
+_acquire_script = redis_client.register_script(_ACQUIRE)
+_release_script = redis_client.register_script(_RELEASE)
+_refresh_script = redis_client.register_script(_REFRESH)
+
+
+def _keys(user_id):
+    prefix = f"semaphore:user:{user_id}"
+    return [f"{prefix}:holders", f"{prefix}:waiting"]
+
+
+def new_permit_token():
+    return uuid.uuid4().hex
+
+
+def acquire_user_permit(user_id: int | str, token: str, payload: str):
+    """
+    Tries to acquire a permit for 'token'; otherwise parks 'payload' at the end of the user's waiting list.
+    Returns whether the permit was acquired, and the payloads that were handed a permit meanwhile.
+    """
+    acquired, granted = _acquire_script(
+        keys=_keys(user_id),
+        args=[USER_MAX_CONCURRENT_TASKS, time.time(), USER_PERMIT_TTL, token, payload],
+    )
+    if acquired:
+        logger.info(f"Permit acquired for user {user_id} (token={token})")
+    else:
+        logger.info(f"No permit available for user {user_id}, waiting (token={token})")
+    return bool(acquired), granted
+
+
+def refresh_user_permit(user_id: int | str, token: str):
+    """
+    Restarts the USER_PERMIT_TTL of the permit of 'token'; returns False if it was released meanwhile (eg. it expired).
+    """
+    refreshed = _refresh_script(
+        keys=_keys(user_id)[:1],
+        args=[time.time(), USER_PERMIT_TTL, token],
+    )
+    if not refreshed:
+        logger.warning(f"Permit of user {user_id} was released before its task started (token={token})")
+    return bool(refreshed)
 
 
-@contextmanager
-def acquire_user_lock(
-    user_id: int | str,
-    task_name: str,                # name of the task being locked
-    timeout: int = 3600,           # lock TTL — should cover longest realistic step
-    blocking_timeout: int = 5,     # how long caller waits to acquire (seconds)
-    renew_interval: float = 10.0,  # auto-renew thread interval (if needed)
-):
+def release_user_permit(user_id: int | str, token: str):
     """
-    Acquire a distributed lock for a specific user and task name.
-    Raises RuntimeError if lock cannot be acquired within blocking_timeout.
+    Releases the permit of 'token'; returns the payloads of waiting entries that were handed a permit.
     """
-    lock_key = f"lock:celery:user:{user_id}:task:{task_name}"
-    lock = Lock(
-        redis_client,
-        name=lock_key,
-        timeout=timeout,                    # auto-expire if holder crashes
-        blocking_timeout=blocking_timeout,  # how long to wait before giving up
-        thread_local=True,                  # default — safe for Celery workers
+    granted = _release_script(
+        keys=_keys(user_id),
+        args=[USER_MAX_CONCURRENT_TASKS, time.time(), USER_PERMIT_TTL, token],
     )
+    logger.debug(f"Permit released for user {user_id} (token={token}), {len(granted)} waiting entries resumed")
+    return granted
 
-    acquired = lock.acquire(blocking=True)
-    if not acquired:
-        raise LockError(f"User {user_id} already has an active task_name {task_name} (lock held).")
-
-    try:
-        logger.info(f"Lock acquired for user {user_id} and task {task_name} (key={lock_key})")
-        yield lock
-    except Exception:
-        logger.exception(f"Error inside user lock for {user_id} and task {task_name}")
-        raise
-    finally:
-        try:
-            lock.release()
-            logger.debug(f"Lock released for user {user_id} and task {task_name}")
-        except Exception:
-            logger.warning(f"Failed to release lock for user {user_id} and task {task_name} — may have expired naturally")
\ No newline at end of file
+
+def release_expired_permits():
+    """
+    Releases expired permits of all users; returns the payloads of waiting entries that were handed a permit.
+    """
+    granted = []
+    for key in redis_client.scan_iter("semaphore:user:*:waiting"):
+        user_id = key.split(":")[2]
+        granted += release_user_permit(user_id, token="")
+    return granted
@@ -47,6 +47,9 @@ FEATURE_URL = os.getenv(
 # Max. number of outcomes shown in UI
 MAX_OUTCOMES_PER_RULE = 10
 
+# run IA, IP and industry practice rules in one process on a single parse of the file
+GHERKIN_FUSED_EXECUTION = ast.literal_eval(os.environ.get("GHERKIN_FUSED_EXECUTION", 'False'))
+
 ALLOWED_HOSTS = ["127.0.0.1", "0.0.0.0", "localhost", "backend"]
 
 if os.environ.get("DJANGO_ALLOWED_HOSTS") is not None:
@@ -115,6 +118,7 @@ if os.environ.get("DJANGO_TRUSTED_ORIGINS") is not None:
 CORS_ALLOW_METHODS = [
     'DELETE',
     'GET',
+    'HEAD',
     'OPTIONS',
     'PATCH',
     'POST',
@@ -130,8 +134,14 @@ CORS_ALLOW_HEADERS = [
     'user-agent',
     'x-requested-with',
     'x-csrf-token',
-    'cache-control' # extra header
+    'cache-control', # extra header
+    'tus-resumable', # resumable uploads
+    'upload-length',
+    'upload-metadata',
+    'upload-offset',
+    'upload-checksum',
 ]
+CORS_EXPOSE_HEADERS = ['tus-resumable', 'upload-offset', 'upload-length', 'location', 'validation-request-id']
 
 CSRF_COOKIE_NAME = 'csrftoken'
 CSRF_HEADER_NAME = 'HTTP_X_CSRF_TOKEN'
@@ -308,6 +318,12 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 # Uploaded files
 MAX_FILES_PER_UPLOAD = 100
 MAX_FILE_SIZE_IN_MB = int(os.environ.get("MAX_FILE_SIZE_IN_MB", 256))  # default to 256 MB
+MAX_UPLOAD_CHUNK_SIZE_IN_MB = int(os.environ.get("MAX_UPLOAD_CHUNK_SIZE_IN_MB", 32))  # resumable uploads (see apps/ifc_validation/chunked_upload.py)
+CHUNKED_UPLOAD_EXPIRY_HOURS = int(os.environ.get("CHUNKED_UPLOAD_EXPIRY_HOURS", 24))  # unfinished resumable uploads are removed by the file retention task
+FILE_UPLOAD_HANDLERS = [
+    "django.core.files.uploadhandler.MemoryFileUploadHandler",
+    "django.core.files.uploadhandler.TemporaryFileUploadHandler",
+]
 MEDIA_URL = '/files/'
 MEDIA_ROOT = os.environ.get('MEDIA_ROOT', '/files_storage')
 try:
@@ -350,6 +366,22 @@ CELERY_TASK_ACKS_LATE = True
 CELERY_TASK_STORE_ERRORS_EVEN_IF_IGNORED = True
 CELERY_BROKER_CONNECTION_RETRY_ON_STARTUP = True
 
+# scheduling of validation workflows (see apps/ifc_validation/tasks/scheduler.py): subtasks are routed to
+# size-tiered queues that workers take turns on; optionally (SCHEDULER_ENABLED) at most SCHEDULER_MAX_RUNNING
+# workflows run at once, shared between users in proportion to the weight of the channel they submitted through
+CELERY_BROKER_TRANSPORT_OPTIONS = {'queue_order_strategy': 'round_robin'}
+SCHEDULER_ENABLED = ast.literal_eval(os.environ.get("SCHEDULER_ENABLED", 'False'))
+SCHEDULER_MAX_RUNNING = int(os.environ.get("SCHEDULER_MAX_RUNNING", 8))
+SCHEDULER_SMALL_FILE_SIZE_IN_MB = int(os.environ.get("SCHEDULER_SMALL_FILE_SIZE_IN_MB", 10))
+SCHEDULER_LARGE_FILE_SIZE_IN_MB = int(os.environ.get("SCHEDULER_LARGE_FILE_SIZE_IN_MB", 100))
+SCHEDULER_CHANNEL_WEIGHTS = {'WEBUI': 2, 'API': 1}
+SCHEDULER_STALE_AFTER = int(os.environ.get("SCHEDULER_STALE_AFTER", 3*3600))  # 3 hours without progress
+
+# per-user semaphore for validation subtasks (see core/redis_lock.py): tasks without a permit wait
+# in a FIFO list and are sent to the workers again once a permit frees up
+USER_MAX_CONCURRENT_TASKS = int(os.environ.get("USER_MAX_CONCURRENT_TASKS", 4))
+USER_PERMIT_TTL = CELERY_TASK_TIME_LIMIT + 60  # a permit outlives the task holding it
+
 CELERY_WORKER_STATE_DB = os.environ.get("CELERY_WORKER_STATE_DB", './celery-state')
 try:
     os.makedirs(os.path.dirname(CELERY_WORKER_STATE_DB), exist_ok=True) 
@@ -364,6 +396,32 @@ except Exception as err:
     msg = "Configuration for CELERY_BEAT_SCHEDULE_FILENAME is invalid: '{}' does not exist and could not be created ({})."
     raise ImproperlyConfigured(msg.format(os.path.dirname(CELERY_BEAT_SCHEDULE_FILENAME), err))
 
+# optional warm check daemon (see apps/ifc_validation/checks/check_daemon.py)
+CHECK_DAEMON_SOCKET = os.environ.get("CHECK_DAEMON_SOCKET", None)
+
+# reuse results of identical files (same SHA-256 and same rules/tooling versions)
+RESULT_CACHE_ENABLED = ast.literal_eval(os.environ.get("RESULT_CACHE_ENABLED", 'True'))
+RESULT_CACHE_TTL = int(os.environ.get("RESULT_CACHE_TTL", 30*24*3600))  # 30 days
+
+# report sections are materialized (in the database) when a validation completes or on first read,
+# and removed REPORT_CACHE_TTL after (see apply_file_retention)
+REPORT_CACHE_TTL = int(os.environ.get("REPORT_CACHE_TTL", 7*24*3600))  # 7 days
+
+# responses of the admin charts; closed years don't change, current year is invalidated on changes
+CHART_CACHE_ENABLED = ast.literal_eval(os.environ.get("CHART_CACHE_ENABLED", 'True'))
+CHART_CACHE_TTL_CLOSED = int(os.environ.get("CHART_CACHE_TTL_CLOSED", 7*24*3600))  # 7 days
+CHART_CACHE_TTL_CURRENT = int(os.environ.get("CHART_CACHE_TTL_CURRENT", 10*60))  # 10 minutes
+
+# Prometheus scrape endpoint of check resource usage (see apps/ifc_validation/metrics.py)
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", None)
+
+# push updates of validation requests (Server-Sent Events); streams are closed after
+# PROGRESS_STREAM_MAX_DURATION seconds so they don't occupy a web worker thread forever,
+# and a user has at most PROGRESS_STREAM_MAX_PER_USER of them open at once
+PROGRESS_STREAM_HEARTBEAT = int(os.environ.get("PROGRESS_STREAM_HEARTBEAT", 15))
+PROGRESS_STREAM_MAX_DURATION = int(os.environ.get("PROGRESS_STREAM_MAX_DURATION", 300))
+PROGRESS_STREAM_MAX_PER_USER = int(os.environ.get("PROGRESS_STREAM_MAX_PER_USER", 3))
+
 ARCHIVE_FILES_LOOKBACK_PERIOD = os.environ.get("ARCHIVE_FILES_LOOKBACK_PERIOD", 90)
 REMOVE_FILES_LOOKBACK_PERIOD = os.environ.get("REMOVE_FILES_LOOKBACK_PERIOD", 180)
 CELERY_BEAT_SCHEDULE = {
@@ -377,6 +435,18 @@ CELERY_BEAT_SCHEDULE = {
             'schedule': crontab(minute=0, hour='*/1'),  # runs every hour, at the hour
             'kwargs': { 'days': REMOVE_FILES_LOOKBACK_PERIOD, 'dry_run': False, 'action': 'remove' }
         },
+        'refresh-chart-rollups-every-10min': {
+            'task': 'apps.ifc_validation.tasks.chart_rollup_tasks.refresh_chart_rollups',
+            'schedule': crontab(minute='*/10'),  # runs every 10 min
+        },
+        'release-expired-user-permits-every-5min': {
+            'task': 'apps.ifc_validation.tasks.task_runner.release_expired_user_permits',
+            'schedule': crontab(minute='*/5'),  # runs every 5 min
+        },
+        'release-finished-workflows-every-5min': {
+            'task': 'apps.ifc_validation.tasks.task_runner.release_finished_workflows',
+            'schedule': crontab(minute='*/5'),  # runs every 5 min
+        },
     }
 
 # LOGGING
@@ -10,6 +10,7 @@ from django.views.decorators.csrf import csrf_exempt
 from drf_spectacular.views import SpectacularAPIView, SpectacularRedocView, SpectacularSwaggerView
 
 from .views_auth import login, logout, callback, whoami
+from apps.ifc_validation.metrics import metrics_view
 
 from core.settings import MEDIA_ROOT, MEDIA_URL, STATIC_URL, STATIC_ROOT
 from core.settings import DEVELOPMENT, PREVIEW
@@ -67,6 +68,9 @@ urlpatterns = [
     # charts
     path('api/charts/',         include('apps.ifc_validation.chart_urls')), # Django Admin UI charts
 
+    # metrics
+    path('api/metrics/',        metrics_view), # Prometheus scrape endpoint
+
     # APPS
     path('api/v1/',          include(('apps.ifc_validation.api.v1.urls', 'apps.ifc_validation'), namespace='v1')), # API v1
     path('bff/',             include('apps.ifc_validation_bff.urls')), # BFF for UI
@@ -21,4 +21,10 @@ echo "DB is ready."
 CELERY_CONCURRENCY=${CELERY_CONCURRENCY:-6} # default 6 worker processes
 echo "Celery concurrency: $CELERY_CONCURRENCY"
 
-celery --app=core worker -Q celery --loglevel=info --concurrency $CELERY_CONCURRENCY --task-events --hostname=worker@%n --beat --scheduler django_celery_beat.schedulers:DatabaseScheduler
\ No newline at end of file
+# optional warm interpreter daemon for check programs
+if [ -n "$CHECK_DAEMON_SOCKET" ]; then
+    echo "Starting check daemon on $CHECK_DAEMON_SOCKET"
+    python apps/ifc_validation/checks/check_daemon.py --socket "$CHECK_DAEMON_SOCKET" &
+fi
+
+celery --app=core worker -Q celery,validation-small,validation-medium,validation-large --loglevel=info --concurrency $CELERY_CONCURRENCY --task-events --hostname=worker@%n --beat --scheduler django_celery_beat.schedulers:DatabaseScheduler
\ No newline at end of file
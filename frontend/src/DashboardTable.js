@@ -248,6 +248,11 @@ export default function DashboardTable({ models }) {
   const [count, setCount] = React.useState(0);
   const [deleted, setDeleted] = useState('');
   const [progress, setProgress] = useState(0);
+  const [streaming, setStreaming] = useState(false);
+  const rowsRef = React.useRef(rows);
+  const pageRef = React.useRef(page);
+  rowsRef.current = rows;
+  pageRef.current = page;
 
   const context = useContext(PageContext);
   const handleAsyncError = HandleAsyncError();
@@ -258,11 +263,36 @@ export default function DashboardTable({ models }) {
       .then((json) => {
         setRows(json["models"]);
         setCount(json["count"]);
-        if (json.models.some(m => (m.progress < 100))) {
+        // poll only when push updates are not available
+        if (!streaming && json.models.some(m => (m.progress < 100))) {
           setTimeout(() => {setProgress(progress + 1)}, 5000)
         }
       }).catch(handleAsyncError);
-  }, [page, rowsPerPage, progress, deleted, handleAsyncError]);
+  }, [page, rowsPerPage, progress, deleted, streaming, handleAsyncError]);
+
+  // push updates (Server-Sent Events): only changed rows are sent
+  useEffect(() => {
+    if (typeof EventSource === 'undefined') {
+      return;
+    }
+    const source = new EventSource(`${FETCH_PATH}/api/models_stream`, { withCredentials: true });
+    source.onopen = () => setStreaming(true);
+    source.onerror = () => setStreaming(false); // EventSource reconnects; poll meanwhile
+    source.addEventListener('update', (event) => {
+      const changed = JSON.parse(event.data)["models"];
+      const visible = new Set(rowsRef.current.map(row => row.id));
+      const removed = changed.some(m => m.deleted && visible.has(m.id));
+      const added = pageRef.current === 0 && changed.some(m => !m.deleted && !visible.has(m.id));
+      if (removed || added) {
+        // rows appeared or disappeared: reload the current page
+        setProgress((p) => p + 1);
+        return;
+      }
+      const byId = Object.fromEntries(changed.map(m => [m.id, m]));
+      setRows((current) => current.map(row => byId[row.id] || row));
+    });
+    return () => source.close();
+  }, []);
 
 
   const handleSelectAllClick = (event) => {